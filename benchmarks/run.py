@@ -0,0 +1,333 @@
+"""
+Benchmarks of the mounty hot paths, run against FakeMountebank.
+
+    $ poetry run python benchmarks/run.py --output results.json
+    $ poetry run python benchmarks/run.py --sizes 1000 --only get_imposter
+
+Results are written as json, one entry per benchmark and size, so runs of
+different releases can be compared.
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+
+from mounty import Mountebank
+from mounty.fake import FakeMountebank
+from mounty.models import Imposter, RecordedRequest, Stub
+from mounty.serialization import JsonCodec, OrjsonCodec
+from mounty.validation import validate_imposters
+
+DEFAULT_SIZES = (1_000, 100_000)
+HUGE_SIZE = 1_000_000
+# requests arrive in batches while wait_for_requests polls
+SEED_BATCHES = 10
+SEED_INTERVAL = 0.02
+
+Result = Dict[str, Any]
+
+
+def recorded_request(i: int) -> dict:
+    return {
+        "requestFrom": "127.0.0.1:50000",
+        "method": "POST",
+        "path": f"/orders/{i % 100}",
+        "query": {"page": str(i % 10)},
+        "headers": {"Content-Type": "application/json", "Host": "localhost"},
+        "body": json.dumps({"id": i, "items": [{"sku": "A1", "qty": 2}]}),
+        "ip": "127.0.0.1",
+        "timestamp": "2022-03-01T10:00:00.000Z",
+    }
+
+
+def large_imposter(stubs: int) -> Imposter:
+    return Imposter(
+        port=4555,
+        protocol="http",
+        stubs=[
+            Stub(
+                predicates=[{"equals": {"method": "GET", "path": f"/items/{i}"}}],
+                responses=[{"is": {"statusCode": 200, "body": {"id": i}}}],
+            )
+            for i in range(stubs)
+        ],
+    )
+
+
+def measure(
+    name: str,
+    function: Callable[[], Any],
+    repeat: int = 5,
+    operations: int = 1,
+    **extra: Any,
+) -> Result:
+    """
+    Time a function, keeping the median wall clock and cpu time, then measure
+    its peak memory in a separate, untimed, run
+    :param name: benchmark name
+    :param function: measured function
+    :param repeat: number of timed runs
+    :param operations: operations performed by a single run
+    :param extra: fields added to the result, e.g. size
+    :return: result entry
+    """
+    wall, cpu = [], []
+    for _ in range(repeat):
+        gc.collect()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        function()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds = statistics.median(wall)
+    return dict(
+        name=name,
+        repeat=repeat,
+        operations=operations,
+        seconds=seconds,
+        min_seconds=min(wall),
+        cpu_seconds=statistics.median(cpu),
+        ops_per_second=operations / seconds if seconds else None,
+        peak_bytes=peak,
+        **extra,
+    )
+
+
+def measure_wait(
+    fake: FakeMountebank, mountebank: Mountebank, port: int, size: int, repeat: int
+) -> Result:
+    """
+    Time wait_for_requests while a background thread records the requests in
+    batches, so the polls made until the last batch arrives are measured too.
+    cpu_seconds is the cpu time of the waiting thread over the whole wait,
+    excluding the seeding thread and the fake server.
+    :param fake: fake the requests are recorded on
+    :param mountebank: client
+    :param port: recording imposter
+    :param size: number of requests waited for
+    :param repeat: number of timed runs
+    :return: result entry
+    """
+    requests = [recorded_request(i) for i in range(size)]
+    batch = -(-size // SEED_BATCHES)
+
+    def seed() -> None:
+        for start in range(0, size, batch):
+            time.sleep(SEED_INTERVAL)
+            fake.record_requests(port, requests[start : start + batch])
+
+    def wait() -> None:
+        mountebank.delete_requests_from_imposter(port)
+        seeder = threading.Thread(target=seed)
+        seeder.start()
+        try:
+            mountebank.wait_for_requests(port, count=size, timeout=60)
+        finally:
+            seeder.join()
+
+    wall, cpu = [], []
+    for _ in range(repeat):
+        gc.collect()
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        wait()
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.thread_time() - cpu_start)
+    gc.collect()
+    tracemalloc.start()
+    wait()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    seconds = statistics.median(wall)
+    return dict(
+        name="wait_for_requests",
+        repeat=repeat,
+        operations=1,
+        seconds=seconds,
+        min_seconds=min(wall),
+        cpu_seconds=statistics.median(cpu),
+        ops_per_second=1 / seconds if seconds else None,
+        peak_bytes=peak,
+        size=size,
+    )
+
+
+def bench_add_imposter(mountebank: Mountebank, count: int) -> List[Result]:
+    def add_imposters() -> None:
+        for _ in range(count):
+            mountebank.add_imposter({"protocol": "tcp", "stubs": []})
+        mountebank.delete_all_imposters()
+
+    return [measure("add_imposter", add_imposters, operations=count, size=count)]
+
+
+def bench_recorded_requests(
+    fake: FakeMountebank, mountebank: Mountebank, sizes: List[int]
+) -> List[Result]:
+    results = []
+    for size in sizes:
+        port = mountebank.add_imposter({"protocol": "tcp", "recordRequests": True}).port
+        fake.record_requests(port, [recorded_request(i) for i in range(size)])
+        repeat = 5 if size < HUGE_SIZE else 1
+        results.append(
+            measure(
+                "get_imposter",
+                lambda: mountebank.get_imposter(port),
+                repeat=repeat,
+                size=size,
+            )
+        )
+        results.append(
+            measure(
+                "iter_requests",
+                lambda: sum(1 for _ in mountebank.iter_requests(port)),
+                repeat=repeat,
+                size=size,
+            )
+        )
+        results.append(measure_wait(fake, mountebank, port, size, repeat))
+        mountebank.delete_imposter(port)
+    return results
+
+
+def bench_serialization(sizes: List[int]) -> List[Result]:
+    codecs: Dict[str, Any] = {"json": JsonCodec()}
+    try:
+        codecs["orjson"] = OrjsonCodec()
+    except ImportError:
+        pass
+    results = []
+    for size in sizes:
+        # one stub per 10 recorded requests keeps the 1M run reasonable
+        imposter = large_imposter(max(size // 10, 1))
+        for codec_name, codec in codecs.items():
+            results.append(
+                measure(
+                    "serialize_imposter",
+                    lambda: codec.dumps(imposter),
+                    size=len(imposter.stubs),
+                    codec=codec_name,
+                )
+            )
+    return results
+
+
+def bench_recorded_request_construction(sizes: List[int]) -> List[Result]:
+    results = []
+    for size in sizes:
+        payloads = [recorded_request(i) for i in range(size)]
+        results.append(
+            measure(
+                "recorded_request_from_dict",
+                lambda: [RecordedRequest.from_dict(payload) for payload in payloads],
+                operations=size,
+                size=size,
+            )
+        )
+    return results
+
+
+def bench_validation(sizes: List[int]) -> List[Result]:
+    results = []
+    for size in sizes:
+        imposter = large_imposter(max(size // 10, 1))
+        results.append(
+            measure(
+                "validate_imposter",
+                lambda: validate_imposters(imposter),
+                size=len(imposter.stubs),
+            )
+        )
+    return results
+
+
+BENCHMARKS = (
+    "add_imposter",
+    "recorded_requests",
+    "serialization",
+    "recorded_request_construction",
+    "validation",
+)
+
+
+def run(
+    sizes: List[int], imposters: int, only: Optional[List[str]] = None
+) -> List[Result]:
+    """
+    Run the selected benchmarks
+    :param sizes: number of recorded requests
+    :param imposters: number of imposters created by the add_imposter benchmark
+    :param only: names of the benchmarks to run, all by default
+    :return: results
+    """
+    selected = set(only or BENCHMARKS)
+    results: List[Result] = []
+    with FakeMountebank() as fake:
+        mountebank = Mountebank(url=fake.url)
+        if "add_imposter" in selected:
+            results.extend(bench_add_imposter(mountebank, imposters))
+        if "recorded_requests" in selected:
+            results.extend(bench_recorded_requests(fake, mountebank, sizes))
+    if "serialization" in selected:
+        results.extend(bench_serialization(sizes))
+    if "recorded_request_construction" in selected:
+        results.extend(bench_recorded_request_construction(sizes))
+    if "validation" in selected:
+        results.extend(bench_validation(sizes))
+    return results
+
+
+def _version() -> Optional[str]:
+    try:
+        return metadata.version("mounty")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=list(DEFAULT_SIZES),
+        help="comma separated recorded request counts, default 1000,100000",
+    )
+    parser.add_argument(
+        "--huge", action="store_true", help=f"also run with {HUGE_SIZE} requests"
+    )
+    parser.add_argument(
+        "--imposters", type=int, default=200, help="imposters added in add_imposter"
+    )
+    parser.add_argument("--only", action="append", choices=BENCHMARKS)
+    parser.add_argument("--output", help="json result file, stdout by default")
+    args = parser.parse_args(argv)
+    sizes = args.sizes + ([HUGE_SIZE] if args.huge else [])
+
+    report = {
+        "mounty": _version(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": run(sizes, args.imposters, args.only),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
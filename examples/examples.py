@@ -95,6 +95,13 @@ mountebank.overwrite_stubs_on_imposter(
     4556,
 )
 
+# insert a single stub first, then replace and delete it, without resending the other stubs
+mountebank.add_stub(Stub(responses=[{"is": {"statusCode": 404}}]), port=4556, index=0)
+mountebank.replace_stub(
+    Stub(responses=[{"is": {"statusCode": 500}}]), port=4556, index=0
+)
+mountebank.delete_stub(port=4556, index=0)
+
 # delete recorded requests from imposter
 mountebank.delete_requests_from_imposter(4556)
 
@@ -1,3 +1,15 @@
-from mounty.mountebank import Mountebank
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.mountebank import Mountebank
 
 __all__ = ["Mountebank"]
+
+
+def __getattr__(name: str) -> Any:
+    # imported on first use, so the command line starts without importing requests
+    if name == "Mountebank":
+        from mounty.mountebank import Mountebank
+
+        return Mountebank
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,5 @@
+import sys
+
+from mounty.cli import main
+
+sys.exit(main())
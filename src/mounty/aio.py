@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, List, Optional, Union
+
+try:
+    import httpx
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "AsyncMountebank requires httpx, install it with `pip install mounty[async]`"
+    ) from e
+
+from mounty.errors import (
+    Unavailable,
+    MissingEnvironmentVariable,
+    raise_for_error_response,
+)
+from mounty.instrumentation import (
+    PARSE_SECONDS,
+    POLL_ITERATIONS,
+    Instrumentation,
+    body_size,
+    operation_name,
+)
+from mounty.models import (
+    Imposter,
+    ImposterResponse,
+    RecordedRequest,
+    Stub,
+)
+from mounty.polling import Backoff
+from mounty.serialization import JSON_HEADERS, JsonCodec
+from mounty.validation import validate_imposters, validate_stubs
+
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMountebank:
+    """
+    An asyncio admin client for Mountebank, mirroring Mountebank.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        client: Optional[httpx.AsyncClient] = None,
+        json_codec: Optional[JsonCodec] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        validate: bool = True,
+    ) -> None:
+        self.url = url
+        self.validate = validate
+        self.json_codec = json_codec or JsonCodec()
+        self.instrumentation = instrumentation
+        self._imposters_url = f"{self.url}/imposters"
+        self._client = client or httpx.AsyncClient()
+
+    async def __aenter__(self) -> "AsyncMountebank":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the underlying HTTP client
+        :return:
+        """
+        await self._client.aclose()
+
+    async def __request(
+        self, method: str, url: str, payload: Any = None, **kwargs: Any
+    ) -> httpx.Response:
+        """
+        A wrapper over httpx request method, with the same error handling as Mountebank
+        :param method: "GET", "POST", etc.
+        :param url: request destination
+        :param payload: json body, encoded with the client json codec
+        :return:
+        """
+        if payload is not None:
+            kwargs["content"] = self.json_codec.dumps(payload)
+            kwargs["headers"] = JSON_HEADERS
+        if self.instrumentation is None:
+            response = await self._client.request(method, url, **kwargs)
+        else:
+            response = await self._instrumented_request(method, url, **kwargs)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Got response %s from %s", response.text, response.url)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise_for_error_response(e)
+
+            logger.exception("Unexpected error")
+            raise Unavailable() from e
+        return response
+
+    async def _instrumented_request(
+        self, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        response = None
+        start = time.perf_counter()
+        try:
+            response = await self._client.request(method, url, **kwargs)
+            return response
+        finally:
+            self.instrumentation.observe_request(
+                operation_name(method, url),
+                "error" if response is None else str(response.status_code),
+                time.perf_counter() - start,
+                body_size(kwargs.get("content")),
+                None if response is None else len(response.content),
+                # httpx retries failed connections without reporting them
+                retries=None,
+            )
+
+    def _decode(self, response: httpx.Response) -> Any:
+        if self.instrumentation is None:
+            return self.json_codec.loads(response.content)
+        start = time.perf_counter()
+        payload = self.json_codec.loads(response.content)
+        self.instrumentation.record(
+            PARSE_SECONDS,
+            time.perf_counter() - start,
+            operation=operation_name(
+                response.request.method, str(response.request.url)
+            ),
+        )
+        return payload
+
+    @classmethod
+    def from_env(cls) -> "AsyncMountebank":
+        """
+        Creates AsyncMountebank admin instance based on MOUNTEBANK_URL env variable
+        :return: AsyncMountebank admin instance
+        """
+        try:
+            return cls(url=os.environ["MOUNTEBANK_URL"])
+        except KeyError:
+            raise MissingEnvironmentVariable(
+                "MOUNTEBANK_URL environment variable is missing"
+            )
+
+    async def add_imposter(self, imposter: Union[dict, Imposter]) -> ImposterResponse:
+        """
+        Add imposter
+        :param imposter:
+        :return: ImposterResponse object (Imposter with extra fields)
+        """
+        if self.validate:
+            validate_imposters(imposter)
+        response = await self.__request(
+            method="POST", url=self._imposters_url, payload=imposter
+        )
+        return ImposterResponse.from_dict(self._decode(response))
+
+    async def delete_imposter(self, port: int) -> Optional[ImposterResponse]:
+        """
+        Delete an imposter
+        :param port: port
+        :return:
+        """
+        response = await self.__request(
+            method="DELETE", url=f"{self._imposters_url}/{port}"
+        )
+        payload = self._decode(response)
+        return ImposterResponse.from_dict(payload) if payload else None
+
+    async def delete_all_imposters(self) -> List[ImposterResponse]:
+        """
+        Delete all existing imposters
+        :return: list of existing imposters before deletion
+        """
+        response = await self.__request(method="DELETE", url=self._imposters_url)
+        imposters = self._decode(response).get("imposters")
+        return (
+            [ImposterResponse.from_dict(ires) for ires in imposters]
+            if imposters
+            else []
+        )
+
+    async def get_imposter(self, port: int) -> ImposterResponse:
+        """
+        Retrieve existing imposter details
+        :param port: imposter port
+        :return:
+        """
+        response = await self.__request(
+            method="GET", url=f"{self._imposters_url}/{port}"
+        )
+        return ImposterResponse.from_dict(self._decode(response))
+
+    async def get_imposters(self) -> List[ImposterResponse]:
+        """
+        Retrieve all existing imposters
+        :return:
+        """
+        response = await self.__request(method="GET", url=self._imposters_url)
+        payload = self._decode(response)
+        # Mountebank answers with {"imposters": [...]}, older mocks with a bare list
+        imposters = payload["imposters"] if isinstance(payload, dict) else payload
+        return [ImposterResponse.from_dict(ires) for ires in imposters]
+
+    async def overwrite_imposters(
+        self, *imposters: Union[Imposter, dict]
+    ) -> List[ImposterResponse]:
+        """
+        Overwrite all existing imposters
+        :param imposters: new imposters
+        :return: Updated list of imposters
+        """
+        if self.validate:
+            validate_imposters(*imposters)
+        response = await self.__request(
+            method="PUT",
+            url=self._imposters_url,
+            payload={"imposters": imposters},
+        )
+        return [
+            ImposterResponse.from_dict(imposter)
+            for imposter in self._decode(response)["imposters"]
+        ]
+
+    async def overwrite_stubs_on_imposter(
+        self, stubs: List[Union[Stub, dict]], port: int
+    ) -> ImposterResponse:
+        """
+        Overwrites stubs in an existing imposter
+        :param stubs: List of stubs as dictionary or Stub
+        :param port: imposter port
+        :return: updated imposter
+        """
+        if self.validate:
+            validate_stubs(*stubs)
+        response = await self.__request(
+            method="PUT",
+            url=f"{self._imposters_url}/{port}/stubs",
+            payload={"stubs": stubs},
+        )
+        return ImposterResponse.from_dict(self._decode(response))
+
+    async def delete_requests_from_imposter(self, port: int) -> ImposterResponse:
+        """
+        Delete all saved requests from an imposter
+        :param port: imposter port
+        :return: The imposter after deleting the saved requests
+        """
+        response = await self.__request(
+            method="DELETE", url=f"{self._imposters_url}/{port}/savedRequests"
+        )
+        return ImposterResponse.from_dict(self._decode(response))
+
+    async def wait_for_requests(
+        self,
+        port: int,
+        count: int = 1,
+        timeout: float = 5.0,
+        backoff: Optional[Backoff] = None,
+    ) -> List[RecordedRequest]:
+        """
+        Poll an imposter until a specific number of recorded requests are available,
+        without blocking the event loop between polls
+        :param port: imposter port
+        :param count: expected number of recorded requests
+        :param timeout: timeout
+        :param backoff: delays between polls, see Backoff
+        :return:
+        """
+        deadline = time.perf_counter() + timeout
+        delays = (backoff or Backoff()).delays()
+        iterations = 0
+        try:
+            while True:
+                iterations += 1
+                reqs = (await self.get_imposter(port)).requests
+                if len(reqs) >= count:
+                    return reqs
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise TimeoutError(f"Waited too long for {count} requests on stub.")
+                await asyncio.sleep(min(next(delays), remaining))
+        finally:
+            if self.instrumentation is not None:
+                self.instrumentation.record(
+                    POLL_ITERATIONS, iterations, condition="all"
+                )
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} url={self.url}>"
@@ -0,0 +1,253 @@
+from array import array
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from mounty.models import RecordedRequest
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """
+    Parse a Mountebank timestamp (ISO 8601, UTC) to epoch seconds
+    :param timestamp: e.g. 2022-03-01T10:00:00.123Z
+    :return: seconds since epoch, NaN if missing
+    """
+    if not timestamp:
+        return float("nan")
+    if timestamp.endswith("Z"):
+        timestamp = f"{timestamp[:-1]}+00:00"
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def _size(body: Any) -> int:
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    return 0
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    # imported on first use, numpy is optional and slow to import
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _quantile(values: Sequence[float], q: float) -> float:
+    # linear interpolation between the closest ranks of sorted values
+    if not values:
+        return float("nan")
+    rank = q * (len(values) - 1)
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class RequestColumns:
+    """
+    Recorded requests stored as columns: epoch timestamps, interned method and
+    path codes and body sizes, for load test reports over millions of requests.
+    When numpy is installed the aggregations run vectorized over zero copy views
+    of the columns, otherwise in plain Python.
+    """
+
+    def __init__(self) -> None:
+        self.timestamps = array("d")
+        self.methods = array("H")
+        self.paths = array("I")
+        self.body_sizes = array("q")
+        self.method_names: List[str] = []
+        self.path_names: List[str] = []
+        self._method_codes: Dict[str, int] = {}
+        self._path_codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def from_requests(
+        cls, requests: Iterable[Union[RecordedRequest, dict]]
+    ) -> "RequestColumns":
+        """
+        Build the columns from recorded requests, or their json payloads
+        :param requests: e.g. Mountebank.iter_requests() or read_drained_requests()
+        :return:
+        """
+        columns = cls()
+        for request in requests:
+            if isinstance(request, dict):
+                columns.append(
+                    request.get("method", ""),
+                    request.get("path", ""),
+                    request.get("timestamp", ""),
+                    _size(request.get("body")),
+                )
+            else:
+                columns.append(
+                    request.method,
+                    request.path,
+                    request.timestamp,
+                    _size(request.raw_body),
+                )
+        return columns
+
+    def append(self, method: str, path: str, timestamp: str, body_size: int) -> None:
+        """
+        Add a single request to the columns
+        :param method: http method
+        :param path: request path
+        :param timestamp: Mountebank timestamp
+        :param body_size: body size in bytes
+        :return:
+        """
+        self.timestamps.append(parse_timestamp(timestamp))
+        self.methods.append(self._intern(method, self._method_codes, self.method_names))
+        self.paths.append(self._intern(path, self._path_codes, self.path_names))
+        self.body_sizes.append(body_size)
+
+    @staticmethod
+    def _intern(value: str, codes: Dict[str, int], names: List[str]) -> int:
+        try:
+            return codes[value]
+        except KeyError:
+            codes[value] = len(names)
+            names.append(value)
+            return codes[value]
+
+    def _timestamps(self, path: Optional[str]) -> Any:
+        """
+        Sorted timestamps, without the missing ones
+        :param path: only keep the requests of this path
+        :return: numpy array, or list without numpy
+        """
+        np = _numpy()
+        if np is not None:
+            timestamps = np.frombuffer(self.timestamps, dtype=np.float64)
+            if path is not None:
+                code = self._path_codes.get(path)
+                if code is None:
+                    return timestamps[:0]
+                timestamps = timestamps[np.frombuffer(self.paths, np.uint32) == code]
+            return np.sort(timestamps[~np.isnan(timestamps)])
+        if path is None:
+            selected: Iterable[float] = self.timestamps
+        else:
+            code = self._path_codes.get(path)
+            selected = (
+                timestamp
+                for timestamp, path_code in zip(self.timestamps, self.paths)
+                if path_code == code
+            )
+        # NaN, the only value not equal to itself, marks a missing timestamp
+        return sorted(timestamp for timestamp in selected if timestamp == timestamp)
+
+    def counts_by_path(self) -> Dict[str, int]:
+        """
+        Number of requests by path
+        :return:
+        """
+        return self._counts(self.paths, np_type="uint32", names=self.path_names)
+
+    def counts_by_method(self) -> Dict[str, int]:
+        """
+        Number of requests by http method
+        :return:
+        """
+        return self._counts(self.methods, np_type="uint16", names=self.method_names)
+
+    @staticmethod
+    def _counts(codes: array, np_type: str, names: List[str]) -> Dict[str, int]:
+        np = _numpy()
+        if np is None:
+            return {names[code]: n for code, n in Counter(codes).items()}
+        # interned codes are dense: every code below len(names) occurs
+        counts = np.bincount(np.frombuffer(codes, dtype=np_type), minlength=len(names))
+        return {name: int(n) for name, n in zip(names, counts)}
+
+    def rate(
+        self, window: float = 1.0, path: Optional[str] = None
+    ) -> List[Tuple[float, float]]:
+        """
+        Request rate over consecutive time windows, empty windows included
+        :param window: window length, in seconds
+        :param path: only count the requests of this path
+        :return: (window start as epoch seconds, requests per second) pairs
+        """
+        timestamps = self._timestamps(path)
+        if not len(timestamps):
+            return []
+        start = float(timestamps[0])
+        np = _numpy()
+        if np is not None:
+            counts = np.bincount(((timestamps - start) // window).astype(np.int64))
+            return [
+                (start + bucket * window, int(n) / window)
+                for bucket, n in enumerate(counts)
+            ]
+        buckets = Counter(
+            int((timestamp - start) // window) for timestamp in timestamps
+        )
+        return [
+            (start + bucket * window, buckets.get(bucket, 0) / window)
+            for bucket in range(max(buckets) + 1)
+        ]
+
+    def inter_arrival_quantiles(
+        self, quantiles: Sequence[float] = (0.5, 0.9, 0.99), path: Optional[str] = None
+    ) -> Dict[float, float]:
+        """
+        Quantiles of the time between two consecutive requests
+        :param quantiles: requested quantiles, between 0 and 1
+        :param path: only consider the requests of this path
+        :return: seconds between requests, by quantile
+        """
+        timestamps = self._timestamps(path)
+        np = _numpy()
+        if np is not None:
+            return self._np_quantiles(np, np.diff(timestamps), quantiles)
+        gaps = sorted(b - a for a, b in zip(timestamps, timestamps[1:]))
+        return {q: _quantile(gaps, q) for q in quantiles}
+
+    def body_size_quantiles(
+        self, quantiles: Sequence[float] = (0.5, 0.9, 0.99)
+    ) -> Dict[float, float]:
+        """
+        Quantiles of the request body sizes
+        :param quantiles: requested quantiles, between 0 and 1
+        :return: body size in bytes, by quantile
+        """
+        np = _numpy()
+        if np is not None:
+            sizes = np.frombuffer(self.body_sizes, dtype=np.int64)
+            return self._np_quantiles(np, sizes, quantiles)
+        sizes = sorted(self.body_sizes)
+        return {q: _quantile(sizes, q) for q in quantiles}
+
+    @staticmethod
+    def _np_quantiles(
+        np: Any, values: Any, quantiles: Sequence[float]
+    ) -> Dict[float, float]:
+        if not len(values):
+            return {q: float("nan") for q in quantiles}
+        # linear interpolation, as _quantile
+        return dict(zip(quantiles, np.quantile(values, quantiles).tolist()))
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Zero copy numpy views of the columns, numpy must be installed
+        :return: numpy arrays by column name
+        """
+        numpy = _numpy()
+        if numpy is None:
+            raise ImportError("RequestColumns.to_numpy requires numpy")
+        return {
+            "timestamps": numpy.frombuffer(self.timestamps, dtype=numpy.float64),
+            "methods": numpy.frombuffer(self.methods, dtype=numpy.uint16),
+            "paths": numpy.frombuffer(self.paths, dtype=numpy.uint32),
+            "body_sizes": numpy.frombuffer(self.body_sizes, dtype=numpy.int64),
+        }
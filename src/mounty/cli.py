@@ -0,0 +1,383 @@
+"""
+mounty command line, for CI jobs pushing imposters without writing Python.
+
+    $ mounty apply imposters/ --replace-all
+    $ mounty wait 4545 --count 2 --timeout 10
+    $ mounty export snapshot.json.gz
+    $ mounty reset
+
+The Mountebank url comes from --url, MOUNTEBANK_URL or defaults to
+http://localhost:2525. Besides mounty.polling and mounty.serialization, only
+the standard library is imported, and most of it lazily: the command talks to
+Mountebank through http.client rather than the requests based client, whose
+import alone takes longer than a whole command.
+Imposter files are streamed from disk, never loaded in memory.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from mounty.polling import Backoff
+from mounty.serialization import JSON_HEADERS
+
+DEFAULT_URL = "http://localhost:2525"
+DEFAULT_WORKERS = 10
+CHUNK_SIZE = 64 * 1024
+IMPOSTER_FILES = (".json", ".json.gz")
+
+
+class CommandError(Exception):
+    """
+    Failed command, reported on stderr with a non zero exit status
+    """
+
+
+class _Client:
+    """
+    Minimal Mountebank admin client over http.client, one keep-alive connection
+    per thread
+    """
+
+    def __init__(self, url: str, timeout: float) -> None:
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        self.url = url
+        self._https = parts.scheme == "https"
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> Any:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            import http.client
+
+            cls = (
+                http.client.HTTPSConnection
+                if self._https
+                else http.client.HTTPConnection
+            )
+            connection = cls(self._netloc, timeout=self._timeout, blocksize=CHUNK_SIZE)
+            self._local.connection = connection
+        return connection
+
+    def open(
+        self,
+        method: str,
+        path: str,
+        body: Union[None, bytes, IO[bytes], Iterable[bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """
+        Send a request and return the response, unread
+        :param method: "GET", "POST", etc.
+        :param path: path below the admin url, e.g. /imposters
+        :param body: payload, a file or an iterable of chunks is streamed
+        :param headers: request headers
+        :return: http.client.HTTPResponse
+        """
+        import http.client
+
+        connection = self._connection()
+        for attempt in range(2):
+            try:
+                # files and iterables are sent chunked by http.client
+                connection.request(method, self._prefix + path, body, headers or {})
+                response = connection.getresponse()
+                break
+            except OSError as e:
+                connection.close()
+                reconnect = isinstance(
+                    e, (http.client.RemoteDisconnected, ConnectionResetError)
+                )
+                # a kept alive connection closed by Mountebank meanwhile is
+                # opened again once, when the body can be sent again
+                if (
+                    attempt
+                    or not reconnect
+                    or not isinstance(body, (bytes, type(None)))
+                ):
+                    raise CommandError(
+                        f"Mountebank unavailable at {self.url}: {e}"
+                    ) from e
+        if response.status >= 400:
+            raise CommandError(_error_message(response.status, response.read()))
+        return response
+
+    def call(
+        self,
+        method: str,
+        path: str,
+        body: Union[None, bytes, IO[bytes], Iterable[bytes]] = None,
+    ) -> Any:
+        """
+        Send a request and decode the json response
+        :return: decoded payload, None for an empty response
+        """
+        response = self.open(
+            method, path, body, JSON_HEADERS if body is not None else None
+        )
+        content = response.read()
+        return json.loads(content) if content else None
+
+    def request_counts(self) -> Dict[int, int]:
+        imposters = self.call("GET", "/imposters").get("imposters", [])
+        return {
+            imposter["port"]: imposter.get("numberOfRequests", 0)
+            for imposter in imposters
+        }
+
+
+def _error_message(status: int, content: bytes) -> str:
+    try:
+        error = json.loads(content)["errors"][0]
+        return f"{error['code']}: {error.get('message', '')}"
+    except (ValueError, KeyError, IndexError, TypeError):
+        return f"HTTP {status}: {content[:200].decode('utf-8', 'replace')}"
+
+
+def _open(path: str) -> IO[bytes]:
+    if path.endswith(".gz"):
+        import gzip
+
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _chunks(file: IO[bytes]) -> Iterator[bytes]:
+    return iter(lambda: file.read(CHUNK_SIZE), b"")
+
+
+def imposter_files(paths: Iterable[str]) -> List[str]:
+    """
+    Expand directories to the imposter files they contain, in name order
+    :param paths: files and directories
+    :return: files
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(IMPOSTER_FILES)
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def _post_file(client: _Client, path: str) -> Tuple[str, Optional[int], Optional[str]]:
+    try:
+        with _open(path) as file:
+            imposter = client.call("POST", "/imposters", file)
+    except (CommandError, OSError) as e:
+        return path, None, str(e)
+    return path, imposter.get("port"), None
+
+
+def apply(args: argparse.Namespace) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+
+    client = _client(args)
+    files = imposter_files(args.paths)
+    if not files:
+        raise CommandError("No imposter file found")
+    if args.replace_all:
+        client.call("DELETE", "/imposters")
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for path, port, error in pool.map(lambda path: _post_file(client, path), files):
+            if error is None:
+                print(f"{path}: created imposter {port}")
+            else:
+                failed += 1
+                print(f"{path}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def load(args: argparse.Namespace) -> int:
+    client = _client(args)
+    with _open(args.path) as file:
+        imposters = client.call("PUT", "/imposters", file)["imposters"]
+    print(f"loaded {len(imposters)} imposters")
+    return 0
+
+
+def export(args: argparse.Namespace) -> int:
+    client = _client(args)
+    remove_proxies = "false" if args.keep_proxies else "true"
+    response = client.open(
+        "GET", f"/imposters?replayable=true&removeProxies={remove_proxies}"
+    )
+    if args.split:
+        from mounty.streaming import iter_json_array
+
+        os.makedirs(args.path, exist_ok=True)
+        count = 0
+        # one imposter in memory at a time
+        for imposter in iter_json_array(_chunks(response), "imposters"):
+            with open(
+                os.path.join(args.path, f"{imposter['port']}.json"),
+                "w",
+                encoding="utf-8",
+            ) as file:
+                json.dump(imposter, file)
+            count += 1
+        print(f"exported {count} imposters to {args.path}")
+        return 0
+    if args.path == "-":
+        for chunk in _chunks(response):
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        return 0
+    if args.path.endswith(".gz"):
+        import gzip
+
+        output: IO[bytes] = gzip.open(args.path, "wb", compresslevel=6)
+    else:
+        output = open(args.path, "wb")
+    with output:
+        for chunk in _chunks(response):
+            output.write(chunk)
+    return 0
+
+
+def wait(args: argparse.Namespace) -> int:
+    client = _client(args)
+    deadline = time.monotonic() + args.timeout
+    delays = Backoff().delays()
+    while True:
+        received = client.request_counts().get(args.port)
+        if received is None:
+            raise CommandError(f"No imposter on port {args.port}")
+        if received >= args.count:
+            print(f"imposter {args.port} received {received} requests")
+            return 0
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(
+                f"imposter {args.port} received {received} of {args.count} "
+                f"requests in {args.timeout}s",
+                file=sys.stderr,
+            )
+            return 1
+        time.sleep(min(next(delays), remaining))
+
+
+def reset(args: argparse.Namespace) -> int:
+    client = _client(args)
+    if args.delete:
+        if not args.ports:
+            deleted = client.call("DELETE", "/imposters").get("imposters", [])
+            print(f"deleted {len(deleted)} imposters")
+        for port in args.ports:
+            client.call("DELETE", f"/imposters/{port}")
+            print(f"deleted imposter {port}")
+        return 0
+    ports = args.ports or [
+        port for port, count in client.request_counts().items() if count
+    ]
+    for port in ports:
+        client.call("DELETE", f"/imposters/{port}/savedRequests")
+        print(f"deleted the saved requests of imposter {port}")
+    return 0
+
+
+def _client(args: argparse.Namespace) -> _Client:
+    return _Client(args.url.rstrip("/"), args.http_timeout)
+
+
+def parser() -> argparse.ArgumentParser:
+    root = argparse.ArgumentParser(
+        prog="mounty", description="Mountebank admin commands"
+    )
+    root.add_argument(
+        "--url",
+        default=os.environ.get("MOUNTEBANK_URL", DEFAULT_URL),
+        help=f"Mountebank admin url, defaults to MOUNTEBANK_URL or {DEFAULT_URL}",
+    )
+    root.add_argument(
+        "--http-timeout",
+        type=float,
+        default=60.0,
+        help="connect and read timeout of each call, in seconds",
+    )
+    commands = root.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "apply", help="create the imposters of files and directories, in parallel"
+    )
+    command.add_argument(
+        "paths",
+        nargs="+",
+        help="imposter files (.json, .json.gz) or directories of them",
+    )
+    command.add_argument(
+        "--replace-all", action="store_true", help="delete every imposter first"
+    )
+    command.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    command.set_defaults(run=apply)
+
+    command = commands.add_parser(
+        "export", help="save the replayable definition of every imposter"
+    )
+    command.add_argument(
+        "path", help="snapshot file, gzip compressed if ending with .gz, - for stdout"
+    )
+    command.add_argument(
+        "--split",
+        action="store_true",
+        help="write one <port>.json file per imposter in path",
+    )
+    command.add_argument(
+        "--keep-proxies", action="store_true", help="keep the proxy responses"
+    )
+    command.set_defaults(run=export)
+
+    command = commands.add_parser(
+        "load", help="replace every imposter by the ones of an exported snapshot"
+    )
+    command.add_argument(
+        "path", help="snapshot file, gzip compressed if ending with .gz"
+    )
+    command.set_defaults(run=load)
+
+    command = commands.add_parser(
+        "wait", help="wait until an imposter received a number of requests"
+    )
+    command.add_argument("port", type=int)
+    command.add_argument("--count", type=int, default=1)
+    command.add_argument("--timeout", type=float, default=5.0, help="seconds")
+    command.set_defaults(run=wait)
+
+    command = commands.add_parser(
+        "reset",
+        help="delete the saved requests of every imposter, or of the given ones",
+    )
+    command.add_argument("ports", nargs="*", type=int)
+    command.add_argument(
+        "--delete", action="store_true", help="delete the imposters instead"
+    )
+    command.set_defaults(run=reset)
+    return root
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a command
+    :param argv: arguments, defaults to the process arguments
+    :return: exit status
+    """
+    args = parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except CommandError as e:
+        print(f"mounty {args.command}: {e}", file=sys.stderr)
+        return 1
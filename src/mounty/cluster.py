@@ -0,0 +1,262 @@
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar, Union
+
+from mounty.errors import Conflict, Error, NotFound
+from mounty.models import Imposter, ImposterResponse, RecordedRequest
+from mounty.mountebank import Mountebank
+from mounty.polling import Backoff
+from mounty.ports import PortAllocator, default_path
+
+T = TypeVar("T")
+
+
+class PlacementStrategy(ABC):
+    """
+    Choose the node of a new imposter
+    """
+
+    @abstractmethod
+    def choose(
+        self, cluster: "MountebankCluster", imposter: Union[dict, Imposter]
+    ) -> Mountebank:
+        """
+        :param cluster: cluster the imposter is added to
+        :param imposter: imposter to place
+        :return: node the imposter is added on
+        """
+
+
+class RoundRobin(PlacementStrategy):
+    """
+    Place imposters on each node in turn
+    """
+
+    def __init__(self) -> None:
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def choose(
+        self, cluster: "MountebankCluster", imposter: Union[dict, Imposter]
+    ) -> Mountebank:
+        with self._lock:
+            position = next(self._counter)
+        return cluster.nodes[position % len(cluster.nodes)]
+
+
+class LeastLoaded(PlacementStrategy):
+    """
+    Place imposters on the node which received the fewest requests (sum of the
+    numberOfRequests of its imposters), then hosting the fewest imposters.
+    Every placement polls the imposters list of all nodes, in parallel.
+    """
+
+    def choose(
+        self, cluster: "MountebankCluster", imposter: Union[dict, Imposter]
+    ) -> Mountebank:
+        counts = cluster.map(lambda node: node.get_request_counts())
+        loads = [(sum(c.values()), len(c), i) for i, c in enumerate(counts)]
+        return cluster.nodes[min(loads)[2]]
+
+
+class MountebankCluster:
+    """
+    Shard imposters across several Mountebank instances. The node owning each
+    imposter is remembered, so imposter ports must be unique in the cluster:
+    the port allocators of the nodes share their reservations.
+
+    Mountebank instances passed as nodes get the cluster port allocator too,
+    also for the calls made outside the cluster; the ports they had reserved
+    are moved to it.
+    """
+
+    def __init__(
+        self,
+        nodes: Sequence[Union[str, Mountebank]],
+        strategy: Optional[PlacementStrategy] = None,
+    ) -> None:
+        if not nodes:
+            raise ValueError("A cluster needs at least one node")
+        self.nodes: List[Mountebank] = [
+            Mountebank(url=node) if isinstance(node, str) else node for node in nodes
+        ]
+        self.strategy = strategy or RoundRobin()
+        path = default_path(" ".join(node.url for node in self.nodes))
+        for node in self.nodes:
+            allocator = PortAllocator(node, path)
+            allocator.adopt(node.port_allocator)
+            node.port_allocator = allocator
+        self._owners: Dict[int, Mountebank] = {}
+        self._lock = threading.Lock()
+
+    def map(self, function: Callable[[Mountebank], T]) -> List[T]:
+        """
+        Call a function on every node in parallel
+        :param function: called with each node
+        :return: results, in nodes order
+        """
+        with ThreadPoolExecutor(max_workers=len(self.nodes)) as pool:
+            return list(pool.map(function, self.nodes))
+
+    def node_of(self, port: int) -> Mountebank:
+        """
+        Node owning an imposter, imposters added by other clients are looked up
+        on every node
+        :param port: imposter port
+        :return: admin client of the owning node
+        """
+        with self._lock:
+            node = self._owners.get(port)
+        if node is None:
+            self.refresh()
+            with self._lock:
+                node = self._owners.get(port)
+        if node is None:
+            raise NotFound("no such resource", f"No imposter on port {port}")
+        return node
+
+    def refresh(self) -> None:
+        """
+        Rebuild the imposter owners from the imposters list of every node
+        :return:
+        """
+        ports = self.map(lambda node: list(node.get_request_counts()))
+        with self._lock:
+            self._owners = {
+                port: node
+                for node, node_ports in zip(self.nodes, ports)
+                for port in node_ports
+            }
+
+    def add_imposter(
+        self, imposter: Union[dict, Imposter], port_range: Optional[range] = None
+    ) -> ImposterResponse:
+        """
+        Add an imposter on the node chosen by the placement strategy
+        :param imposter:
+        :param port_range: ports to choose from, see Mountebank.add_imposter
+        :return: ImposterResponse object, see node_of for its node
+        """
+        port = imposter.get("port") if isinstance(imposter, dict) else imposter.port
+        node = self.strategy.choose(self, imposter)
+        if port is not None:
+            # reserved before the call, so two nodes never get the same port
+            with self._lock:
+                if port in self._owners:
+                    raise Conflict(
+                        "resource conflict", f"Port {port} is already in use"
+                    )
+                self._owners[port] = node
+        try:
+            response = node.add_imposter(imposter, port_range)
+        except Exception:
+            if port is not None:
+                with self._lock:
+                    self._owners.pop(port, None)
+            raise
+        with self._lock:
+            self._owners[response.port] = node
+        return response
+
+    def add_imposters(
+        self, *imposters: Union[dict, Imposter], port_range: Optional[range] = None
+    ) -> List[Union[ImposterResponse, Error]]:
+        """
+        Add imposters in parallel, without aborting on the failing ones
+        :param imposters: imposters to add
+        :param port_range: ports to choose from, see Mountebank.add_imposter
+        :return: ImposterResponse, or the raised error (e.g. Conflict), in imposters order
+        """
+
+        def add(imposter: Union[dict, Imposter]) -> Union[ImposterResponse, Error]:
+            try:
+                return self.add_imposter(imposter, port_range)
+            except Error as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=len(self.nodes) * 4) as pool:
+            return list(pool.map(add, imposters))
+
+    def get_imposter(self, port: int) -> ImposterResponse:
+        """
+        Retrieve existing imposter details from its node
+        :param port: imposter port
+        :return:
+        """
+        return self.node_of(port).get_imposter(port)
+
+    def delete_imposter(self, port: int) -> Optional[ImposterResponse]:
+        """
+        Delete an imposter from its node
+        :param port: imposter port
+        :return:
+        """
+        response = self.node_of(port).delete_imposter(port)
+        with self._lock:
+            self._owners.pop(port, None)
+        return response
+
+    def delete_requests_from_imposter(self, port: int) -> ImposterResponse:
+        """
+        Delete all saved requests from an imposter
+        :param port: imposter port
+        :return: The imposter after deleting the saved requests
+        """
+        return self.node_of(port).delete_requests_from_imposter(port)
+
+    def wait_for_requests(
+        self,
+        port: int,
+        count: int = 1,
+        timeout: float = 5.0,
+        backoff: Optional[Backoff] = None,
+    ) -> List[RecordedRequest]:
+        """
+        Poll an imposter until a specific number of recorded requests are available
+        :param port: imposter port
+        :param count: expected number of recorded requests
+        :param timeout: timeout
+        :param backoff: delays between polls, see Backoff
+        :return:
+        """
+        return self.node_of(port).wait_for_requests(port, count, timeout, backoff)
+
+    def get_imposters(self) -> List[ImposterResponse]:
+        """
+        Retrieve the imposters of every node, in parallel
+        :return: imposters of all nodes, in nodes order
+        """
+        imposters = self.map(lambda node: node.get_imposters())
+        with self._lock:
+            self._owners = {
+                imposter.port: node
+                for node, node_imposters in zip(self.nodes, imposters)
+                for imposter in node_imposters
+            }
+        return [imposter for node_imposters in imposters for imposter in node_imposters]
+
+    def get_request_counts(self) -> Dict[int, int]:
+        """
+        Retrieve the number of received requests for every imposter of every node
+        :return: numberOfRequests by imposter port
+        """
+        merged: Dict[int, int] = {}
+        for counts in self.map(lambda node: node.get_request_counts()):
+            merged.update(counts)
+        return merged
+
+    def delete_all_imposters(self) -> List[ImposterResponse]:
+        """
+        Delete the imposters of every node, in parallel
+        :return: imposters of all nodes before deletion
+        """
+        deleted = self.map(lambda node: node.delete_all_imposters())
+        with self._lock:
+            self._owners = {}
+        return [imposter for node_imposters in deleted for imposter in node_imposters]
+
+    def __repr__(self) -> str:
+        urls = ", ".join(node.url for node in self.nodes)
+        return f"<{type(self).__name__} nodes=[{urls}]>"
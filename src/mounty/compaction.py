@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+
+from mounty.mirror import canonical_key, normalize_stub
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.mountebank import Mountebank
+
+# response headers changing on every proxied call, compared case insensitively
+VOLATILE_HEADERS = frozenset(
+    {
+        "age",
+        "cf-ray",
+        "connection",
+        "content-length",
+        "date",
+        "etag",
+        "expires",
+        "keep-alive",
+        "last-modified",
+        "server-timing",
+        "transfer-encoding",
+        "via",
+        "x-amzn-trace-id",
+        "x-cache",
+        "x-request-id",
+        "x-runtime",
+    }
+)
+# fields Mountebank adds to the recorded responses
+_RECORDING_FIELDS = ("_proxyResponseTime",)
+
+
+@dataclass
+class CompactionReport:
+    """
+    Outcome of an imposter compaction, sizes are the compact json stubs sizes
+    """
+
+    port: int
+    stubs_before: int
+    stubs_after: int
+    responses_before: int
+    responses_after: int
+    bytes_before: int
+    bytes_after: int
+    stubs: List[dict] = field(default_factory=list, repr=False)
+
+    @property
+    def ratio(self) -> float:
+        """
+        Compacted size relative to the original size, lower is better
+        """
+        return self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+
+
+def _strip_response(response: dict, volatile_headers: Iterable[str]) -> dict:
+    if "is" not in response:
+        return response
+    is_ = {
+        key: val for key, val in response["is"].items() if key not in _RECORDING_FIELDS
+    }
+    if isinstance(is_.get("headers"), dict):
+        is_["headers"] = {
+            name: val
+            for name, val in is_["headers"].items()
+            if name.lower() not in volatile_headers
+        }
+    return dict(response, **{"is": is_})
+
+
+def _shortest_period(items: List[Any]) -> List[Any]:
+    # a cycle repeating a shorter cycle answers the same responses
+    keys = [canonical_key(item) for item in items]
+    for period in range(1, len(keys) // 2 + 1):
+        if len(keys) % period == 0 and keys == keys[:period] * (len(keys) // period):
+            return items[:period]
+    return items
+
+
+def compact_responses(responses: List[dict]) -> List[dict]:
+    """
+    Remove repetitions from a response cycle, without changing the responses
+    served: repeated cycles are cut to one, consecutive identical responses are
+    merged with the repeat behavior
+    :param responses: stub responses
+    :return: equivalent responses
+    """
+    compacted: List[dict] = []
+    for response in _shortest_period(responses):
+        repeat = response.get("repeat", 1)
+        single = {key: val for key, val in response.items() if key != "repeat"}
+        if compacted:
+            previous = compacted[-1]
+            previous_single = {
+                key: val for key, val in previous.items() if key != "repeat"
+            }
+            if canonical_key(previous_single) == canonical_key(single):
+                previous["repeat"] = previous.get("repeat", 1) + repeat
+                continue
+        compacted.append(dict(response))
+    return compacted
+
+
+def compact_stubs(
+    stubs: List[dict], volatile_headers: Iterable[str] = VOLATILE_HEADERS
+) -> List[dict]:
+    """
+    Compact recorded stubs: strip volatile response headers, append the
+    responses of stubs sharing the predicates of an earlier stub (which Mountebank
+    never reaches) to that stub's cycle, then deduplicate the response cycles
+    :param stubs: stubs, as returned by Mountebank
+    :param volatile_headers: response headers to remove, lower case
+    :return: compacted stubs
+    """
+    volatile_headers = frozenset(header.lower() for header in volatile_headers)
+    merged: Dict[str, dict] = {}
+    compacted: List[dict] = []
+    for stub in stubs:
+        stub = {
+            key: val for key, val in normalize_stub(stub).items() if key != "matches"
+        }
+        responses = [
+            _strip_response(response, volatile_headers)
+            for response in stub.get("responses", [])
+        ]
+        predicates = canonical_key(stub.get("predicates", []))
+        if predicates in merged:
+            merged[predicates]["responses"].extend(responses)
+            continue
+        stub["responses"] = responses
+        merged[predicates] = stub
+        compacted.append(stub)
+    for stub in compacted:
+        stub["responses"] = compact_responses(stub["responses"])
+    return compacted
+
+
+def compact_imposter(
+    mountebank: "Mountebank",
+    port: int,
+    volatile_headers: Iterable[str] = VOLATILE_HEADERS,
+    dry_run: bool = False,
+) -> CompactionReport:
+    """
+    Compact the stubs of an imposter, see compact_stubs, and overwrite them
+    unless dry_run is set or nothing changed
+    :param mountebank: admin client
+    :param port: imposter port
+    :param volatile_headers: response headers to remove, lower case
+    :param dry_run: only report
+    :return: report, holding the compacted stubs
+    """
+    stubs = [
+        {key: val for key, val in stub.items() if key not in ("_links", "matches")}
+        for stub in mountebank.get_imposter_payload(port).get("stubs", [])
+    ]
+    compacted = compact_stubs(stubs, volatile_headers)
+    report = CompactionReport(
+        port=port,
+        stubs_before=len(stubs),
+        stubs_after=len(compacted),
+        responses_before=sum(len(stub.get("responses", [])) for stub in stubs),
+        responses_after=sum(len(stub["responses"]) for stub in compacted),
+        bytes_before=len(mountebank.json_codec.dumps(stubs)),
+        bytes_after=len(mountebank.json_codec.dumps(compacted)),
+        stubs=compacted,
+    )
+    if not dry_run and canonical_key(compacted) != canonical_key(stubs):
+        mountebank.overwrite_stubs_on_imposter(compacted, port)
+    return report
@@ -0,0 +1,124 @@
+import gzip
+import json
+import logging
+import threading
+from typing import IO, TYPE_CHECKING, Any, Iterator, Optional
+
+from mounty.models import RecordedRequest
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.mountebank import Mountebank
+
+logger = logging.getLogger(__name__)
+
+
+def _open(path: str, mode: str) -> IO[bytes]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)  # type: ignore[return-value]
+    return open(path, mode)
+
+
+class RequestDrainer:
+    """
+    Periodically move the requests recorded by an imposter to a local NDJSON file,
+    so neither Mountebank nor the client accumulate them in memory.
+    Paths ending with .gz are gzip compressed.
+
+    Mountebank cannot atomically read and clear saved requests, so requests
+    recorded between the download and the deletion of a drain are lost. They are
+    counted in `lost`, from the numberOfRequests of the imposter right before the
+    deletion, and logged as a warning.
+    """
+
+    def __init__(
+        self, mountebank: "Mountebank", port: int, path: str, interval: float = 1.0
+    ) -> None:
+        self._mountebank = mountebank
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.drained = 0
+        self.lost = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "RequestDrainer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def drain(self) -> int:
+        """
+        Append the recorded requests to the file, then delete them from the imposter
+        :return: number of drained requests
+        """
+        codec = self._mountebank.json_codec
+        count = 0
+        file: Optional[IO[bytes]] = None
+        try:
+            for request in self._mountebank.iter_request_payloads(self.port):
+                if file is None:
+                    # idle drains leave the file untouched, no empty gzip member
+                    file = _open(self.path, "ab")
+                file.write(codec.dumps(request))
+                file.write(b"\n")
+                count += 1
+        finally:
+            if file is not None:
+                file.close()
+        if count:
+            received = self._mountebank.get_request_counts().get(self.port, count)
+            self._mountebank.delete_requests_from_imposter(self.port)
+            lost = received - count
+            if lost > 0:
+                self.lost += lost
+                logger.warning(
+                    f"{lost} requests recorded by imposter {self.port} during "
+                    "the drain were deleted without being drained"
+                )
+        self.drained += count
+        return count
+
+    def start(self) -> None:
+        """
+        Start draining in a background thread, every `interval` seconds
+        :return:
+        """
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"mounty-drain-{self.port}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread, after a last drain
+        :return:
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            stopping = self._stopped.wait(self.interval)
+            try:
+                self.drain()
+            except Exception:
+                logger.exception(f"Could not drain requests from imposter {self.port}")
+            if stopping:
+                return
+
+
+def read_drained_requests(path: str) -> Iterator[RecordedRequest]:
+    """
+    Stream the requests written by a RequestDrainer, one line at a time
+    :param path: NDJSON file, gzip compressed if ending with .gz
+    :return: iterator over the recorded requests, oldest first
+    """
+    with _open(path, "rb") as file:
+        for line in file:
+            yield RecordedRequest.from_dict(json.loads(line))
@@ -1,3 +1,6 @@
+from typing import List
+
+
 class Error(Exception):
     ...
 
@@ -30,5 +33,40 @@ class MissingFields(ImposterError):
     """
 
 
+class ValidationError(MissingFields):
+    """
+    Imposter or stub payload rejected by the local validation, before being sent
+    """
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__("bad data", "; ".join(errors))
+        self.errors = errors
+
+
 class MissingEnvironmentVariable(Error):
     ...
+
+
+def raise_for_error_response(e: Exception) -> None:
+    """
+    Map a Mountebank error payload to the matching ImposterError
+    :param e: HTTP error exposing the failed response (requests or httpx)
+    :return: None if the response is not a known Mountebank error
+    """
+    if e.response.status_code in [400, 404]:
+        try:
+            body = e.response.json()
+            error = body["errors"][0]
+            code = error["code"]
+            message = error.get("message", "")
+
+            if code == "resource conflict":
+                raise Conflict(code, message) from e
+            if code == "bad data":
+                raise MissingFields(code, message) from e
+            if code == "no such resource":
+                raise NotFound(code, message) from e
+            else:
+                raise ImposterError(code, message) from e
+        except ValueError:
+            raise Unavailable() from e
@@ -0,0 +1,496 @@
+import abc
+import json
+import re
+import socket
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from mounty.predicates import stub_matches
+
+PROTOCOLS = ("http", "https", "tcp", "smtp")
+POLL_INTERVAL = 0.05
+
+_ROUTES = [
+    (re.compile(r"^/imposters/?$"), "imposters"),
+    (re.compile(r"^/imposters/(\d+)/?$"), "imposter"),
+    (re.compile(r"^/imposters/(\d+)/stubs/?$"), "stubs"),
+    (re.compile(r"^/imposters/(\d+)/stubs/(\d+)/?$"), "stub"),
+    (re.compile(r"^/imposters/(\d+)/savedRequests/?$"), "saved_requests"),
+]
+
+
+class FakeError(Exception):
+    """
+    Error answered with a Mountebank error payload
+    """
+
+    STATUS = {"no such resource": 404}
+
+    def __init__(self, code: str, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+    @property
+    def status(self) -> int:
+        return self.STATUS.get(self.code, 400)
+
+    def payload(self) -> dict:
+        return {"errors": [{"code": self.code, "message": self.message}]}
+
+
+def _timestamp() -> str:
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+def _single(values: Dict[str, List[str]]) -> Dict[str, Any]:
+    # repeated names are recorded as lists, as Mountebank does
+    return {key: val[0] if len(val) == 1 else val for key, val in values.items()}
+
+
+class _Handler(BaseHTTPRequestHandler, abc.ABC):
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, Nagle would delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            return self._chunked_body()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _chunked_body(self) -> bytes:
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if not size:
+                break
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+        # skip the trailers, up to the empty line
+        while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+            pass
+        return b"".join(chunks)
+
+    def _send(
+        self, status: int, body: bytes, headers: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            for item in value if isinstance(value, list) else [value]:
+                self.send_header(name, str(item))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @abc.abstractmethod
+    def _dispatch(self) -> None:
+        """
+        Answer the request, whatever its method
+        """
+
+    do_GET = (
+        do_POST
+    ) = do_PUT = do_DELETE = do_PATCH = do_OPTIONS = lambda self: self._dispatch()
+
+
+class _AdminHandler(_Handler):
+    server: "_Server"
+
+    def _dispatch(self) -> None:
+        parts = urlsplit(self.path)
+        query = _single(parse_qs(parts.query))
+        body = self._body()
+        try:
+            for pattern, route in _ROUTES:
+                match = pattern.match(parts.path)
+                if match:
+                    args = [int(group) for group in match.groups()]
+                    status, payload = self.server.fake._admin(
+                        self.command, route, args, query, body
+                    )
+                    break
+            else:
+                raise FakeError("no such resource", f"{parts.path} does not exist")
+        except FakeError as e:
+            status, payload = e.status, e.payload()
+        self._send(
+            status,
+            json.dumps(payload).encode("utf-8"),
+            {"Content-Type": "application/json"},
+        )
+
+
+class _ImposterHandler(_Handler):
+    server: "_Server"
+
+    def _dispatch(self) -> None:
+        parts = urlsplit(self.path)
+        body = self._body()
+        headers: Dict[str, List[str]] = {}
+        for name, value in self.headers.items():
+            headers.setdefault(name, []).append(value)
+        request = {
+            "requestFrom": f"{self.client_address[0]}:{self.client_address[1]}",
+            "method": self.command,
+            "path": parts.path,
+            "query": _single(parse_qs(parts.query)),
+            "headers": _single(headers),
+            "body": body.decode("utf-8", errors="replace"),
+            "ip": self.client_address[0],
+            "timestamp": _timestamp(),
+        }
+        status, response_headers, response_body = self.server.imposter.respond(request)
+        self._send(status, response_body, response_headers)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeMountebank"
+    imposter: "_Imposter"
+
+
+def _serve(server: _Server, name: str) -> threading.Thread:
+    thread = threading.Thread(
+        target=server.serve_forever, args=(POLL_INTERVAL,), name=name, daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def _free_port(host: str) -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class _Imposter:
+    """
+    Imposter state, served on its own port for the http protocol
+    """
+
+    def __init__(self, payload: dict, host: str) -> None:
+        self.definition = {
+            key: val
+            for key, val in payload.items()
+            if key not in ("requests", "numberOfRequests", "_links")
+        }
+        self.stubs: List[dict] = [
+            self._stub(stub) for stub in self.definition.pop("stubs", None) or []
+        ]
+        self.served: List[int] = [0] * len(self.stubs)
+        self.requests: List[dict] = []
+        self.number_of_requests = 0
+        self.lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        port = payload.get("port") or 0
+        if self.definition["protocol"] == "http":
+            try:
+                self._server = _Server((host, port), _ImposterHandler)
+            except OSError as e:
+                raise FakeError(
+                    "resource conflict", f"Port {port} is already in use"
+                ) from e
+            self._server.imposter = self
+            port = self._server.server_address[1]
+            _serve(self._server, f"mounty-fake-imposter-{port}")
+        elif not port:
+            port = _free_port(host)
+        self.definition["port"] = port
+
+    @property
+    def port(self) -> int:
+        return self.definition["port"]
+
+    @staticmethod
+    def _stub(stub: Any) -> dict:
+        if not isinstance(stub, dict):
+            raise FakeError("bad data", "stubs must be objects")
+        stub = {key: val for key, val in stub.items() if key != "_links"}
+        stub.setdefault("responses", [{"is": {}}])
+        return stub
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def respond(self, request: dict) -> Tuple[int, Dict[str, Any], bytes]:
+        with self.lock:
+            self.number_of_requests += 1
+            if self.definition.get("recordRequests"):
+                self.requests.append(request)
+            response: dict = {}
+            for position, stub in enumerate(self.stubs):
+                if stub_matches(stub, request):
+                    responses = stub["responses"]
+                    response = responses[self.served[position] % len(responses)]
+                    self.served[position] += 1
+                    break
+        fields = dict(self.definition.get("defaultResponse") or {})
+        # only "is" responses are supported, anything else gets the default
+        fields.update(response.get("is") or {})
+        body = fields.get("body", "")
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return (
+            int(fields.get("statusCode", 200)),
+            fields.get("headers") or {},
+            body.encode("utf-8"),
+        )
+
+    def replace_stubs(self, stubs: List[Any]) -> None:
+        with self.lock:
+            self.stubs = [self._stub(stub) for stub in stubs]
+            self.served = [0] * len(self.stubs)
+
+    def insert_stub(self, stub: Any, index: Optional[int]) -> None:
+        with self.lock:
+            index = len(self.stubs) if index is None else index
+            self.stubs.insert(index, self._stub(stub))
+            self.served.insert(index, 0)
+
+    def replace_stub(self, index: int, stub: Any) -> None:
+        with self.lock:
+            self._check_index(index)
+            self.stubs[index] = self._stub(stub)
+            self.served[index] = 0
+
+    def delete_stub(self, index: int) -> None:
+        with self.lock:
+            self._check_index(index)
+            del self.stubs[index]
+            del self.served[index]
+
+    def _check_index(self, index: int) -> None:
+        if index >= len(self.stubs):
+            raise FakeError("no such resource", f"stub index {index} does not exist")
+
+    def record(self, requests: List[dict]) -> None:
+        with self.lock:
+            self.requests.extend(requests)
+            self.number_of_requests += len(requests)
+
+    def reset_requests(self) -> None:
+        with self.lock:
+            self.requests = []
+            self.number_of_requests = 0
+
+    def to_json(self, base_url: str, replayable: bool = False) -> dict:
+        """
+        Imposter json, as returned by GET /imposters/{port}
+        """
+        with self.lock:
+            payload = dict(self.definition)
+            url = f"{base_url}/imposters/{self.port}"
+            if replayable:
+                payload["stubs"] = [dict(stub) for stub in self.stubs]
+                return payload
+            payload["numberOfRequests"] = self.number_of_requests
+            payload["requests"] = list(self.requests)
+            payload["stubs"] = [
+                dict(stub, _links={"self": {"href": f"{url}/stubs/{index}"}})
+                for index, stub in enumerate(self.stubs)
+            ]
+            payload["_links"] = {
+                "self": {"href": url},
+                "stubs": {"href": f"{url}/stubs"},
+            }
+            return payload
+
+    def summary(self, base_url: str) -> dict:
+        """
+        Imposter json, as listed by GET /imposters
+        """
+        payload = {
+            "protocol": self.definition["protocol"],
+            "port": self.port,
+            "numberOfRequests": self.number_of_requests,
+            "_links": {"self": {"href": f"{base_url}/imposters/{self.port}"}},
+        }
+        if self.definition.get("name"):
+            payload["name"] = self.definition["name"]
+        return payload
+
+
+class FakeMountebank:
+    """
+    In-process stand-in for the Mountebank admin API, served by a threaded
+    stdlib HTTP server, for tests that cannot wait for a Mountebank container.
+    http imposters answer with their "is" responses on their own port; other
+    protocols are only stored.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self._imposters: Dict[int, _Imposter] = {}
+        self._lock = threading.RLock()
+        self._server: Optional[_Server] = None
+
+    def __enter__(self) -> "FakeMountebank":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """
+        Admin url, to use as Mountebank(url)
+        """
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        """
+        Start serving the admin API, on a free port if none was given
+        :return:
+        """
+        self._server = _Server((self.host, self.port), _AdminHandler)
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        _serve(self._server, f"mounty-fake-{self.port}")
+
+    def stop(self) -> None:
+        """
+        Stop the admin API and every imposter
+        :return:
+        """
+        with self._lock:
+            for imposter in self._imposters.values():
+                imposter.close()
+            self._imposters.clear()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _create(self, payload: Any) -> _Imposter:
+        if not isinstance(payload, dict):
+            raise FakeError("bad data", "imposter must be an object")
+        protocol = payload.get("protocol")
+        if not protocol:
+            raise FakeError("bad data", "'protocol' is a required field")
+        if protocol not in PROTOCOLS:
+            raise FakeError("bad data", f"the {protocol} protocol is not supported")
+        port = payload.get("port")
+        if port in self._imposters:
+            raise FakeError("resource conflict", f"Port {port} is already in use")
+        imposter = _Imposter(payload, self.host)
+        self._imposters[imposter.port] = imposter
+        return imposter
+
+    def record_requests(self, port: int, requests: List[dict]) -> None:
+        """
+        Add recorded requests to an imposter without sending them, e.g. to
+        simulate a long running load test
+        :param port: imposter port
+        :param requests: recorded requests json, as returned by Mountebank
+        :return:
+        """
+        with self._lock:
+            self._get(port).record(requests)
+
+    def _get(self, port: int) -> _Imposter:
+        try:
+            return self._imposters[port]
+        except KeyError:
+            raise FakeError(
+                "no such resource", "Try POSTing to /imposters first?"
+            ) from None
+
+    def _delete_all(self) -> List[_Imposter]:
+        imposters = list(self._imposters.values())
+        for imposter in imposters:
+            imposter.close()
+        self._imposters.clear()
+        return imposters
+
+    def _admin(
+        self, method: str, route: str, args: List[int], query: dict, body: bytes
+    ) -> Tuple[int, Any]:
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            raise FakeError("invalid JSON", "Unable to parse body as JSON") from None
+        replayable = query.get("replayable") == "true"
+        handler = getattr(self, f"_{method.lower()}_{route}", None)
+        if handler is None:
+            raise FakeError("no such resource", f"{method} is not supported")
+        with self._lock:
+            return handler(*args, payload=payload, replayable=replayable)
+
+    def _post_imposters(self, payload: Any, **kwargs: Any) -> Tuple[int, Any]:
+        return 201, self._create(payload).to_json(self.url)
+
+    def _get_imposters(self, replayable: bool, **kwargs: Any) -> Tuple[int, Any]:
+        imposters = self._imposters.values()
+        if replayable:
+            return 200, {
+                "imposters": [imp.to_json(self.url, True) for imp in imposters]
+            }
+        return 200, {"imposters": [imp.summary(self.url) for imp in imposters]}
+
+    def _put_imposters(self, payload: Any, **kwargs: Any) -> Tuple[int, Any]:
+        definitions = payload.get("imposters") if isinstance(payload, dict) else None
+        if not isinstance(definitions, list):
+            raise FakeError("bad data", "'imposters' is a required field")
+        self._delete_all()
+        imposters = [self._create(definition) for definition in definitions]
+        return 200, {"imposters": [imp.summary(self.url) for imp in imposters]}
+
+    def _delete_imposters(self, **kwargs: Any) -> Tuple[int, Any]:
+        imposters = self._delete_all()
+        return 200, {"imposters": [imp.to_json(self.url, True) for imp in imposters]}
+
+    def _get_imposter(self, port: int, replayable: bool, **kwargs: Any):
+        return 200, self._get(port).to_json(self.url, replayable)
+
+    def _delete_imposter(self, port: int, **kwargs: Any) -> Tuple[int, Any]:
+        imposter = self._imposters.pop(port, None)
+        if imposter is None:
+            return 200, {}
+        imposter.close()
+        return 200, imposter.to_json(self.url, True)
+
+    def _put_stubs(self, port: int, payload: Any, **kwargs: Any) -> Tuple[int, Any]:
+        stubs = payload.get("stubs") if isinstance(payload, dict) else None
+        if not isinstance(stubs, list):
+            raise FakeError("bad data", "'stubs' must be an array")
+        imposter = self._get(port)
+        imposter.replace_stubs(stubs)
+        return 200, imposter.to_json(self.url)
+
+    def _post_stubs(self, port: int, payload: Any, **kwargs: Any) -> Tuple[int, Any]:
+        if not isinstance(payload, dict) or "stub" not in payload:
+            raise FakeError("bad data", "must contain 'stub' field")
+        imposter = self._get(port)
+        imposter.insert_stub(payload["stub"], payload.get("index"))
+        return 200, imposter.to_json(self.url)
+
+    def _put_stub(self, port: int, index: int, payload: Any, **kwargs: Any):
+        imposter = self._get(port)
+        imposter.replace_stub(index, payload)
+        return 200, imposter.to_json(self.url)
+
+    def _delete_stub(self, port: int, index: int, **kwargs: Any):
+        imposter = self._get(port)
+        imposter.delete_stub(index)
+        return 200, imposter.to_json(self.url)
+
+    def _delete_saved_requests(self, port: int, **kwargs: Any):
+        imposter = self._get(port)
+        imposter.reset_requests()
+        return 200, imposter.to_json(self.url)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} url={self.url}>"
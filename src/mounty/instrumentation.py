@@ -0,0 +1,213 @@
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+REQUEST_SECONDS = "mounty_request_seconds"
+REQUEST_BYTES = "mounty_request_bytes"
+RESPONSE_BYTES = "mounty_response_bytes"
+PARSE_SECONDS = "mounty_parse_seconds"
+RETRIES = "mounty_retries"
+POLL_ITERATIONS = "mounty_poll_iterations"
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+Labels = Dict[str, str]
+# a sink is any callable receiving (metric name, value, labels)
+Sink = Callable[[str, float, Labels], None]
+
+_PORT = re.compile(r"/imposters/\d+")
+_INDEX = re.compile(r"/stubs/\d+")
+
+
+def body_size(body: Any) -> Optional[int]:
+    """
+    Size of a request body
+    :param body: encoded body, None without body
+    :return: bytes, None if unknown (streamed uploads)
+    """
+    if body is None:
+        return 0
+    return len(body) if isinstance(body, (bytes, str)) else None
+
+
+def operation_name(method: str, url: str) -> str:
+    """
+    Low cardinality name of an admin call, ports and stub indexes are replaced
+    by placeholders
+    :param method: http method
+    :param url: admin url, absolute or path only
+    :return: e.g. "GET /imposters/{port}"
+    """
+    path = urlsplit(url).path
+    start = path.find("/imposters")
+    path = path[start:] if start >= 0 else path
+    path = _INDEX.sub("/stubs/{index}", _PORT.sub("/imposters/{port}", path))
+    return f"{method} {path}"
+
+
+class Instrumentation:
+    """
+    Dispatch client measurements (call latency, payload sizes, parse time,
+    retries, poll iterations) to sinks
+    """
+
+    def __init__(self, *sinks: Sink) -> None:
+        self.sinks: List[Sink] = list(sinks)
+
+    def record(self, metric: str, value: float, **labels: str) -> None:
+        """
+        Send a measurement to every sink
+        :param metric: metric name, e.g. REQUEST_SECONDS
+        :param value: measured value
+        :param labels: metric labels
+        :return:
+        """
+        for sink in self.sinks:
+            sink(metric, value, labels)
+
+    def observe_request(
+        self,
+        operation: str,
+        status: str,
+        seconds: float,
+        sent: Optional[int],
+        received: Optional[int],
+        retries: Optional[int] = 0,
+    ) -> None:
+        """
+        Record the measurements of a single admin call
+        :param operation: see operation_name()
+        :param status: http status code, or "error" when no response was received
+        :param seconds: call duration
+        :param sent: request body size, None if unknown (streamed uploads)
+        :param received: response body size, None if unknown (streamed responses)
+        :param retries: retries performed by the http client, None if unknown
+        :return:
+        """
+        self.record(REQUEST_SECONDS, seconds, operation=operation, status=status)
+        if sent is not None:
+            self.record(REQUEST_BYTES, sent, operation=operation)
+        if received is not None:
+            self.record(RESPONSE_BYTES, received, operation=operation)
+        if retries is not None:
+            self.record(RETRIES, retries, operation=operation)
+
+
+def _default_buckets(metric: str) -> Sequence[float]:
+    if metric.endswith("_seconds"):
+        return SECONDS_BUCKETS
+    if metric.endswith("_bytes"):
+        return BYTES_BUCKETS
+    return COUNT_BUCKETS
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(buckets)
+        # the last count is the +Inf bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """
+        Number of observations lower or equal to each bucket bound
+        :return: (upper bound, count) pairs, ending with (inf, total count)
+        """
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else float("nan")
+
+
+LabelsKey = Tuple[Tuple[str, str], ...]
+
+
+class HistogramSink:
+    """
+    Keep the measurements in memory, as one histogram per metric and labels
+    """
+
+    def __init__(self, buckets: Optional[Dict[str, Sequence[float]]] = None) -> None:
+        self._buckets = buckets or {}
+        self._histograms: Dict[str, Dict[LabelsKey, Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, metric: str, value: float, labels: Labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            by_labels = self._histograms.setdefault(metric, {})
+            try:
+                histogram = by_labels[key]
+            except KeyError:
+                buckets = self._buckets.get(metric) or _default_buckets(metric)
+                histogram = by_labels[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def get(self, metric: str, **labels: str) -> Optional[Histogram]:
+        """
+        Histogram of a metric for the exact given labels
+        :param metric: metric name
+        :param labels: metric labels
+        :return: None if nothing was recorded
+        """
+        return self._histograms.get(metric, {}).get(tuple(sorted(labels.items())))
+
+    def histograms(self) -> Dict[str, Dict[LabelsKey, Histogram]]:
+        """
+        Every recorded histogram, by metric name then labels
+        :return:
+        """
+        with self._lock:
+            return {metric: dict(hist) for metric, hist in self._histograms.items()}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: LabelsKey, le: Optional[float] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if le is not None:
+        pairs.append(f'le="{"+Inf" if le == float("inf") else repr(float(le))}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class PrometheusSink(HistogramSink):
+    """
+    In memory histograms exposed in the Prometheus text format
+    """
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition of every histogram
+        :return:
+        """
+        lines = []
+        for metric, by_labels in sorted(self.histograms().items()):
+            lines.append(f"# TYPE {metric} histogram")
+            for labels, histogram in sorted(by_labels.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{metric}_bucket{_labels(labels, bound)} {count}")
+                lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,197 @@
+import json
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from mounty.models import Imposter, ImposterResponse, Stub
+
+# fields describing the imposter state rather than its definition
+RUNTIME_FIELDS = frozenset({"requests", "numberOfRequests", "_links"})
+
+
+@dataclass
+class SyncOperation:
+    """
+    A single admin call needed to move the imposters to the desired state
+    """
+
+    action: str  # create, delete, add_stub, replace_stub or delete_stub
+    port: int
+    index: Optional[int] = None
+    payload: Optional[dict] = None
+
+
+def _as_dict(value: Any) -> dict:
+    # shallow on purpose, recorded requests of an ImposterResponse are not copied
+    if is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    return dict(value)
+
+
+def _is_empty(value: Any) -> bool:
+    # missing booleans default to false on the Mountebank side
+    return value is None or value is False or value == ""
+
+
+def normalize_stub(stub: Union[Stub, dict]) -> dict:
+    """
+    Stub definition as sent to Mountebank, without links and empty predicates
+    :param stub: stub as dictionary or Stub
+    :return:
+    """
+    stub = asdict(stub) if is_dataclass(stub) else stub
+    stub = {key: val for key, val in stub.items() if key != "_links"}
+    if not stub.get("predicates", True):
+        del stub["predicates"]
+    return stub
+
+
+def normalize_imposter(imposter: Union[Imposter, dict]) -> dict:
+    """
+    Imposter definition without runtime fields, empty values and stub links
+    :param imposter: imposter as dictionary, Imposter or ImposterResponse
+    :return:
+    """
+    definition = {
+        key: val
+        for key, val in _as_dict(imposter).items()
+        if key not in RUNTIME_FIELDS and key != "stubs" and not _is_empty(val)
+    }
+    definition["stubs"] = [normalize_stub(stub) for stub in imposter_stubs(imposter)]
+    return definition
+
+
+def imposter_stubs(imposter: Union[Imposter, dict]) -> List[Union[Stub, dict]]:
+    if isinstance(imposter, Imposter):
+        return imposter.stubs
+    return imposter.get("stubs", [])
+
+
+def canonical_key(value: Any) -> str:
+    """
+    Canonical json of a definition, equal for equal definitions whatever
+    the order of their keys
+    :param value: json compatible value, e.g. a normalized stub
+    :return:
+    """
+    return json.dumps(value, sort_keys=True)
+
+
+class ImposterMirror:
+    """
+    Local copy of the imposter definitions sent to a Mountebank instance,
+    used to send only the changes needed to reach a desired state
+    """
+
+    def __init__(self) -> None:
+        self._imposters: Dict[int, dict] = {}
+
+    def __contains__(self, port: int) -> bool:
+        return port in self._imposters
+
+    def __len__(self) -> int:
+        return len(self._imposters)
+
+    def get(self, port: int) -> Optional[dict]:
+        """
+        Mirrored definition of an imposter
+        :param port: imposter port
+        :return: normalized definition, None if unknown
+        """
+        return self._imposters.get(port)
+
+    def update(self, imposter: Union[Imposter, dict]) -> None:
+        """
+        Record the definition of an imposter sent to Mountebank. Responses are
+        not used: ImposterResponse drops the fields it does not declare
+        (defaultResponse, mode, ...), which would look like changed settings.
+        :param imposter: imposter as sent, with its port
+        :return:
+        """
+        definition = normalize_imposter(imposter)
+        self._imposters[definition["port"]] = definition
+
+    def update_stubs(self, imposter: Union[ImposterResponse, dict]) -> None:
+        """
+        Record the stubs of an imposter returned by a stub admin call, keeping
+        the mirrored settings
+        :param imposter: imposter as returned by the admin call
+        :return:
+        """
+        definition = normalize_imposter(imposter)
+        current = self._imposters.get(definition["port"])
+        if current is not None:
+            definition = dict(current, stubs=definition["stubs"])
+        self._imposters[definition["port"]] = definition
+
+    def remove(self, port: int) -> None:
+        self._imposters.pop(port, None)
+
+    def clear(self) -> None:
+        self._imposters.clear()
+
+    def diff(self, desired: Iterable[Union[Imposter, dict]]) -> List[SyncOperation]:
+        """
+        Compute the admin calls turning the mirrored imposters into the desired ones
+        :param desired: imposters that should exist after the sync
+        :return: operations, to be applied in order
+        """
+        desired_definitions = {
+            definition["port"]: definition
+            for definition in (normalize_imposter(imposter) for imposter in desired)
+        }
+        operations = [
+            SyncOperation("delete", port)
+            for port in self._imposters
+            if port not in desired_definitions
+        ]
+        for port, definition in desired_definitions.items():
+            current = self._imposters.get(port)
+            if current is None:
+                operations.append(SyncOperation("create", port, payload=definition))
+            elif _settings(current) != _settings(definition):
+                operations.append(SyncOperation("delete", port))
+                operations.append(SyncOperation("create", port, payload=definition))
+            else:
+                operations.extend(
+                    _stub_operations(port, current["stubs"], definition["stubs"])
+                )
+        return operations
+
+
+def _settings(definition: dict) -> dict:
+    return {key: val for key, val in definition.items() if key != "stubs"}
+
+
+def _stub_operations(
+    port: int, current: List[dict], desired: List[dict]
+) -> List[SyncOperation]:
+    """
+    Minimal stub level edits, indexes account for the previous edits
+    """
+    matcher = SequenceMatcher(
+        a=[canonical_key(stub) for stub in current],
+        b=[canonical_key(stub) for stub in desired],
+        autojunk=False,
+    )
+    operations = []
+    offset = 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        removed, added = i2 - i1, j2 - j1
+        replaced = min(removed, added)
+        for k in range(replaced):
+            operations.append(
+                SyncOperation("replace_stub", port, i1 + offset + k, desired[j1 + k])
+            )
+        for k in range(replaced, added):
+            operations.append(
+                SyncOperation("add_stub", port, i1 + offset + k, desired[j1 + k])
+            )
+        for _ in range(replaced, removed):
+            operations.append(
+                SyncOperation("delete_stub", port, i1 + offset + replaced)
+            )
+        offset += added - removed
+    return operations
@@ -1,48 +1,150 @@
 import json
-import logging
-from dataclasses import dataclass, field, is_dataclass, asdict
-from typing import Any, Dict, List, Union
+from dataclasses import dataclass, field, fields, is_dataclass, asdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
 
-logger = logging.getLogger(__name__)
+from mounty.serialization import dataclass_fields
 
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.request_log import RequestLog
 
+
+class _UNDECODED:
+    """
+    Marks a recorded body not decoded yet, a class so it survives pickling
+    """
+
+
+_FIELD_NAMES: Dict[type, frozenset] = {}
+
+
+def _slotted(cls: type) -> type:
+    """
+    Rebuild a dataclass with __slots__, as dataclass(slots=True) does on Python 3.10+
+    :param cls: dataclass
+    :return: the same dataclass, without per instance __dict__
+    """
+    cls_dict = dict(cls.__dict__)
+    # slots declared in the class body are kept, next to the field ones
+    declared = cls_dict.pop("__slots__", ())
+    for slot in declared:
+        cls_dict.pop(slot, None)
+    inherited = {
+        slot for base in cls.__mro__[1:-1] for slot in getattr(base, "__slots__", ())
+    }
+    slots = list(declared)
+    for field_ in fields(cls):
+        attribute = cls_dict.get(field_.name)
+        if hasattr(attribute, "slots"):
+            # descriptor managed field, keep the descriptor and its storage
+            slots.extend(attribute.slots)
+        else:
+            slots.append(field_.name)
+            cls_dict.pop(field_.name, None)
+    cls_dict["__slots__"] = tuple(slot for slot in slots if slot not in inherited)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+def _known_fields(cls: type, payload: dict) -> dict:
+    """
+    Keep the payload entries matching a dataclass field, ignoring the fields
+    added by newer Mountebank versions
+    """
+    try:
+        names = _FIELD_NAMES[cls]
+    except KeyError:
+        names = _FIELD_NAMES[cls] = frozenset(field_.name for field_ in fields(cls))
+    return {key: val for key, val in payload.items() if key in names}
+
+
+class _LazyBody:
+    """
+    Keep the recorded body as received and json decode it on first access only
+    """
+
+    slots = ("_raw_body", "_decoded_body")
+
+    def __get__(self, obj, objtype=None) -> Any:
+        if obj is None:
+            # no class level default, the dataclass field stays required
+            raise AttributeError("body")
+        if obj._decoded_body is _UNDECODED:
+            try:
+                obj._decoded_body = json.loads(obj._raw_body)
+            except (TypeError, ValueError):
+                # not json (or already decoded): expose the body as recorded
+                obj._decoded_body = obj._raw_body
+        return obj._decoded_body
+
+    def __set__(self, obj, value: Any) -> None:
+        obj._raw_body = value
+        obj._decoded_body = _UNDECODED
+
+
+@_slotted
 @dataclass(order=True)
 class RecordedRequest:
     method: str
     path: str
-    body: Union[dict, str, bytes]
+    body: Union[dict, str, bytes, memoryview] = _LazyBody()
     headers: dict = field(default_factory=list)
     query: dict = field(default_factory=list)
     ip: str = ""
     timestamp: str = ""
     requestFrom: str = ""
 
-    def __post_init__(self) -> None:
-        """Transform body to json."""
-        try:
-            self.body = json.loads(self.body)
-        except json.decoder.JSONDecodeError:
-            logger.warning(
-                "Could not json decode the recorded response body",
-                extra={"body": self.body},
-            )
+    @classmethod
+    def from_dict(cls, dict_val: dict) -> "RecordedRequest":
+        """
+        Create RecordedRequest object from json, ignoring unknown fields
+        :param dict_val: json representation of a recorded request
+        :return:
+        """
+        known = _known_fields(cls, dict_val)
+        return cls(
+            known.pop("method", ""),
+            known.pop("path", ""),
+            known.pop("body", ""),
+            **known
+        )
 
+    @property
+    def raw_body(self) -> Union[str, bytes, memoryview]:
+        """
+        The body as recorded, without any decoding or copy
+        """
+        return self._raw_body
 
+    def json(self) -> Any:
+        """
+        Json decoded body, decoded once and cached
+        :return: decoded body
+        """
+        body = self.body
+        if body is self._raw_body and not isinstance(body, (dict, list)):
+            raise ValueError("Recorded request body is not json")
+        return body
+
+
+@_slotted
 @dataclass
 class Stub:
     responses: List[dict]
     predicates: List = field(default_factory=list)
 
 
+@_slotted
 @dataclass
 class Imposter:
-    port: int
+    port: Optional[int]
     protocol: str
     stubs: List[Union[Stub, dict]]
     recordRequests: bool = False
     name: bool = ""
 
 
+@_slotted
 @dataclass
 class ImposterResponse(Imposter):
     numberOfRequests: str = ""
@@ -52,32 +154,42 @@ class ImposterResponse(Imposter):
     mutualAuth: bool = False
     _links: dict = field(default_factory=dict)
 
-    @staticmethod
-    def from_dict(dict_val: dict) -> "ImposterResponse":
+    __slots__ = ("_request_log",)
+
+    @property
+    def request_log(self) -> "RequestLog":
         """
-        Create ImposterResponse object from json
+        Indexed view of the recorded requests, built on first access
+        """
+        try:
+            return self._request_log
+        except AttributeError:
+            from mounty.request_log import RequestLog
+
+            self._request_log = RequestLog(self.requests)
+            return self._request_log
+
+    @classmethod
+    def from_dict(cls, dict_val: dict) -> "ImposterResponse":
+        """
+        Create ImposterResponse object from json, ignoring unknown fields.
+        Stubs are missing from the imposters list view and default to empty.
         :param dict_val: json representation of an ImposterResponse
         :return:
         """
-        return ImposterResponse(
-            port=dict_val["port"],
-            protocol=dict_val["protocol"],
-            stubs=dict_val["stubs"],
-            recordRequests=dict_val.get("recordRequests", False),
-            name=dict_val.get("name", ""),
-            numberOfRequests=dict_val.get("numberOfRequests", 0),
-            requests=[RecordedRequest(**req) for req in dict_val.get("requests", [])],
-            key=dict_val.get("key", ""),
-            cert=dict_val.get("cert", ""),
-            mutualAuth=dict_val.get("mutualAuth", ""),
-        )
+        known = _known_fields(cls, dict_val)
+        known.setdefault("stubs", [])
+        return cls(**known)
 
     def __post_init__(self) -> None:
         """
         Convert json request field to object
         :return: Instance with requests field converted to class instance
         """
-        self.requests = [RecordedRequest(**req) for req in self.requests]
+        self.requests = [
+            RecordedRequest.from_dict(req) if isinstance(req, dict) else req
+            for req in self.requests
+        ]
 
 
 class DataclassJSONEncoder(json.JSONEncoder):
@@ -93,8 +205,8 @@ class DataclassJSONEncoder(json.JSONEncoder):
 
 class WithoutEmptyFieldsEncoder(json.JSONEncoder):
     """
-    Remove fields with empty string as value
+    Remove fields with empty string or None as value
     """
 
     def default(self, obj) -> Dict[str, Any]:
-        return {key: val for key, val in obj.__dict__.items() if val != ""}
+        return dataclass_fields(obj)
@@ -1,85 +1,172 @@
-import json
+import gzip
 import logging
 import os
 import time
-from dataclasses import asdict
-from typing import Any, List, Optional, Union
-from requests import HTTPError, Response, Session
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, Optional, Union
+from requests import HTTPError, Response
 
+from mounty.analytics import RequestColumns
+from mounty.drain import RequestDrainer
 from mounty.errors import (
     Conflict,
-    ImposterError,
-    MissingFields,
-    NotFound,
+    Error,
     Unavailable,
     MissingEnvironmentVariable,
+    ValidationError,
+    raise_for_error_response,
 )
+from mounty.instrumentation import (
+    PARSE_SECONDS,
+    Instrumentation,
+    body_size,
+    operation_name,
+)
+from mounty.mirror import ImposterMirror, SyncOperation
 from mounty.models import (
     Imposter,
     ImposterResponse,
     RecordedRequest,
     Stub,
-    WithoutEmptyFieldsEncoder,
 )
+from mounty.ports import PortAllocator
+from mounty.polling import Backoff, RequestCursor, RequestPredicate, wait_for_cursors
+from mounty.request_log import RequestLog
+from mounty.serialization import JSON_HEADERS, JsonCodec
+from mounty.streaming import iter_json_array
+from mounty.transport import DEFAULT_POOL_SIZE, Transport
+from mounty.validation import validate_imposters, validate_stubs
 
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 64 * 1024
+SNAPSHOT_COMPRESSLEVEL = 6
+
+
+def _port_of(imposter: Union[dict, Imposter]) -> Optional[int]:
+    return imposter.get("port") if isinstance(imposter, dict) else imposter.port
+
+
+def _with_port(imposter: Union[dict, Imposter], port: int) -> Union[dict, Imposter]:
+    if isinstance(imposter, dict):
+        return dict(imposter, port=port)
+    return replace(imposter, port=port)
+
 
 class Mountebank:
     """
     An admin client for Mountebank.
     """
 
-    def __init__(self, url: str) -> None:
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        mirror: bool = False,
+        json_codec: Optional[JsonCodec] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        transport: Optional[Transport] = None,
+        validate: bool = True,
+    ) -> None:
         self.url = url
+        self.validate = validate
+        self.json_codec = json_codec or JsonCodec()
+        self.instrumentation = instrumentation
+        self.mirror = ImposterMirror() if mirror else None
+        self.port_allocator = PortAllocator(self)
         self._imposters_url = f"{self.url}/imposters"
-        self._session = Session()
-        self._session.hooks["response"].extend(
-            [
+        self._pool_size = pool_size
+        self.transport = transport or Transport(pool_size=pool_size)
+        self._hooks = {
+            "response": [
                 lambda response, *args, **kwargs: response.raise_for_status(),
-                lambda response, *args, **kwargs: logger.debug(
-                    f"Got response {response.text} from {response.url}"
-                ),
+                self._log_response,
             ]
-        )
+        }
+
+    @staticmethod
+    def _log_response(response: Response, *args: Any, **kwargs: Any) -> None:
+        # decoding the body is only worth it when it is logged, and reading a
+        # streamed body here would load it in memory
+        if logger.isEnabledFor(logging.DEBUG) and not kwargs.get("stream"):
+            logger.debug("Got response %s from %s", response.text, response.url)
 
     def __request(
-        self, method: str, url: str, *args: Any, **kwargs: Any
+        self, method: str, url: str, payload: Any = None, **kwargs: Any
     ) -> Optional[Response]:
         """
         A wrapper over requests... request method, with error handling
         :param method: "GET", "POST", etc.
         :param url: request destination
+        :param payload: json body, encoded with the client json codec
         :return:
         """
+        if payload is not None:
+            kwargs["data"] = self.json_codec.dumps(payload)
+            kwargs["headers"] = JSON_HEADERS
         try:
-            return self._session.request(method=method, url=url, *args, **kwargs)
+            if self.instrumentation is None:
+                return self.transport.request(method, url, hooks=self._hooks, **kwargs)
+            return self._instrumented_request(method, url, **kwargs)
         except HTTPError as e:
-            self.__handle_exception(e)
+            raise_for_error_response(e)
 
             logger.exception("Unexpected error")
             raise Unavailable() from e
 
-    @staticmethod
-    def __handle_exception(e):
-        if e.response.status_code in [400, 404]:
-            try:
-                body = e.response.json()
-                error = body["errors"][0]
-                code = error["code"]
-                message = error.get("message", "")
-
-                if code == "resource conflict":
-                    raise Conflict(code, message) from e
-                if code == "bad data":
-                    raise MissingFields(code, message) from e
-                if code == "no such resource":
-                    raise NotFound(code, message) from e
+    def _instrumented_request(self, method: str, url: str, **kwargs: Any) -> Response:
+        response = None
+        start = time.perf_counter()
+        try:
+            response = self.transport.request(method, url, hooks=self._hooks, **kwargs)
+            return response
+        except HTTPError as e:
+            response = e.response
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            retries = self.transport.last_retries
+            if response is None:
+                status, received = "error", None
+            else:
+                status = str(response.status_code)
+                if kwargs.get("stream"):
+                    length = response.headers.get("Content-Length")
+                    received = int(length) if length else None
                 else:
-                    raise ImposterError(code, message) from e
-            except ValueError:
-                raise Unavailable() from e
+                    received = len(response.content)
+                history = getattr(getattr(response.raw, "retries", None), "history", ())
+                retries += len(history or ())
+            self.instrumentation.observe_request(
+                operation_name(method, url),
+                status,
+                seconds,
+                body_size(kwargs.get("data")),
+                received,
+                retries,
+            )
+
+    def _decode(self, response: Response) -> Any:
+        if self.instrumentation is None:
+            return self.json_codec.loads(response.content)
+        start = time.perf_counter()
+        payload = self.json_codec.loads(response.content)
+        self.instrumentation.record(
+            PARSE_SECONDS,
+            time.perf_counter() - start,
+            operation=operation_name(response.request.method, response.request.url),
+        )
+        return payload
+
+    def close(self) -> None:
+        """
+        Close the pooled connections of the client transport
+        :return:
+        """
+        self.transport.close()
 
     @classmethod
     def from_env(cls) -> "Mountebank":
@@ -94,17 +181,63 @@ class Mountebank:
                 "MOUNTEBANK_URL environment variable is missing"
             )
 
-    def add_imposter(self, imposter: Union[dict, Imposter]) -> ImposterResponse:
+    def add_imposter(
+        self, imposter: Union[dict, Imposter], port_range: Optional[range] = None
+    ) -> ImposterResponse:
         """
-        Add imposter
+        Add imposter. Without port, Mountebank picks one; with a port_range, a free
+        port of the range is reserved by the port allocator.
         :param imposter:
+        :param port_range: ports to choose from, e.g. range(4545, 4645)
         :return: ImposterResponse object (Imposter with extra fields)
         """
-        if isinstance(imposter, Imposter):
-            imposter = asdict(imposter)
+        if self.validate:
+            validate_imposters(imposter)
+        if port_range is None:
+            return self._add_imposter(imposter)
+        while True:
+            port = self.port_allocator.allocate(port_range)
+            try:
+                return self._add_imposter(_with_port(imposter, port))
+            except Conflict:
+                # taken by an imposter the allocator did not know of yet
+                self.port_allocator.mark_in_use(port)
+            except Exception:
+                self.port_allocator.release(port)
+                raise
 
-        response = self.__request(method="POST", url=self._imposters_url, json=imposter)
-        return ImposterResponse(**response.json())
+    def _add_imposter(self, imposter: Union[dict, Imposter]) -> ImposterResponse:
+        response = self.__request(
+            method="POST", url=self._imposters_url, payload=imposter
+        )
+        created = ImposterResponse.from_dict(self._decode(response))
+        if self.mirror is not None:
+            # without port, Mountebank picked one
+            self.mirror.update(_with_port(imposter, created.port))
+        return created
+
+    def add_imposters(
+        self,
+        *imposters: Union[dict, Imposter],
+        max_workers: Optional[int] = None,
+        port_range: Optional[range] = None,
+    ) -> List[Union[ImposterResponse, Error]]:
+        """
+        Add imposters in parallel, without aborting on the failing ones
+        :param imposters: imposters to add
+        :param max_workers: parallel requests, defaults to the connection pool size
+        :param port_range: ports to choose from, see add_imposter
+        :return: ImposterResponse, or the raised error (e.g. Conflict), in imposters order
+        """
+
+        def add(imposter: Union[dict, Imposter]) -> Union[ImposterResponse, Error]:
+            try:
+                return self.add_imposter(imposter, port_range)
+            except Error as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers or self._pool_size) as pool:
+            return list(pool.map(add, imposters))
 
     def delete_imposter(self, port: int) -> ImposterResponse:
         """
@@ -113,8 +246,11 @@ class Mountebank:
         :return:
         """
         response = self.__request(method="DELETE", url=f"{self._imposters_url}/{port}")
-        payload = response.json()
-        return ImposterResponse(**payload) if payload else None
+        payload = self._decode(response)
+        self.port_allocator.release(port)
+        if self.mirror is not None:
+            self.mirror.remove(port)
+        return ImposterResponse.from_dict(payload) if payload else None
 
     def delete_all_imposters(self) -> [ImposterResponse]:
         """
@@ -122,11 +258,12 @@ class Mountebank:
         :return: list of existing imposters before deletion
         """
         response = self.__request(method="DELETE", url=self._imposters_url)
-        imposters = (
-            response.json()["imposters"] if "imposters" in response.json() else None
-        )
+        self.port_allocator.release_all()
+        if self.mirror is not None:
+            self.mirror.clear()
+        imposters = self._decode(response).get("imposters")
         return (
-            [ImposterResponse(**ires) for ires in response.json()["imposters"]]
+            [ImposterResponse.from_dict(ires) for ires in imposters]
             if imposters
             else []
         )
@@ -137,8 +274,70 @@ class Mountebank:
         :param port: imposter port
         :return:
         """
+        return ImposterResponse.from_dict(self.get_imposter_payload(port))
+
+    def get_imposter_payload(self, port: int) -> dict:
+        """
+        Retrieve existing imposter details, as decoded json
+        :param port: imposter port
+        :return: imposter payload, with its stubs and recorded requests
+        """
         response = self.__request(method="GET", url=f"{self._imposters_url}/{port}")
-        return ImposterResponse(**response.json())
+        return self._decode(response)
+
+    def iter_requests(self, port: int) -> Iterator[RecordedRequest]:
+        """
+        Stream the recorded requests of an imposter, parsing them one at a time
+        so memory stays flat whatever the number of recorded requests
+        :param port: imposter port
+        :return: iterator over the recorded requests, oldest first
+        """
+        for request in self.iter_request_payloads(port):
+            yield RecordedRequest.from_dict(request)
+
+    def get_request_log(self, port: int) -> RequestLog:
+        """
+        Retrieve the recorded requests of an imposter as an indexed RequestLog
+        :param port: imposter port
+        :return:
+        """
+        return RequestLog(self.iter_requests(port))
+
+    def get_request_columns(self, port: int) -> RequestColumns:
+        """
+        Retrieve the recorded requests of an imposter as columns, for load test
+        analytics, without building RecordedRequest objects
+        :param port: imposter port
+        :return:
+        """
+        return RequestColumns.from_requests(self.iter_request_payloads(port))
+
+    def iter_request_payloads(self, port: int) -> Iterator[dict]:
+        """
+        Stream the recorded requests of an imposter as decoded json, without
+        building RecordedRequest objects
+        :param port: imposter port
+        :return: iterator over the recorded requests, oldest first
+        """
+        response = self.__request(
+            method="GET", url=f"{self._imposters_url}/{port}", stream=True
+        )
+        with closing(response):
+            yield from iter_json_array(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE), "requests"
+            )
+
+    def get_request_counts(self) -> Dict[int, int]:
+        """
+        Retrieve the number of received requests for every imposter, without
+        downloading stubs or recorded requests
+        :return: numberOfRequests by imposter port
+        """
+        response = self.__request(method="GET", url=self._imposters_url)
+        return {
+            imposter["port"]: imposter.get("numberOfRequests", 0)
+            for imposter in self._decode(response).get("imposters", [])
+        }
 
     def get_imposters(self) -> List[ImposterResponse]:
         """
@@ -146,7 +345,10 @@ class Mountebank:
         :return:
         """
         response = self.__request(method="GET", url=self._imposters_url)
-        return [ImposterResponse(**ires) for ires in response.json()]
+        payload = self._decode(response)
+        # Mountebank answers with {"imposters": [...]}, older mocks with a bare list
+        imposters = payload["imposters"] if isinstance(payload, dict) else payload
+        return [ImposterResponse.from_dict(ires) for ires in imposters]
 
     def overwrite_imposters(
         self, *imposters: Union[Imposter, dict]
@@ -156,17 +358,67 @@ class Mountebank:
         :param imposters: new imposters
         :return: Updated list of imposters
         """
-        imposters = [
-            json.dumps(imposter, cls=WithoutEmptyFieldsEncoder)
-            for imposter in imposters
-        ]
+        if self.validate:
+            validate_imposters(*imposters)
         response = self.__request(
             method="PUT",
             url=self._imposters_url,
-            json={"imposters": imposters},
+            payload={"imposters": imposters},
+        )
+        self.port_allocator.release_all()
+        created = self._decode(response)["imposters"]
+        if self.mirror is not None:
+            # the response only holds the imposters list view, without stubs:
+            # imposters sent with a port keep their sent definition, the ports
+            # assigned by Mountebank to the others are read back
+            sent = {_port_of(imposter): imposter for imposter in imposters}
+            self.mirror.clear()
+            for imposter in created:
+                port = imposter["port"]
+                self.mirror.update(
+                    sent[port] if port in sent else self.get_imposter_payload(port)
+                )
+        return [ImposterResponse.from_dict(imposter) for imposter in created]
+
+    def save_snapshot(self, path: str, remove_proxies: bool = True) -> None:
+        """
+        Save the replayable definition of every imposter to a gzip compressed file,
+        streamed to disk without decoding it
+        :param path: snapshot file
+        :param remove_proxies: drop proxy responses, keeping the recorded ones
+        :return:
+        """
+        params = {"replayable": "true", "removeProxies": str(remove_proxies).lower()}
+        response = self.__request(
+            method="GET", url=self._imposters_url, params=params, stream=True
         )
+        with closing(response), gzip.open(
+            path, "wb", compresslevel=SNAPSHOT_COMPRESSLEVEL
+        ) as file:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                file.write(chunk)
+
+    def load_snapshot(self, path: str) -> List[ImposterResponse]:
+        """
+        Replace every imposter by the ones of a snapshot, see save_snapshot.
+        The file is decompressed while it is uploaded, it is never decoded.
+        :param path: snapshot file
+        :return: Updated list of imposters
+        """
+        with gzip.open(path, "rb") as file:
+            response = self.__request(
+                method="PUT",
+                url=self._imposters_url,
+                data=iter(lambda: file.read(STREAM_CHUNK_SIZE), b""),
+                headers=JSON_HEADERS,
+            )
+        self.port_allocator.release_all()
+        if self.mirror is not None:
+            # the snapshot is not decoded, its definitions are unknown
+            self.mirror.clear()
         return [
-            ImposterResponse(**imposter) for imposter in response.json()["imposters"]
+            ImposterResponse.from_dict(imposter)
+            for imposter in self._decode(response)["imposters"]
         ]
 
     def overwrite_stubs_on_imposter(
@@ -178,13 +430,104 @@ class Mountebank:
         :param port: imposter port
         :return: updated imposter
         """
-        stubs = [json.dumps(stub, cls=WithoutEmptyFieldsEncoder) for stub in stubs]
+        if self.validate:
+            validate_stubs(*stubs)
         response = self.__request(
             method="PUT",
             url=f"{self._imposters_url}/{port}/stubs",
-            json={"stubs": stubs},
+            payload={"stubs": stubs},
+        )
+        return self._mirrored(ImposterResponse.from_dict(self._decode(response)))
+
+    def add_stub(
+        self, stub: Union[Stub, dict], port: int, index: Optional[int] = None
+    ) -> ImposterResponse:
+        """
+        Add a stub to an existing imposter, without resending the other stubs
+        :param stub: stub as dictionary or Stub
+        :param port: imposter port
+        :param index: position of the new stub, appended after the existing ones if missing
+        :return: updated imposter
+        """
+        if self.validate:
+            validate_stubs(stub)
+        payload = {"stub": stub}
+        if index is not None:
+            payload["index"] = index
+        response = self.__request(
+            method="POST", url=f"{self._imposters_url}/{port}/stubs", payload=payload
+        )
+        return self._mirrored(ImposterResponse.from_dict(self._decode(response)))
+
+    def replace_stub(
+        self, stub: Union[Stub, dict], port: int, index: int
+    ) -> ImposterResponse:
+        """
+        Replace a single stub of an existing imposter
+        :param stub: stub as dictionary or Stub
+        :param port: imposter port
+        :param index: position of the replaced stub
+        :return: updated imposter
+        """
+        if self.validate:
+            validate_stubs(stub)
+        response = self.__request(
+            method="PUT",
+            url=f"{self._imposters_url}/{port}/stubs/{index}",
+            payload=stub,
         )
-        return ImposterResponse(**response.json())
+        return self._mirrored(ImposterResponse.from_dict(self._decode(response)))
+
+    def delete_stub(self, port: int, index: int) -> ImposterResponse:
+        """
+        Delete a single stub of an existing imposter
+        :param port: imposter port
+        :param index: position of the deleted stub
+        :return: updated imposter
+        """
+        response = self.__request(
+            method="DELETE", url=f"{self._imposters_url}/{port}/stubs/{index}"
+        )
+        return self._mirrored(ImposterResponse.from_dict(self._decode(response)))
+
+    def _mirrored(self, imposter: ImposterResponse) -> ImposterResponse:
+        if self.mirror is not None:
+            self.mirror.update_stubs(imposter)
+        return imposter
+
+    def sync(self, *imposters: Union[Imposter, dict]) -> List[SyncOperation]:
+        """
+        Bring Mountebank to the desired imposters, sending only the imposter and stub
+        changes computed against the mirror instead of overwriting every imposter
+        :param imposters: imposters that should exist after the sync, with their port
+        :return: the applied operations
+        :raises ValidationError: when an imposter has no port
+        """
+        if self.mirror is None:
+            raise Error("sync requires a mirror, use Mountebank(url, mirror=True)")
+        if self.validate:
+            # nothing is sent unless every imposter is valid
+            validate_imposters(*imposters)
+        missing = [
+            f"imposters[{index}].port: sync requires an explicit port"
+            for index, imposter in enumerate(imposters)
+            if _port_of(imposter) is None
+        ]
+        if missing:
+            raise ValidationError(missing)
+        operations = self.mirror.diff(imposters)
+        for operation in operations:
+            if operation.action == "create":
+                self.add_imposter(operation.payload)
+            elif operation.action == "delete":
+                self.delete_imposter(operation.port)
+            elif operation.action == "add_stub":
+                self.add_stub(operation.payload, operation.port, operation.index)
+            elif operation.action == "replace_stub":
+                self.replace_stub(operation.payload, operation.port, operation.index)
+            elif operation.action == "delete_stub":
+                self.delete_stub(operation.port, operation.index)
+        return operations
 
     def delete_requests_from_imposter(self, port: int) -> Optional[ImposterResponse]:
         """
@@ -195,27 +538,88 @@ class Mountebank:
         response = self.__request(
             method="DELETE", url=f"{self._imposters_url}/{port}/savedRequests"
         )
-        return ImposterResponse(**response.json())
+        return ImposterResponse.from_dict(self._decode(response))
+
+    def request_cursor(self, port: int) -> RequestCursor:
+        """
+        Create a cursor over the requests recorded by an imposter
+        :param port: imposter port
+        :return: cursor positioned before the first recorded request
+        """
+        return RequestCursor(self, port)
+
+    def request_drainer(
+        self, port: int, path: str, interval: float = 1.0
+    ) -> RequestDrainer:
+        """
+        Create a drainer moving the recorded requests of an imposter to a NDJSON file
+        :param port: imposter port
+        :param path: destination file, gzip compressed if ending with .gz
+        :param interval: seconds between two drains when running in background
+        :return: drainer, to be started or used as a context manager
+        """
+        return RequestDrainer(self, port, path, interval)
 
     def wait_for_requests(
-        self, port: int, count: int = 1, timeout: float = 5.0
+        self,
+        port: int,
+        count: int = 1,
+        timeout: float = 5.0,
+        backoff: Optional[Backoff] = None,
     ) -> List[RecordedRequest]:
         """
         Poll an imposter until a specific number of recorded requests are available
         :param port: imposter port
         :param count: expected number of recorded requests
         :param timeout: timeout
+        :param backoff: delays between polls, see Backoff
         :return:
         """
-        start_time = time.perf_counter()
-        while True:
-            reqs = self.get_imposter(port).requests
-            if len(reqs) >= count:
-                return reqs
-            else:
-                time.sleep(0.5)
-                if time.perf_counter() - start_time >= timeout:
-                    raise TimeoutError(f"Waited too long for {count} requests on stub.")
+        return self.request_cursor(port).wait(
+            count=count, timeout=timeout, backoff=backoff
+        )
+
+    def wait_for_all(
+        self,
+        counts: Dict[int, int],
+        timeout: float = 5.0,
+        predicates: Optional[Dict[int, RequestPredicate]] = None,
+        backoff: Optional[Backoff] = None,
+    ) -> Dict[int, List[RecordedRequest]]:
+        """
+        Poll several imposters until each of them recorded its expected number of requests
+        :param counts: expected number of recorded requests by imposter port
+        :param timeout: timeout for the whole wait, shared by all imposters
+        :param predicates: optional filter of the counted requests, by imposter port
+        :param backoff: delays between polls, see Backoff
+        :return: recorded requests by imposter port
+        """
+        return self.__wait_for(counts, all, timeout, predicates, backoff)
+
+    def wait_for_any(
+        self,
+        counts: Dict[int, int],
+        timeout: float = 5.0,
+        predicates: Optional[Dict[int, RequestPredicate]] = None,
+        backoff: Optional[Backoff] = None,
+    ) -> Dict[int, List[RecordedRequest]]:
+        """
+        Poll several imposters until one of them recorded its expected number of requests
+        :param counts: expected number of recorded requests by imposter port
+        :param timeout: timeout for the whole wait, shared by all imposters
+        :param predicates: optional filter of the counted requests, by imposter port
+        :param backoff: delays between polls, see Backoff
+        :return: recorded requests of the imposters that reached their count
+        """
+        return self.__wait_for(counts, any, timeout, predicates, backoff)
+
+    def __wait_for(self, counts, condition, timeout, predicates, backoff):
+        predicates = predicates or {}
+        expectations = {
+            port: (self.request_cursor(port), count, predicates.get(port))
+            for port, count in counts.items()
+        }
+        return wait_for_cursors(self, expectations, condition, timeout, backoff)
 
     def __repr__(self) -> str:
         return f"<{type(self).__name__} url={self.url}>"
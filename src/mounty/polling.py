@@ -0,0 +1,150 @@
+import time
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from mounty.instrumentation import POLL_ITERATIONS
+from mounty.models import RecordedRequest
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.mountebank import Mountebank
+
+RequestPredicate = Callable[[RecordedRequest], bool]
+
+
+@dataclass
+class Backoff:
+    """
+    Adaptive delay between two polls, growing from initial to maximum by factor
+    """
+
+    initial: float = 0.05
+    factor: float = 2.0
+    maximum: float = 0.5
+
+    def delays(self) -> Iterator[float]:
+        """
+        Generate the delays to sleep between consecutive polls
+        :return: infinite iterator of delays, in seconds
+        """
+        delay = self.initial
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maximum)
+
+
+class RequestCursor:
+    """
+    Remembers how many recorded requests of an imposter were already seen,
+    so only the new ones are turned into RecordedRequest objects.
+    """
+
+    def __init__(self, mountebank: "Mountebank", port: int, position: int = 0) -> None:
+        self._mountebank = mountebank
+        self.port = port
+        self.position = position
+        self.seen: List[RecordedRequest] = []
+
+    def fetch(self) -> List[RecordedRequest]:
+        """
+        Retrieve the requests recorded since the previous fetch
+        :return: new recorded requests, oldest first
+        """
+        payload = self._mountebank.get_imposter_payload(self.port)
+        recorded = payload.get("requests", [])
+        if len(recorded) < self.position:
+            # saved requests were deleted meanwhile, start over
+            self.position = 0
+            self.seen = []
+        new = [RecordedRequest.from_dict(req) for req in recorded[self.position :]]
+        self.position = len(recorded)
+        self.seen.extend(new)
+        return new
+
+    def wait(
+        self, count: int = 1, timeout: float = 5.0, backoff: Optional[Backoff] = None
+    ) -> List[RecordedRequest]:
+        """
+        Poll until at least `count` requests were seen by this cursor.
+        The imposters list (numberOfRequests only) is polled first, and the full
+        imposter is only downloaded once enough requests were received.
+        :param count: expected number of recorded requests
+        :param timeout: timeout
+        :param backoff: delays between polls, reset whenever new requests arrive
+        :return: all requests seen by the cursor
+        """
+        matched = wait_for_cursors(
+            self._mountebank, {self.port: (self, count, None)}, all, timeout, backoff
+        )
+        return matched[self.port]
+
+
+def wait_for_cursors(
+    mountebank: "Mountebank",
+    expectations: Dict[int, Tuple[RequestCursor, int, Optional[RequestPredicate]]],
+    condition: Callable[[Iterable[bool]], bool],
+    timeout: float = 5.0,
+    backoff: Optional[Backoff] = None,
+) -> Dict[int, List[RecordedRequest]]:
+    """
+    Watch several imposters with a single polling schedule and deadline.
+    Every poll fetches the imposters list once, and only imposters with enough
+    received requests are downloaded.
+    :param mountebank: admin client
+    :param expectations: (cursor, expected count, optional predicate) by port
+    :param condition: `all` or `any`, applied to the satisfied flag of every port
+    :param timeout: timeout for the whole wait
+    :param backoff: delays between polls, reset whenever new requests arrive
+    :return: requests matching the predicate, by satisfied port
+    """
+    backoff = backoff or Backoff()
+    deadline = time.perf_counter() + timeout
+    delays = backoff.delays()
+    last_counts = None
+    matched: Dict[int, List[RecordedRequest]] = {}
+    iterations = 0
+    try:
+        while True:
+            iterations += 1
+            counts = mountebank.get_request_counts()
+            for port, (cursor, count, predicate) in expectations.items():
+                if port in matched:
+                    continue
+                number_of_requests = counts.get(port)
+                if number_of_requests is not None and number_of_requests < count:
+                    continue
+                cursor.fetch()
+                requests = (
+                    cursor.seen
+                    if predicate is None
+                    else [request for request in cursor.seen if predicate(request)]
+                )
+                if len(requests) >= count:
+                    matched[port] = requests
+            if condition(port in matched for port in expectations):
+                return matched
+            if counts != last_counts:
+                delays = backoff.delays()
+                last_counts = counts
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                missing = {
+                    port: count
+                    for port, (_, count, _) in expectations.items()
+                    if port not in matched
+                }
+                raise TimeoutError(f"Waited too long for {missing} requests on stubs.")
+            time.sleep(min(next(delays), remaining))
+    finally:
+        if mountebank.instrumentation is not None:
+            mountebank.instrumentation.record(
+                POLL_ITERATIONS, iterations, condition=condition.__name__
+            )
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import IO, TYPE_CHECKING, Dict, Iterator, Optional, Set
+
+from mounty.errors import Error
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.mountebank import Mountebank
+
+try:
+    import fcntl
+
+    def _lock(file: IO[str]) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(file: IO[str]) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+except ImportError:  # pragma: no cover
+    import msvcrt
+
+    def _lock(file: IO[str]) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(file: IO[str]) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class NoFreePort(Error):
+    """
+    Every port of the requested range is in use or reserved
+    """
+
+
+def default_path(url: str) -> str:
+    """
+    Reservation file shared by every process using the same Mountebank
+    :param url: Mountebank url
+    :return: path in the temporary directory
+    """
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"mounty-ports-{digest}")
+
+
+def range_path(host: str, port_range: range) -> str:
+    """
+    Reservation file shared by every process handing out ports of a range on a
+    host, whatever Mountebank instance (e.g. one fake per xdist worker) they use
+    :param host: host the imposters listen on
+    :param port_range: ports handed out
+    :return: path in the temporary directory
+    """
+    return default_path(f"{host} {port_range.start}-{port_range.stop}")
+
+
+if os.name == "nt":  # pragma: no cover
+    import ctypes
+
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    _STILL_ACTIVE = 259
+
+    def _alive(pid: int) -> bool:
+        # os.kill(pid, 0) terminates the process on Windows
+        kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+        handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            # access denied: the process exists
+            return kernel32.GetLastError() == 5
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == _STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+else:
+
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            # e.g. PermissionError, the process exists
+            return True
+        return True
+
+
+class PortAllocator:
+    """
+    Hand out imposter ports from a range without trial and error: ports used
+    by existing imposters (from the imposters list) and ports reserved by other
+    processes are skipped. Reservations are stored, one "port pid" per line, in
+    a lock protected file so pytest-xdist workers never pick the same port.
+    Reservations of dead processes are reclaimed. Safe to share between the
+    threads of a process, e.g. add_imposters with a port_range.
+    """
+
+    def __init__(self, mountebank: "Mountebank", path: Optional[str] = None) -> None:
+        self._mountebank = mountebank
+        self.path = path or default_path(mountebank.url)
+        self._in_use: Set[int] = set()
+        self._stale = True
+        self._reserved: Set[int] = set()
+        # guards both sets, held around the file lock sections too;
+        # reentrant as mark_in_use calls release and refresh
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _reservations(self) -> Iterator[Dict[int, int]]:
+        with open(self.path, "a+", encoding="utf-8") as file:
+            _lock(file)
+            try:
+                file.seek(0)
+                reservations = {}
+                for line in file:
+                    port, pid = line.split()
+                    if _alive(int(pid)):
+                        reservations[int(port)] = int(pid)
+                yield reservations
+                file.seek(0)
+                file.truncate()
+                file.writelines(
+                    f"{port} {pid}\n" for port, pid in sorted(reservations.items())
+                )
+                file.flush()
+            finally:
+                _unlock(file)
+
+    def refresh(self) -> None:
+        """
+        Reload the ports of the existing imposters
+        :return:
+        """
+        in_use = set(self._mountebank.get_request_counts())
+        with self._lock:
+            self._in_use = in_use
+            self._stale = False
+
+    def allocate(self, port_range: range) -> int:
+        """
+        Reserve a free port for the current process
+        :param port_range: candidate ports, e.g. range(4545, 4645)
+        :return: reserved port
+        """
+        with self._lock:
+            if self._stale:
+                self.refresh()
+            with self._reservations() as reservations:
+                for attempt in range(2):
+                    for port in port_range:
+                        if port not in reservations and port not in self._in_use:
+                            reservations[port] = os.getpid()
+                            self._reserved.add(port)
+                            return port
+                    if attempt == 0:
+                        # imposters deleted by someone else free their ports
+                        self.refresh()
+        raise NoFreePort(f"No free port in {port_range}")
+
+    def mark_in_use(self, port: int) -> None:
+        """
+        Remember a port taken by an imposter created outside this allocator
+        :param port: port
+        :return:
+        """
+        with self._lock:
+            self.release(port)
+            if self._stale:
+                self.refresh()
+            self._in_use.add(port)
+
+    def release(self, port: int) -> None:
+        """
+        Give back a port reserved by the current process
+        :param port: port
+        :return:
+        """
+        with self._lock:
+            self._in_use.discard(port)
+            if port not in self._reserved:
+                return
+            self._reserved.discard(port)
+            with self._reservations() as reservations:
+                if reservations.get(port) == os.getpid():
+                    del reservations[port]
+
+    def adopt(self, other: "PortAllocator") -> None:
+        """
+        Take over the ports reserved by another allocator of the current process,
+        moving them to this allocator reservation file
+        :param other: previous allocator, e.g. of another reservation file
+        :return:
+        """
+        with other._lock:
+            ports = set(other._reserved)
+            if other.path == self.path:
+                other._reserved.clear()
+        if not ports:
+            return
+        pid = os.getpid()
+        with self._lock:
+            if other.path != self.path:
+                with self._reservations() as reservations:
+                    for port in ports:
+                        reservations[port] = pid
+            self._reserved |= ports
+        if other.path != self.path:
+            other.release_all()
+
+    def release_all(self) -> None:
+        """
+        Give back every port reserved by the current process
+        :return:
+        """
+        with self._lock:
+            self._in_use.clear()
+            self._stale = True
+            if not self._reserved:
+                return
+            pid = os.getpid()
+            with self._reservations() as reservations:
+                for port in self._reserved:
+                    if reservations.get(port) == pid:
+                        del reservations[port]
+            self._reserved.clear()
@@ -0,0 +1,120 @@
+import json
+import re
+from typing import Any, Callable, Dict
+
+# predicate keys that are options of the operator rather than operators
+OPTIONS = frozenset({"caseSensitive", "except", "jsonpath", "xpath"})
+MISSING = object()
+
+
+def _text(value: Any, case_sensitive: bool) -> str:
+    if value is MISSING or value is None:
+        value = ""
+    elif not isinstance(value, str):
+        value = json.dumps(value)
+    return value if case_sensitive else value.lower()
+
+
+def _regex(actual: str, expected: str, case_sensitive: bool) -> bool:
+    flags = 0 if case_sensitive else re.IGNORECASE
+    return re.search(expected, actual, flags) is not None
+
+
+_STRING_OPERATORS: Dict[str, Callable[[str, str], bool]] = {
+    "equals": lambda actual, expected: actual == expected,
+    "deepEquals": lambda actual, expected: actual == expected,
+    "contains": lambda actual, expected: expected in actual,
+    "startsWith": lambda actual, expected: actual.startswith(expected),
+    "endsWith": lambda actual, expected: actual.endswith(expected),
+}
+OPERATORS = frozenset(_STRING_OPERATORS) | {"matches", "exists", "and", "or", "not"}
+
+
+def _lookup(actual: dict, key: str, case_sensitive: bool) -> Any:
+    if key in actual or case_sensitive:
+        return actual.get(key, MISSING)
+    lowered = key.lower()
+    for name, value in actual.items():
+        if name.lower() == lowered:
+            return value
+    return MISSING
+
+
+def _compare(operator: str, expected: Any, actual: Any, case_sensitive: bool) -> bool:
+    if isinstance(expected, dict):
+        if isinstance(actual, str):
+            # request bodies are compared as json objects when possible
+            try:
+                actual = json.loads(actual)
+            except ValueError:
+                return False
+        if not isinstance(actual, dict):
+            actual = {}
+        if operator == "deepEquals" and len(actual) != len(expected):
+            return False
+        return all(
+            _compare(
+                operator, value, _lookup(actual, key, case_sensitive), case_sensitive
+            )
+            for key, value in expected.items()
+        )
+    if isinstance(expected, list):
+        # every expected value must be among the actual ones
+        actual = actual if isinstance(actual, list) else [actual]
+        if operator == "deepEquals" and len(actual) != len(expected):
+            return False
+        return all(
+            any(_compare(operator, item, value, case_sensitive) for value in actual)
+            for item in expected
+        )
+    if operator == "exists":
+        present = actual is not MISSING and actual not in ("", None)
+        return present == bool(expected)
+    if isinstance(actual, list):
+        # repeated query parameters or headers: any of the values may match
+        return any(
+            _compare(operator, expected, value, case_sensitive) for value in actual
+        )
+    if operator == "matches":
+        return _regex(_text(actual, True), expected, case_sensitive)
+    return _STRING_OPERATORS[operator](
+        _text(actual, case_sensitive), _text(expected, case_sensitive)
+    )
+
+
+def evaluate(predicate: dict, request: dict) -> bool:
+    """
+    Evaluate a Mountebank predicate against a recorded request, supporting the
+    equals, deepEquals, contains, startsWith, endsWith, matches, exists, and,
+    or and not operators with the caseSensitive option
+    :param predicate: predicate, e.g. {"equals": {"method": "POST"}}
+    :param request: request fields (method, path, query, headers, body, ...)
+    :return: whether the request matches
+    """
+    case_sensitive = predicate.get("caseSensitive", False)
+    for operator, expected in predicate.items():
+        if operator in OPTIONS:
+            continue
+        if operator == "and":
+            return all(evaluate(child, request) for child in expected)
+        if operator == "or":
+            return any(evaluate(child, request) for child in expected)
+        if operator == "not":
+            return not evaluate(expected, request)
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported predicate operator {operator}")
+        return all(
+            _compare(operator, value, _lookup(request, field, True), case_sensitive)
+            for field, value in expected.items()
+        )
+    raise ValueError(f"Predicate without operator: {predicate}")
+
+
+def stub_matches(stub: dict, request: dict) -> bool:
+    """
+    A stub matches a request when all its predicates match
+    :param stub: stub definition
+    :param request: request fields
+    :return:
+    """
+    return all(evaluate(predicate, request) for predicate in stub.get("predicates", []))
@@ -0,0 +1,194 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from mounty.mirror import normalize_stub
+from mounty.predicates import stub_matches
+
+if TYPE_CHECKING:  # pragma: no cover
+    from mounty.mountebank import Mountebank
+
+# request fields holding a single string, so two different values cannot both match
+SCALAR_FIELDS = frozenset({"method", "path", "data", "ip", "requestFrom"})
+# predicate options changing the compared value
+_TRANSFORMS = frozenset({"except", "jsonpath", "xpath"})
+
+
+def _literals(predicates: List[dict], literals: Dict[str, Set[str]]) -> None:
+    for predicate in predicates:
+        if "and" in predicate:
+            _literals(predicate["and"], literals)
+        if _TRANSFORMS.intersection(predicate):
+            continue
+        for operator in ("equals", "deepEquals"):
+            for name, value in (predicate.get(operator) or {}).items():
+                if name in SCALAR_FIELDS and isinstance(value, str):
+                    literals.setdefault(name, set()).add(value.lower())
+
+
+def required_values(stub: dict) -> Dict[str, Set[str]]:
+    """
+    Values a request must have to match a stub, case insensitive, for the fields
+    where two different values exclude each other
+    :param stub: stub definition
+    :return: lower cased values by request field
+    """
+    literals: Dict[str, Set[str]] = {}
+    _literals(stub.get("predicates", []), literals)
+    return literals
+
+
+def disjoint(first: Dict[str, Set[str]], second: Dict[str, Set[str]]) -> bool:
+    """
+    Whether no request can match two stubs, given their required values
+    :return: False when unsure
+    """
+    return any(
+        values.isdisjoint(second[name])
+        for name, values in first.items()
+        if name in second
+    )
+
+
+@dataclass
+class StubProfile:
+    """
+    Stub hit counts of an imposter, and the stub order checking the most hit
+    stubs first without changing which stub answers any request
+    """
+
+    port: int
+    stubs: List[dict]
+    hits: List[int]
+    # requests whose first matching stub could not be evaluated
+    unknown: int = 0
+    order: List[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.order:
+            self.order = reorder(self.stubs, self.hits)
+
+    @property
+    def changed(self) -> bool:
+        return self.order != sorted(self.order)
+
+    def _cost(self, order: List[int]) -> float:
+        total = sum(self.hits)
+        if not total:
+            return 0.0
+        position = {index: rank for rank, index in enumerate(order)}
+        return sum(hits * (position[i] + 1) for i, hits in enumerate(self.hits)) / total
+
+    @property
+    def cost(self) -> float:
+        """
+        Mean number of stubs checked per matched request, in the current order
+        """
+        return self._cost(list(range(len(self.stubs))))
+
+    @property
+    def reordered_cost(self) -> float:
+        """
+        Mean number of stubs checked per matched request, once reordered
+        """
+        return self._cost(self.order)
+
+    def reordered_stubs(self) -> List[dict]:
+        return [self.stubs[index] for index in self.order]
+
+
+def count_hits(stubs: List[dict], requests: List[dict]) -> StubProfile:
+    """
+    Count the hits of every stub, from the matches recorded by Mountebank in debug
+    mode (mb --debug) or else by replaying the recorded requests
+    :param stubs: stubs, as returned by Mountebank
+    :param requests: recorded requests json
+    :return: profile, with port 0
+    """
+    definitions = [
+        {key: val for key, val in normalize_stub(stub).items() if key != "matches"}
+        for stub in stubs
+    ]
+    if any("matches" in stub for stub in stubs):
+        hits = [len(stub.get("matches", [])) for stub in stubs]
+        return StubProfile(0, definitions, hits)
+    hits = [0] * len(stubs)
+    unknown = 0
+    for request in requests:
+        try:
+            index = next(
+                (
+                    i
+                    for i, stub in enumerate(definitions)
+                    if stub_matches(stub, request)
+                ),
+                None,
+            )
+        except ValueError:
+            # unsupported predicate (inject, ...) before the first match
+            unknown += 1
+            continue
+        if index is not None:
+            hits[index] += 1
+    return StubProfile(0, definitions, hits, unknown)
+
+
+def reorder(stubs: List[dict], hits: List[int]) -> List[int]:
+    """
+    Stable order putting the most hit stubs first, where a stub only moves
+    ahead of the stubs it provably never shares a request with (different
+    method, path...), so the answer to every request is unchanged
+    :param stubs: stub definitions
+    :param hits: hits by stub
+    :return: stub indexes, in their new order
+    """
+    values = [required_values(stub) for stub in stubs]
+    # stubs to place after each stub, and number of stubs to place before
+    after: List[List[int]] = [[] for _ in stubs]
+    pending = [0] * len(stubs)
+    for i in range(len(stubs)):
+        for j in range(i):
+            if not disjoint(values[i], values[j]):
+                after[j].append(i)
+                pending[i] += 1
+    available = [(-hits[i], i) for i in range(len(stubs)) if not pending[i]]
+    heapq.heapify(available)
+    order: List[int] = []
+    while available:
+        _, index = heapq.heappop(available)
+        order.append(index)
+        for successor in after[index]:
+            pending[successor] -= 1
+            if not pending[successor]:
+                heapq.heappush(available, (-hits[successor], successor))
+    return order
+
+
+def profile_imposter(mountebank: "Mountebank", port: int) -> StubProfile:
+    """
+    Profile the stubs of an imposter, see count_hits
+    :param mountebank: admin client
+    :param port: imposter port
+    :return:
+    """
+    payload = mountebank.get_imposter_payload(port)
+    profile = count_hits(payload.get("stubs", []), payload.get("requests", []))
+    profile.port = port
+    return profile
+
+
+def reorder_stubs(
+    mountebank: "Mountebank", port: int, profile: Optional[StubProfile] = None
+) -> StubProfile:
+    """
+    Put the most hit stubs of an imposter first, when it changes the stub order.
+    Overwriting the stubs restarts their response cycles.
+    :param mountebank: admin client
+    :param port: imposter port
+    :param profile: profile to apply, computed from the imposter if not given
+    :return: the applied profile
+    """
+    profile = profile or profile_imposter(mountebank, port)
+    if profile.changed:
+        mountebank.overwrite_stubs_on_imposter(profile.reordered_stubs(), port)
+    return profile
@@ -0,0 +1,247 @@
+"""
+pytest plugin keeping imposters alive for a whole session (per xdist worker)
+and only resetting what the tests changed, enabled when mounty is installed.
+
+    def test_orders(mounty_imposters):
+        orders = mounty_imposters.use({"name": "orders", "protocol": "http", "stubs": [...]})
+        ...
+
+Imposters without port get a port from the mountebank_port_range, unique
+across xdist workers, and keep it for the rest of the session. Workers share
+their reservations through a file keyed on the Mountebank host and the range,
+even when each of them runs its own in-process fake.
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Union
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+import pytest
+
+from mounty.fake import FakeMountebank
+from mounty.mirror import canonical_key, normalize_imposter
+from mounty.models import Imposter, ImposterResponse
+from mounty.mountebank import Mountebank
+from mounty.ports import PortAllocator, range_path
+
+DEFAULT_PORT_RANGE = "4545-5545"
+
+
+@dataclass
+class SessionStats:
+    """
+    Time spent on imposters setup, and the estimated time saved by reusing them
+    """
+
+    uses: int = 0
+    creations: int = 0
+    creation_seconds: float = 0.0
+    setup_seconds: float = 0.0
+
+    def merge(self, other: Dict[str, Any]) -> None:
+        for name, value in other.items():
+            setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def reuses(self) -> int:
+        return self.uses - self.creations
+
+    @property
+    def saved_seconds(self) -> float:
+        """
+        Time it would have taken to create every used imposter for each test,
+        minus the time actually spent syncing and resetting them
+        """
+        if not self.creations:
+            return 0.0
+        per_creation = self.creation_seconds / self.creations
+        return self.uses * per_creation - self.setup_seconds
+
+
+# keyed on the pytest Config; the plugin is auto-loaded wherever mounty is
+# installed, so it sticks to APIs older pytest versions have (no Stash)
+_STATS: "WeakKeyDictionary[Any, SessionStats]" = WeakKeyDictionary()
+
+
+def _port_range(value: str) -> range:
+    first, last = value.split("-")
+    return range(int(first), int(last) + 1)
+
+
+class ImposterPool:
+    """
+    Imposters shared by the tests of a session. Every use syncs the imposters
+    with their definition, through the client mirror, so only the stubs changed
+    by previous tests are sent again; after each test the saved requests are
+    deleted and the imposters created outside the pool are removed.
+    """
+
+    def __init__(
+        self, mountebank: Mountebank, port_range: range, stats: SessionStats
+    ) -> None:
+        self.mountebank = mountebank
+        self.port_range = port_range
+        self.stats = stats
+        self._definitions: Dict[int, dict] = {}
+        self._ports: Dict[str, int] = {}
+        self.port_allocator = PortAllocator(
+            mountebank, range_path(urlsplit(mountebank.url).hostname, port_range)
+        )
+
+    def _port(self, definition: dict) -> int:
+        key = definition.get("name") or canonical_key(definition)
+        try:
+            return self._ports[key]
+        except KeyError:
+            port = self.port_allocator.allocate(self.port_range)
+            self._ports[key] = port
+            return port
+
+    def use(self, *imposters: Union[dict, Imposter]) -> List[ImposterResponse]:
+        """
+        Make sure the imposters exist as defined, creating them on first use
+        :param imposters: imposter definitions, the port may be left out
+        :return: imposters, in the given order
+        """
+        start = time.perf_counter()
+        ports = []
+        for imposter in imposters:
+            definition = normalize_imposter(imposter)
+            if "port" not in definition:
+                definition["port"] = self._port(definition)
+            self._definitions[definition["port"]] = definition
+            ports.append(definition["port"])
+        operations = self.mountebank.sync(*self._definitions.values())
+        seconds = time.perf_counter() - start
+        creations = sum(operation.action == "create" for operation in operations)
+        self.stats.uses += len(imposters)
+        self.stats.setup_seconds += seconds
+        if creations:
+            self.stats.creations += creations
+            self.stats.creation_seconds += seconds
+        return [
+            ImposterResponse.from_dict(dict(self.mountebank.mirror.get(port)))
+            for port in ports
+        ]
+
+    def reset(self) -> None:
+        """
+        Delete the saved requests of the pool imposters, and the imposters
+        created outside the pool by its client
+        :return:
+        """
+        start = time.perf_counter()
+        self.mountebank.sync(*self._definitions.values())
+        # imposters of other pools (xdist workers) sharing the Mountebank are left alone
+        for port, count in self.mountebank.get_request_counts().items():
+            if count and port in self._definitions:
+                self.mountebank.delete_requests_from_imposter(port)
+        self.stats.setup_seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        """
+        Delete the pool imposters
+        :return:
+        """
+        for port in self._definitions:
+            self.mountebank.delete_imposter(port)
+        self._definitions.clear()
+        self.port_allocator.release_all()
+
+
+def pytest_addoption(parser: "pytest.Parser") -> None:
+    group = parser.getgroup("mounty")
+    group.addoption(
+        "--mountebank-url",
+        help="Mountebank admin url, defaults to MOUNTEBANK_URL or an in-process fake",
+    )
+    parser.addini("mountebank_url", "Mountebank admin url")
+    parser.addini(
+        "mountebank_port_range",
+        f"ports of the imposters defined without port, default {DEFAULT_PORT_RANGE}",
+        default=DEFAULT_PORT_RANGE,
+    )
+
+
+def pytest_configure(config: "pytest.Config") -> None:
+    _STATS[config] = SessionStats()
+
+
+@pytest.fixture(scope="session")
+def mounty_worker_id(request: "pytest.FixtureRequest") -> str:
+    """
+    pytest-xdist worker id, "master" without xdist
+    """
+    workerinput = getattr(request.config, "workerinput", None)
+    return workerinput["workerid"] if workerinput else "master"
+
+
+@pytest.fixture(scope="session")
+def mounty_mountebank(request: "pytest.FixtureRequest") -> Iterator[Mountebank]:
+    """
+    Session wide admin client, with a mirror. Without configured url, an
+    in-process FakeMountebank is started for the session.
+    """
+    config = request.config
+    url = (
+        config.getoption("mountebank_url")
+        or config.getini("mountebank_url")
+        or os.environ.get("MOUNTEBANK_URL")
+    )
+    if url:
+        yield Mountebank(url=url, mirror=True)
+        return
+    with FakeMountebank() as fake:
+        yield Mountebank(url=fake.url, mirror=True)
+
+
+@pytest.fixture(scope="session")
+def mounty_pool(
+    request: "pytest.FixtureRequest", mounty_mountebank: Mountebank
+) -> Iterator[ImposterPool]:
+    """
+    Imposters shared by every test of the session (or xdist worker)
+    """
+    pool = ImposterPool(
+        mounty_mountebank,
+        _port_range(request.config.getini("mountebank_port_range")),
+        _STATS[request.config],
+    )
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def mounty_imposters(mounty_pool: ImposterPool) -> Iterator[ImposterPool]:
+    """
+    The session imposter pool, reset after the test
+    """
+    yield mounty_pool
+    mounty_pool.reset()
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["mounty"] = vars(_STATS[session.config])
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node: Any, error: Optional[Any]) -> None:
+    stats = getattr(node, "workeroutput", {}).get("mounty")
+    if stats:
+        _STATS[node.config].merge(stats)
+
+
+def pytest_terminal_summary(terminalreporter: Any, config: "pytest.Config") -> None:
+    stats = _STATS[config]
+    if not stats.uses:
+        return
+    terminalreporter.write_sep("-", "mounty imposters")
+    terminalreporter.write_line(
+        f"{stats.uses} imposter uses, {stats.creations} created, "
+        f"{stats.reuses} reused; setup took {stats.setup_seconds:.2f}s, "
+        f"about {max(stats.saved_seconds, 0.0):.2f}s saved"
+    )
@@ -0,0 +1,145 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Union,
+)
+
+from mounty.models import RecordedRequest
+
+BodyMatcher = Union[dict, Callable[[Any], bool]]
+
+
+def _values(value: Any) -> Iterable[Any]:
+    # repeated headers and query parameters are recorded as lists
+    return value if isinstance(value, list) else (value,)
+
+
+def _contains(body: Any, expected: dict) -> bool:
+    return isinstance(body, dict) and all(
+        key in body
+        and (_contains(body[key], val) if isinstance(val, dict) else body[key] == val)
+        for key, val in expected.items()
+    )
+
+
+def _pairs(mapping: Optional[dict], lower: bool = False) -> List[Hashable]:
+    return [
+        (name.lower() if lower else name, value)
+        for name, values in (mapping or {}).items()
+        for value in _values(values)
+    ]
+
+
+_INDEX_KEYS: Dict[str, Callable[[RecordedRequest], Iterable[Hashable]]] = {
+    "method": lambda request: (request.method.upper(),),
+    "path": lambda request: (request.path,),
+    "headers": lambda request: _pairs(request.headers, lower=True),
+    "query": lambda request: _pairs(request.query),
+}
+
+
+class RequestLog:
+    """
+    Recorded requests with lazily built indexes on method, path, header values
+    and query parameters, for repeated lookups without rescanning every request
+    """
+
+    def __init__(self, requests: Iterable[RecordedRequest]) -> None:
+        self.requests: List[RecordedRequest] = list(requests)
+        self._indexes: Dict[str, Dict[Hashable, Set[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.requests)
+
+    def __iter__(self) -> Iterator[RecordedRequest]:
+        return iter(self.requests)
+
+    def _index(self, name: str) -> Dict[Hashable, Set[int]]:
+        try:
+            return self._indexes[name]
+        except KeyError:
+            pass
+        keys_of = _INDEX_KEYS[name]
+        index: Dict[Hashable, Set[int]] = {}
+        for position, request in enumerate(self.requests):
+            for key in keys_of(request):
+                index.setdefault(key, set()).add(position)
+        self._indexes[name] = index
+        return index
+
+    def _positions(
+        self,
+        method: Optional[str],
+        path: Optional[str],
+        headers: Optional[Dict[str, str]],
+        query: Optional[Dict[str, str]],
+    ) -> Optional[Set[int]]:
+        postings = []
+        if method is not None:
+            postings.append(self._index("method").get(method.upper(), set()))
+        if path is not None:
+            postings.append(self._index("path").get(path, set()))
+        for header, value in (headers or {}).items():
+            postings.append(self._index("headers").get((header.lower(), value), set()))
+        for param, value in (query or {}).items():
+            postings.append(self._index("query").get((param, value), set()))
+        if not postings:
+            return None
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def find(
+        self,
+        method: Optional[str] = None,
+        path: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, str]] = None,
+        body_matches: Optional[BodyMatcher] = None,
+    ) -> List[RecordedRequest]:
+        """
+        Find the recorded requests matching every given criteria
+        :param method: http method, case insensitive
+        :param path: exact path
+        :param headers: header values, header names are case insensitive
+        :param query: query parameter values
+        :param body_matches: dict contained in the json body, or predicate on the body
+        :return: matching requests, in recording order
+        """
+        positions = self._positions(method, path, headers, query)
+        if positions is None:
+            candidates: Iterable[RecordedRequest] = self.requests
+        else:
+            candidates = [self.requests[position] for position in sorted(positions)]
+        if body_matches is None:
+            return list(candidates)
+        if isinstance(body_matches, dict):
+            return [
+                request
+                for request in candidates
+                if _contains(request.body, body_matches)
+            ]
+        return [request for request in candidates if body_matches(request.body)]
+
+    def count(
+        self,
+        method: Optional[str] = None,
+        path: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        query: Optional[Dict[str, str]] = None,
+        body_matches: Optional[BodyMatcher] = None,
+    ) -> int:
+        """
+        Count the recorded requests matching every given criteria, see find
+        :return: number of matching requests
+        """
+        if body_matches is None:
+            positions = self._positions(method, path, headers, query)
+            return len(self.requests) if positions is None else len(positions)
+        return len(self.find(method, path, headers, query, body_matches))
@@ -0,0 +1,73 @@
+import json
+from dataclasses import fields
+from typing import Any, Dict, Tuple, Union
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+
+
+def dataclass_fields(obj: Any) -> Dict[str, Any]:
+    """
+    Shallow dict of a dataclass without the fields holding an empty string or
+    None (e.g. an Imposter port left to Mountebank), nested values are left to
+    the json encoder
+    :param obj: dataclass instance, e.g. Imposter or Stub
+    :return:
+    """
+    cls = type(obj)
+    try:
+        names = _FIELD_NAMES[cls]
+    except KeyError:
+        names = _FIELD_NAMES[cls] = tuple(field.name for field in fields(cls))
+    payload = {}
+    for name in names:
+        value = getattr(obj, name)
+        if value is not None and value != "":
+            payload[name] = value
+    return payload
+
+
+def _default(obj: Any) -> Dict[str, Any]:
+    try:
+        return dataclass_fields(obj)
+    except TypeError:
+        raise TypeError(
+            f"Object of type {type(obj).__name__} is not JSON serializable"
+        ) from None
+
+
+class JsonCodec:
+    """
+    Standard library json, used to encode admin requests and decode responses.
+    Imposter, Stub and other dataclasses are encoded in a single pass.
+    """
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson backed codec, requires the `fast` extra (`pip install mounty[fast]`)
+    """
+
+    def __init__(self) -> None:
+        try:
+            import orjson
+        except ImportError as e:
+            raise ImportError(
+                "OrjsonCodec requires orjson, install it with `pip install mounty[fast]`"
+            ) from e
+        self._orjson = orjson
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._orjson.dumps(
+            obj, default=_default, option=self._orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._orjson.loads(data)
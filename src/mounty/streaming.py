@@ -0,0 +1,108 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+
+
+class _StreamReader:
+    """
+    Decode json values one at a time from an iterable of utf-8 encoded chunks,
+    keeping only the not yet consumed part of the stream in memory
+    """
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        # drop the consumed part of the buffer before growing it
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            chunk = b""
+        self._buffer += self._decoder.decode(chunk, final=self._eof)
+        return True
+
+    def peek(self) -> str:
+        """
+        Skip whitespaces and return the next character, empty at the end of stream
+        """
+        while True:
+            while (
+                self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE
+            ):
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return self._buffer[self._pos : self._pos + 1]
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in json stream, got {found!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """
+        Decode the next json value, reading more chunks until it is complete
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._grow():
+                    raise
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if end < len(self._buffer) or not self._grow():
+                self._pos = end
+                return value
+
+    def _grow(self) -> bool:
+        # read until the pending text doubles, so retries stay linear in its size
+        pending = len(self._buffer) - self._pos
+        grown = False
+        while self._fill():
+            grown = True
+            if len(self._buffer) - self._pos >= 2 * max(pending, 1):
+                break
+        return grown
+
+
+def iter_json_array(chunks: Iterable[bytes], key: str) -> Iterator[Any]:
+    """
+    Incrementally decode the array stored under `key` in a top level json object
+    :param chunks: utf-8 encoded json document, e.g. Response.iter_content()
+    :param key: top level key of the array
+    :return: iterator over the array items, nothing if the key is missing
+    """
+    reader = _StreamReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        if name == key and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                return
+            while True:
+                yield reader.value()
+                if reader.peek() == "]":
+                    return
+                reader.expect(",")
+        reader.value()
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
@@ -0,0 +1,205 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional, Tuple, Union
+
+from requests import HTTPError, Response, Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from mounty.errors import Unavailable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+# connect, read timeouts in seconds; the read timeout bounds each socket read,
+# not the whole (possibly streamed) response
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 60.0)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# statuses of a proxy in front of an unreachable Mountebank
+UNAVAILABLE_STATUSES = frozenset({502, 503, 504})
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Retries of the idempotent calls failing because Mountebank is unreachable,
+    after a full jitter exponential delay growing from initial to maximum by factor
+    """
+
+    retries: int = 2
+    initial: float = 0.1
+    factor: float = 2.0
+    maximum: float = 2.0
+
+    def delays(self) -> Iterator[float]:
+        """
+        Generate the delays to sleep before each retry
+        :return: `retries` delays, in seconds
+        """
+        delay = self.initial
+        for _ in range(self.retries):
+            yield random.uniform(0, delay)
+            delay = min(delay * self.factor, self.maximum)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while Mountebank is down: after `threshold` consecutive failed
+    calls the circuit opens and calls raise Unavailable without touching the
+    network. Once `reset_timeout` seconds passed, a single trial call is let
+    through (half open); it closes the circuit on success, or opens it again.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 10.0) -> None:
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        "closed", "open" or "half-open"
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def before_call(self) -> None:
+        """
+        Let a call through, or raise Unavailable while the circuit is open
+        :return:
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if not self._trial and (
+                time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                self._trial = True
+                return
+        raise Unavailable("Circuit open, Mountebank is unreachable")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                if self._opened_at is None:
+                    logger.warning("Mountebank unreachable, opening the circuit")
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class Transport:
+    """
+    Thread safe HTTP transport of the admin client: every thread shares one
+    Session and its urllib3 connection pool, so short lived worker threads reuse
+    the kept alive connections. Calls get connect/read timeouts, the idempotent
+    calls are retried when Mountebank is unreachable, and a circuit breaker
+    fails fast while it stays down, instead of each thread waiting out its own
+    timeouts.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: Union[None, float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retry: Optional[RetryPolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        """
+        :param pool_size: connections kept alive, shared by every thread
+        :param timeout: requests timeout, (connect, read) seconds, None to wait forever
+        :param retry: retry policy, RetryPolicy(retries=0) disables the retries
+        :param circuit_breaker: circuit breaker, may be shared with other transports
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # only the retry counter is per thread
+        self._local = threading.local()
+        # the urllib3 pool is thread safe; the session holds no per call state,
+        # Mountebank sets no cookies
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def last_retries(self) -> int:
+        """
+        Retries performed by the last call of the current thread
+        """
+        return getattr(self._local, "retries", 0)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Response:
+        """
+        Send a request with the shared session, see requests.Session.request
+        :param method: "GET", "POST", etc.
+        :param url: request destination
+        :return: response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        data = kwargs.get("data")
+        # a streamed upload cannot be sent twice
+        replayable = data is None or isinstance(data, (bytes, str))
+        delays = (
+            self.retry.delays()
+            if method.upper() in IDEMPOTENT_METHODS and replayable
+            else iter(())
+        )
+        self._local.retries = 0
+        # the breaker sees logical calls: a half open trial keeps its retries
+        self.circuit_breaker.before_call()
+        while True:
+            try:
+                response = self.session.request(method=method, url=url, **kwargs)
+            except HTTPError as e:
+                if e.response.status_code not in UNAVAILABLE_STATUSES:
+                    # Mountebank answered
+                    self.circuit_breaker.record_success()
+                    raise
+                error: Exception = e
+            except (ConnectionError, Timeout) as e:
+                error = e
+            except Exception:
+                # e.g. a connection lost in the middle of the response
+                self.circuit_breaker.record_failure()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return response
+            delay = next(delays, None)
+            if delay is None:
+                # one failure per call, whatever its number of retries
+                self.circuit_breaker.record_failure()
+                if isinstance(error, HTTPError):
+                    raise error
+                raise Unavailable(f"{method} {url} failed: {error}") from error
+            logger.debug(
+                "%s %s failed (%s), retrying in %.3fs", method, url, error, delay
+            )
+            self._local.retries += 1
+            time.sleep(delay)
+
+    def close(self) -> None:
+        """
+        Close the pooled connections
+        :return:
+        """
+        self.session.close()
@@ -0,0 +1,266 @@
+"""
+Local validation of imposter and stub definitions, so a malformed payload fails
+before leaving the client, with every error at once instead of one Mountebank
+"bad data" round trip per mistake. The rules are plain dispatch tables built at
+import time, checking a typical imposter takes microseconds.
+"""
+from dataclasses import is_dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Union
+
+from mounty.errors import ValidationError
+from mounty.models import Imposter, Stub
+from mounty.predicates import OPERATORS
+from mounty.serialization import dataclass_fields
+
+PROTOCOLS = frozenset({"http", "https", "tcp", "smtp"})
+PORTS = range(0, 65536)  # 0 lets Mountebank choose the port
+RESPONSE_TYPES = frozenset({"is", "proxy", "inject", "fault"})
+RESPONSE_FIELDS = RESPONSE_TYPES | {"repeat", "behaviors", "_behaviors"}
+PROXY_MODES = frozenset({"proxyOnce", "proxyAlways", "proxyTransparent"})
+FAULTS = frozenset({"CONNECTION_RESET_BY_PEER", "RANDOM_DATA_THEN_CLOSE"})
+
+Check = Callable[[Any, str, List[str]], None]
+
+
+def _as_dict(value: Any) -> Any:
+    return dataclass_fields(value) if is_dataclass(value) else value
+
+
+def _type_name(value: Any) -> str:
+    return "null" if value is None else type(value).__name__
+
+
+def _expect(kind: type, description: str) -> Check:
+    def check(value: Any, path: str, errors: List[str]) -> None:
+        if not isinstance(value, kind):
+            errors.append(f"{path}: expected {description}, got {_type_name(value)}")
+
+    return check
+
+
+_object = _expect(dict, "an object")
+_string = _expect(str, "a string")
+_boolean = _expect(bool, "a boolean")
+_list = _expect(list, "a list")
+
+
+def _selector(value: Any, path: str, errors: List[str]) -> None:
+    if not isinstance(value, dict):
+        _object(value, path, errors)
+    elif not isinstance(value.get("selector"), str):
+        errors.append(f"{path}.selector: required string")
+
+
+def _predicate_list(value: Any, path: str, errors: List[str]) -> None:
+    if not isinstance(value, list) or not value:
+        errors.append(f"{path}: expected a non empty list of predicates")
+        return
+    for index, predicate in enumerate(value):
+        predicate_errors(predicate, f"{path}[{index}]", errors)
+
+
+def _predicate(value: Any, path: str, errors: List[str]) -> None:
+    predicate_errors(value, path, errors)
+
+
+_OPERANDS: Dict[str, Check] = {
+    **{operator: _object for operator in OPERATORS},
+    "and": _predicate_list,
+    "or": _predicate_list,
+    "not": _predicate,
+    "inject": _string,
+}
+_OPTIONS: Dict[str, Check] = {
+    "caseSensitive": _boolean,
+    "except": _string,
+    "jsonpath": _selector,
+    "xpath": _selector,
+}
+
+
+def _proxy(value: Any, path: str, errors: List[str]) -> None:
+    if not isinstance(value, dict):
+        _object(value, path, errors)
+        return
+    if not isinstance(value.get("to"), str):
+        errors.append(f"{path}.to: required string")
+    mode = value.get("mode", "proxyOnce")
+    if not isinstance(mode, str) or mode not in PROXY_MODES:
+        errors.append(f"{path}.mode: unknown proxy mode {value['mode']!r}")
+    for index, generator in enumerate(value.get("predicateGenerators", [])):
+        _object(generator, f"{path}.predicateGenerators[{index}]", errors)
+
+
+def _fault(value: Any, path: str, errors: List[str]) -> None:
+    if not isinstance(value, str) or value not in FAULTS:
+        errors.append(f"{path}: unknown fault {value!r}")
+
+
+def _repeat(value: Any, path: str, errors: List[str]) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+        errors.append(f"{path}: expected a positive integer, got {value!r}")
+
+
+_RESPONSE_CHECKS: Dict[str, Check] = {
+    "is": _object,
+    "proxy": _proxy,
+    "inject": _string,
+    "fault": _fault,
+    "repeat": _repeat,
+    "behaviors": _list,
+    "_behaviors": _object,
+}
+
+
+def predicate_errors(predicate: Any, path: str, errors: List[str]) -> None:
+    """
+    Check a predicate: a single known operator, with valid options
+    :param predicate: predicate definition
+    :param path: location of the predicate, used in the error messages
+    :param errors: list the errors are appended to
+    :return:
+    """
+    if not isinstance(predicate, dict):
+        _object(predicate, path, errors)
+        return
+    operators = []
+    for key, value in predicate.items():
+        check = _OPERANDS.get(key)
+        if check is not None:
+            operators.append(key)
+        else:
+            check = _OPTIONS.get(key)
+            if check is None:
+                errors.append(f"{path}: unknown predicate operator {key!r}")
+                continue
+        check(value, f"{path}.{key}", errors)
+    if len(operators) != 1:
+        found = ", ".join(operators) or "none"
+        errors.append(f"{path}: expected exactly one operator, found {found}")
+
+
+def response_errors(response: Any, path: str, errors: List[str]) -> None:
+    """
+    Check a stub response: a single response type among is, proxy, inject and fault
+    :param response: response definition
+    :param path: location of the response, used in the error messages
+    :param errors: list the errors are appended to
+    :return:
+    """
+    if not isinstance(response, dict):
+        _object(response, path, errors)
+        return
+    types = [key for key in response if key in RESPONSE_TYPES]
+    if len(types) > 1:
+        errors.append(f"{path}: expected one response type, found {', '.join(types)}")
+    for key, value in response.items():
+        check = _RESPONSE_CHECKS.get(key)
+        if check is None:
+            errors.append(f"{path}: unknown response field {key!r}")
+        else:
+            check(value, f"{path}.{key}", errors)
+
+
+def stub_errors(stub: Union[Stub, dict], path: str, errors: List[str]) -> None:
+    """
+    Check a stub, its predicates and its responses
+    :param stub: stub as dictionary or Stub
+    :param path: location of the stub, used in the error messages
+    :param errors: list the errors are appended to
+    :return:
+    """
+    stub = _as_dict(stub)
+    if not isinstance(stub, dict):
+        _object(stub, path, errors)
+        return
+    for name, check in (
+        ("predicates", predicate_errors),
+        ("responses", response_errors),
+    ):
+        items = stub.get(name, [])
+        if not isinstance(items, list):
+            _list(items, f"{path}.{name}", errors)
+            continue
+        for index, item in enumerate(items):
+            check(item, f"{path}.{name}[{index}]", errors)
+
+
+def imposter_errors(
+    imposter: Union[Imposter, dict],
+    path: str,
+    errors: List[str],
+    protocols: FrozenSet[str] = PROTOCOLS,
+) -> None:
+    """
+    Check an imposter: protocol, port, flags, default response and stubs.
+    Protocol specific fields are left to Mountebank.
+    :param imposter: imposter as dictionary or Imposter
+    :param path: location of the imposter, used in the error messages
+    :param errors: list the errors are appended to
+    :param protocols: accepted protocols, custom protocols included
+    :return:
+    """
+    imposter = _as_dict(imposter)
+    if not isinstance(imposter, dict):
+        _object(imposter, path, errors)
+        return
+    if "protocol" not in imposter:
+        errors.append(f"{path}.protocol: required field")
+    elif (
+        not isinstance(imposter["protocol"], str)
+        or imposter["protocol"] not in protocols
+    ):
+        errors.append(f"{path}.protocol: unknown protocol {imposter['protocol']!r}")
+    port = imposter.get("port")
+    if port is not None and (
+        not isinstance(port, int) or isinstance(port, bool) or port not in PORTS
+    ):
+        errors.append(f"{path}.port: expected a port number, got {port!r}")
+    if "recordRequests" in imposter:
+        _boolean(imposter["recordRequests"], f"{path}.recordRequests", errors)
+    if "defaultResponse" in imposter:
+        _object(imposter["defaultResponse"], f"{path}.defaultResponse", errors)
+    stubs = imposter.get("stubs", [])
+    if not isinstance(stubs, list):
+        _list(stubs, f"{path}.stubs", errors)
+        return
+    for index, stub in enumerate(stubs):
+        stub_errors(stub, f"{path}.stubs[{index}]", errors)
+
+
+def validate_imposters(
+    *imposters: Union[Imposter, dict], protocols: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Check imposters before they are sent
+    :param imposters: imposters as dictionary or Imposter
+    :param protocols: accepted protocols, defaults to PROTOCOLS
+    :return:
+    :raises ValidationError: listing every error of every imposter
+    """
+    protocols = PROTOCOLS if protocols is None else frozenset(protocols)
+    errors: List[str] = []
+    if len(imposters) == 1:
+        imposter_errors(imposters[0], "imposter", errors, protocols)
+    else:
+        for index, imposter in enumerate(imposters):
+            imposter_errors(imposter, f"imposters[{index}]", errors, protocols)
+    if errors:
+        raise ValidationError(errors)
+
+
+def validate_stubs(*stubs: Union[Stub, dict]) -> None:
+    """
+    Check stubs before they are sent
+    :param stubs: stubs as dictionary or Stub
+    :return:
+    :raises ValidationError: listing every error of every stub
+    """
+    errors: List[str] = []
+    if len(stubs) == 1:
+        stub_errors(stubs[0], "stub", errors)
+    else:
+        for index, stub in enumerate(stubs):
+            stub_errors(stub, f"stubs[{index}]", errors)
+    if errors:
+        raise ValidationError(errors)
@@ -0,0 +1,9 @@
+import pytest
+
+from mounty.fake import FakeMountebank
+
+
+@pytest.fixture
+def fake():
+    with FakeMountebank() as fake:
+        yield fake
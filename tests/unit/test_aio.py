@@ -0,0 +1,195 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from http import HTTPStatus
+from mounty.aio import AsyncMountebank
+from mounty.models import Imposter, ImposterResponse, Stub
+from mounty.errors import Conflict, NotFound
+from mounty.polling import Backoff
+from mounty.instrumentation import (
+    PARSE_SECONDS,
+    REQUEST_BYTES,
+    REQUEST_SECONDS,
+    RETRIES,
+    HistogramSink,
+    Instrumentation,
+)
+
+
+MOUNTEBANK_URL = "https://mountebank.ca"
+IMPOSTER_PORT = 4555
+SIMPLE_IMPOSTER = {
+    "port": IMPOSTER_PORT,
+    "protocol": "https",
+    "stubs": [{"responses": [{"is": {"statusCode": 201}}]}],
+}
+SIMPLE_IMPOSTER_STUB = dict(
+    SIMPLE_IMPOSTER, requests=[], numberOfRequests=0, recordRequests=False
+)
+
+
+def async_mountebank(handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncMountebank(url=MOUNTEBANK_URL, client=client)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncMountebankAdmin:
+    def test_add_imposter_object(self):
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(HTTPStatus.CREATED, json=SIMPLE_IMPOSTER_STUB)
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                return await mountebank.add_imposter(
+                    Imposter(
+                        port=IMPOSTER_PORT,
+                        protocol="https",
+                        stubs=[Stub(responses=[{"is": {"statusCode": 201}}])],
+                    )
+                )
+
+        imposter = run(scenario())
+        assert imposter == ImposterResponse(**SIMPLE_IMPOSTER_STUB)
+        assert sent[0]["port"] == IMPOSTER_PORT
+
+    def test_add_imposters_concurrently(self):
+        def handler(request):
+            body = json.loads(request.content)
+            return httpx.Response(
+                HTTPStatus.CREATED, json=dict(SIMPLE_IMPOSTER_STUB, port=body["port"])
+            )
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                return await asyncio.gather(
+                    *(
+                        mountebank.add_imposter(dict(SIMPLE_IMPOSTER, port=port))
+                        for port in range(4555, 4560)
+                    )
+                )
+
+        imposters = run(scenario())
+        assert [imposter.port for imposter in imposters] == list(range(4555, 4560))
+
+    def test_add_imposter_conflict(self):
+        def handler(request):
+            return httpx.Response(
+                HTTPStatus.BAD_REQUEST,
+                json={"errors": [{"code": "resource conflict", "message": "in use"}]},
+            )
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                await mountebank.add_imposter(SIMPLE_IMPOSTER)
+
+        with pytest.raises(Conflict) as err:
+            run(scenario())
+        assert err.value.message == "in use"
+
+    def test_get_missing_imposter(self):
+        def handler(request):
+            return httpx.Response(
+                HTTPStatus.NOT_FOUND,
+                json={"errors": [{"code": "no such resource"}]},
+            )
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                await mountebank.get_imposter(IMPOSTER_PORT)
+
+        with pytest.raises(NotFound):
+            run(scenario())
+
+    def test_overwrite_imposters(self):
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content))
+            return httpx.Response(
+                HTTPStatus.OK, json={"imposters": [SIMPLE_IMPOSTER_STUB]}
+            )
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                return await mountebank.overwrite_imposters(Imposter(**SIMPLE_IMPOSTER))
+
+        imposters = run(scenario())
+        assert imposters == [ImposterResponse(**SIMPLE_IMPOSTER_STUB)]
+        assert sent[0]["imposters"][0]["stubs"] == SIMPLE_IMPOSTER["stubs"]
+
+    def test_wait_for_requests(self):
+        recorded = dict(
+            SIMPLE_IMPOSTER_STUB,
+            numberOfRequests=1,
+            requests=[{"method": "POST", "path": "/foo", "body": '{"it": "works"}'}],
+        )
+        responses = iter([SIMPLE_IMPOSTER_STUB, recorded])
+
+        def handler(request):
+            return httpx.Response(HTTPStatus.OK, json=next(responses))
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                return await mountebank.wait_for_requests(IMPOSTER_PORT, count=1)
+
+        reqs = run(scenario())
+        assert reqs[0].body == {"it": "works"}
+
+    def test_wait_for_requests_backs_off_until_the_timeout(self, monkeypatch):
+        delays = []
+        real_sleep = asyncio.sleep
+
+        async def sleep(delay):
+            delays.append(delay)
+            await real_sleep(delay)
+
+        monkeypatch.setattr(asyncio, "sleep", sleep)
+
+        def handler(request):
+            return httpx.Response(HTTPStatus.OK, json=SIMPLE_IMPOSTER_STUB)
+
+        async def scenario():
+            async with async_mountebank(handler) as mountebank:
+                await mountebank.wait_for_requests(
+                    IMPOSTER_PORT,
+                    timeout=0.2,
+                    backoff=Backoff(initial=0.01, maximum=0.04),
+                )
+
+        with pytest.raises(TimeoutError):
+            run(scenario())
+        assert delays[:3] == [0.01, 0.02, 0.04]
+        # the last delay is cut to the deadline
+        assert max(delays) <= 0.04 and sum(delays) <= 0.2 + 1e-9
+
+
+def test_instrumentation():
+    sink = HistogramSink()
+
+    def handler(request):
+        return httpx.Response(HTTPStatus.OK, json=SIMPLE_IMPOSTER_STUB)
+
+    async def scenario():
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with AsyncMountebank(
+            url=MOUNTEBANK_URL, client=client, instrumentation=Instrumentation(sink)
+        ) as mountebank:
+            await mountebank.get_imposter(IMPOSTER_PORT)
+
+    run(scenario())
+    labels = {"operation": "GET /imposters/{port}"}
+    assert sink.get(REQUEST_SECONDS, status="200", **labels).count == 1
+    assert sink.get(PARSE_SECONDS, **labels).count == 1
+    assert sink.get(REQUEST_BYTES, **labels).sum == 0
+    # httpx does not report its retries
+    assert sink.get(RETRIES, **labels) is None
@@ -0,0 +1,90 @@
+import math
+
+import pytest
+
+from mounty import analytics
+from mounty.analytics import RequestColumns, parse_timestamp
+from mounty.models import RecordedRequest
+
+
+def recorded(path, timestamp, body="", method="GET"):
+    return {"method": method, "path": path, "body": body, "timestamp": timestamp}
+
+
+@pytest.fixture(autouse=True, params=["numpy", "python"])
+def aggregations(request, monkeypatch):
+    """
+    Run every test with the vectorized aggregations and with the fallback loops
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(analytics, "_numpy", lambda: None)
+    return request.param
+
+
+@pytest.fixture
+def columns():
+    return RequestColumns.from_requests(
+        [
+            recorded("/orders", "2022-03-01T10:00:00.000Z", '{"id": 1}', "POST"),
+            recorded("/health", "2022-03-01T10:00:00.500Z"),
+            recorded("/orders", "2022-03-01T10:00:01.000Z", '{"id": 22}', "POST"),
+            recorded("/orders", "2022-03-01T10:00:03.000Z", '{"id": 333}', "POST"),
+        ]
+    )
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("1970-01-01T00:00:01.500Z") == 1.5
+
+
+def test_columns_intern_methods_and_paths(columns):
+    assert len(columns) == 4
+    assert columns.path_names == ["/orders", "/health"]
+    assert list(columns.paths) == [0, 1, 0, 0]
+    assert list(columns.body_sizes) == [9, 0, 10, 11]
+
+
+def test_counts(columns):
+    assert columns.counts_by_path() == {"/orders": 3, "/health": 1}
+    assert columns.counts_by_method() == {"POST": 3, "GET": 1}
+
+
+def test_rate(columns):
+    start = parse_timestamp("2022-03-01T10:00:00.000Z")
+    assert columns.rate(window=2.0) == [(start, 1.5), (start + 2.0, 0.5)]
+    assert columns.rate(window=1.0, path="/health") == [(start + 0.5, 1.0)]
+
+
+def test_inter_arrival_quantiles(columns):
+    assert columns.inter_arrival_quantiles((0.0, 0.5, 1.0), path="/orders") == {
+        0.0: 1.0,
+        0.5: 1.5,
+        1.0: 2.0,
+    }
+
+
+def test_from_recorded_request_objects():
+    columns = RequestColumns.from_requests(
+        [RecordedRequest(method="GET", path="/", body=b"\x00\x01", timestamp="")]
+    )
+    assert list(columns.body_sizes) == [2]
+    assert math.isnan(columns.timestamps[0])
+    assert math.isnan(columns.inter_arrival_quantiles((0.5,))[0.5])
+
+
+def test_body_size_quantiles(columns):
+    assert columns.body_size_quantiles((0.0, 0.5, 1.0)) == {0.0: 0, 0.5: 9.5, 1.0: 11}
+
+
+def test_unknown_path(columns):
+    assert columns.rate(path="/unknown") == []
+    assert math.isnan(columns.inter_arrival_quantiles((0.5,), path="/unknown")[0.5])
+
+
+def test_empty_columns():
+    columns = RequestColumns()
+    assert columns.counts_by_path() == {}
+    assert columns.rate() == []
+    assert math.isnan(columns.body_size_quantiles((0.5,))[0.5])
@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import mounty
+from mounty import Mountebank
+from mounty.cli import imposter_files, main
+
+REQUEST = {"method": "GET", "path": "/", "query": {}, "headers": {}, "body": ""}
+
+
+@pytest.fixture
+def imposters_dir(tmp_path):
+    directory = tmp_path / "imposters"
+    directory.mkdir()
+    for port in (4545, 4546):
+        imposter = {"protocol": "tcp", "port": port, "recordRequests": True}
+        (directory / f"{port}.json").write_text(json.dumps(imposter))
+    with gzip.open(directory / "4547.json.gz", "wt") as file:
+        json.dump({"protocol": "tcp", "port": 4547, "stubs": [{"responses": []}]}, file)
+    (directory / "README.md").write_text("not an imposter")
+    return directory
+
+
+def test_imposter_files(imposters_dir):
+    assert [
+        os.path.basename(path) for path in imposter_files([str(imposters_dir)])
+    ] == [
+        "4545.json",
+        "4546.json",
+        "4547.json.gz",
+    ]
+
+
+def test_apply(fake, imposters_dir, capsys):
+    assert main(["--url", fake.url, "apply", str(imposters_dir), "--workers", "3"]) == 0
+
+    assert set(Mountebank(url=fake.url).get_request_counts()) == {4545, 4546, 4547}
+    assert "created imposter 4547" in capsys.readouterr().out
+
+
+def test_apply_reports_failures(fake, imposters_dir, capsys):
+    Mountebank(url=fake.url).add_imposter({"protocol": "tcp", "port": 4545})
+
+    assert main(["--url", fake.url, "apply", str(imposters_dir)]) == 1
+    assert "4545.json: resource conflict" in capsys.readouterr().err
+    assert main(["--url", fake.url, "apply", "--replace-all", str(imposters_dir)]) == 0
+
+
+def test_export_and_load(fake, imposters_dir, tmp_path):
+    main(["--url", fake.url, "apply", str(imposters_dir)])
+    snapshot = str(tmp_path / "snapshot.json.gz")
+    split = tmp_path / "split"
+
+    assert main(["--url", fake.url, "export", snapshot]) == 0
+    assert main(["--url", fake.url, "export", "--split", str(split)]) == 0
+    assert sorted(os.listdir(split)) == ["4545.json", "4546.json", "4547.json"]
+
+    Mountebank(url=fake.url).delete_all_imposters()
+    assert main(["--url", fake.url, "load", snapshot]) == 0
+    assert set(Mountebank(url=fake.url).get_request_counts()) == {4545, 4546, 4547}
+    assert main(["--url", fake.url, "apply", "--replace-all", str(split)]) == 0
+    assert set(Mountebank(url=fake.url).get_request_counts()) == {4545, 4546, 4547}
+
+
+def test_wait(fake, imposters_dir, capsys):
+    main(["--url", fake.url, "apply", str(imposters_dir)])
+    fake.record_requests(4545, [REQUEST, REQUEST])
+
+    assert main(["--url", fake.url, "wait", "4545", "--count", "2"]) == 0
+    assert main(["--url", fake.url, "wait", "4546", "--timeout", "0.1"]) == 1
+    assert "received 0 of 1 requests" in capsys.readouterr().err
+    assert main(["--url", fake.url, "wait", "4999"]) == 1
+
+
+def test_reset(fake, imposters_dir):
+    main(["--url", fake.url, "apply", str(imposters_dir)])
+    fake.record_requests(4545, [REQUEST])
+    fake.record_requests(4546, [REQUEST])
+
+    assert main(["--url", fake.url, "reset", "4545"]) == 0
+    assert Mountebank(url=fake.url).get_request_counts()[4546] == 1
+    assert main(["--url", fake.url, "reset"]) == 0
+    assert set(Mountebank(url=fake.url).get_request_counts().values()) == {0}
+    assert main(["--url", fake.url, "reset", "--delete", "4545"]) == 0
+    assert set(Mountebank(url=fake.url).get_request_counts()) == {4546, 4547}
+    assert main(["--url", fake.url, "reset", "--delete"]) == 0
+    assert Mountebank(url=fake.url).get_request_counts() == {}
+
+
+def test_unavailable_mountebank(capsys):
+    assert main(["--url", "http://127.0.0.1:1", "reset"]) == 1
+    assert "Mountebank unavailable" in capsys.readouterr().err
+
+
+def test_cli_does_not_import_requests():
+    src = os.path.dirname(os.path.dirname(os.path.abspath(mounty.__file__)))
+    code = "import sys, mounty.cli; print('requests' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(os.environ, PYTHONPATH=src),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert output.stdout.strip() == "False"
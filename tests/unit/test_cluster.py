@@ -0,0 +1,126 @@
+import pytest
+
+from mounty.cluster import LeastLoaded, MountebankCluster, PlacementStrategy
+from mounty.errors import Conflict, NotFound, ValidationError
+from mounty.fake import FakeMountebank
+from mounty.mountebank import Mountebank
+
+
+@pytest.fixture
+def fakes():
+    with FakeMountebank() as first, FakeMountebank() as second:
+        yield first, second
+
+
+def tcp(port):
+    return {"protocol": "tcp", "port": port, "recordRequests": True}
+
+
+def test_round_robin_placement(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+
+    cluster.add_imposters(*(tcp(port) for port in (5000, 5001, 5002)))
+
+    assert len(cluster.get_imposters()) == 3
+    assert {len(node.get_imposters()) for node in cluster.nodes} == {1, 2}
+    assert cluster.node_of(5000) is not cluster.node_of(5001)
+
+
+def test_least_loaded_placement(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes], LeastLoaded())
+    cluster.nodes[0].add_imposter(tcp(5000))
+    fakes[0].record_requests(5000, [{"method": "GET", "path": "/"}] * 10)
+    cluster.nodes[1].add_imposter(tcp(5001))
+    cluster.nodes[1].add_imposter(tcp(5002))
+
+    imposter = cluster.add_imposter(tcp(5003))
+
+    assert cluster.node_of(imposter.port) is cluster.nodes[1]
+
+
+def test_port_range_is_shared_by_the_nodes(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+
+    imposters = cluster.add_imposters(
+        *({"protocol": "tcp"} for _ in range(4)), port_range=range(5000, 5004)
+    )
+
+    assert sorted(imposter.port for imposter in imposters) == [5000, 5001, 5002, 5003]
+    cluster.delete_all_imposters()
+
+
+def test_nodes_passed_in_keep_their_reservations(fakes):
+    node = Mountebank(url=fakes[0].url)
+    reserved = node.port_allocator.allocate(range(5000, 5002))
+
+    cluster = MountebankCluster([node, fakes[1].url])
+
+    assert node.port_allocator is not cluster.nodes[1].port_allocator
+    assert node.port_allocator.path == cluster.nodes[1].port_allocator.path
+    imposter = cluster.add_imposter({"protocol": "tcp"}, port_range=range(5000, 5002))
+    assert (reserved, imposter.port) == (5000, 5001)
+    node.port_allocator.release_all()
+    cluster.delete_all_imposters()
+
+
+def test_operations_are_routed_to_the_owner(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+    cluster.add_imposter(tcp(5000))
+    cluster.add_imposter(tcp(5001))
+    fakes[1].record_requests(5001, [{"method": "GET", "path": "/"}])
+
+    assert len(cluster.wait_for_requests(5001, timeout=1)) == 1
+    assert cluster.get_request_counts() == {5000: 0, 5001: 1}
+    assert cluster.delete_requests_from_imposter(5001).requests == []
+    assert cluster.delete_imposter(5000).port == 5000
+    with pytest.raises(NotFound):
+        cluster.get_imposter(5000)
+
+
+def test_ports_are_unique_in_the_cluster(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+    cluster.add_imposter(tcp(5000))
+
+    with pytest.raises(Conflict):
+        cluster.add_imposter(tcp(5000))
+
+
+def test_concurrent_additions_of_a_port_place_one_imposter(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+
+    results = cluster.add_imposters(*(tcp(5000) for _ in range(8)))
+
+    assert sum(isinstance(result, Conflict) for result in results) == 7
+    assert cluster.get_request_counts() == {5000: 0}
+
+
+def test_failed_additions_release_the_port(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+
+    with pytest.raises(ValidationError):
+        cluster.add_imposter(dict(tcp(5000), protocol="gopher"))
+
+    assert cluster.add_imposter(tcp(5000)).port == 5000
+
+
+def test_placement_strategies_implement_choose():
+    with pytest.raises(TypeError):
+        PlacementStrategy()
+
+
+def test_imposters_added_elsewhere_are_found(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+    MountebankCluster([fakes[1].url]).add_imposter(tcp(5000))
+
+    assert cluster.get_imposter(5000).port == 5000
+    assert cluster.node_of(5000) is cluster.nodes[1]
+
+
+def test_delete_all_imposters(fakes):
+    cluster = MountebankCluster([fake.url for fake in fakes])
+    cluster.add_imposters(tcp(5000), tcp(5001))
+
+    deleted = cluster.delete_all_imposters()
+
+    assert sorted(imposter.port for imposter in deleted) == [5000, 5001]
+    assert cluster.get_imposters() == []
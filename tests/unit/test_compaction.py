@@ -0,0 +1,95 @@
+import pytest
+import requests
+
+from mounty import Mountebank
+from mounty.compaction import compact_imposter, compact_responses, compact_stubs
+
+
+def recorded(body, **headers):
+    return {
+        "is": {
+            "statusCode": 200,
+            "headers": dict({"Content-Type": "text/plain"}, **headers),
+            "body": body,
+            "_proxyResponseTime": 12,
+        }
+    }
+
+
+def clean(body):
+    return {
+        "is": {
+            "statusCode": 200,
+            "headers": {"Content-Type": "text/plain"},
+            "body": body,
+        }
+    }
+
+
+def stub(path, *responses):
+    return {
+        "predicates": [{"deepEquals": {"path": path}}],
+        "responses": list(responses),
+    }
+
+
+@pytest.mark.parametrize(
+    "cycle, expected",
+    [
+        ("AAA", [("A", 1)]),
+        ("AAB", [("A", 2), ("B", 1)]),
+        ("ABAB", [("A", 1), ("B", 1)]),
+        ("AABA", [("A", 2), ("B", 1), ("A", 1)]),
+        ("ABC", [("A", 1), ("B", 1), ("C", 1)]),
+    ],
+)
+def test_compact_responses(cycle, expected):
+    responses = [{"is": {"body": body}} for body in cycle]
+
+    compacted = compact_responses(responses)
+
+    assert [(r["is"]["body"], r.get("repeat", 1)) for r in compacted] == expected
+
+
+def test_compact_stubs():
+    stubs = [
+        stub("/a", recorded("a", Date="Mon"), recorded("a", Date="Tue")),
+        stub("/b", recorded("b", **{"X-Request-Id": "1"})),
+        stub("/a", recorded("a2", Date="Wed")),
+        {"responses": [{"proxy": {"to": "http://origin"}}], "_links": {}},
+    ]
+
+    compacted = compact_stubs(stubs)
+
+    assert compacted == [
+        stub("/a", dict(clean("a"), repeat=2), clean("a2")),
+        stub("/b", clean("b")),
+        {"responses": [{"proxy": {"to": "http://origin"}}]},
+    ]
+    assert stubs[0]["responses"][0]["is"]["headers"]["Date"] == "Mon"
+
+
+def test_compact_imposter(fake):
+    mountebank = Mountebank(url=fake.url)
+    stubs = [stub(f"/{i % 10}", recorded(str(i % 10), Date=str(i))) for i in range(100)]
+    port = mountebank.add_imposter({"protocol": "http", "stubs": stubs}).port
+
+    report = compact_imposter(mountebank, port)
+
+    assert (report.stubs_before, report.stubs_after) == (100, 10)
+    assert (report.responses_before, report.responses_after) == (100, 10)
+    assert report.bytes_after < report.bytes_before
+    assert report.ratio == report.bytes_after / report.bytes_before
+    assert len(mountebank.get_imposter(port).stubs) == 10
+    assert requests.get(f"http://127.0.0.1:{port}/3").text == "3"
+
+
+def test_compact_imposter_dry_run(fake):
+    mountebank = Mountebank(url=fake.url)
+    stubs = [stub("/a", recorded("a")), stub("/a", recorded("b"))]
+    port = mountebank.add_imposter({"protocol": "http", "stubs": stubs}).port
+
+    report = compact_imposter(mountebank, port, dry_run=True)
+
+    assert report.stubs_after == 1
+    assert len(mountebank.get_imposter(port).stubs) == 2
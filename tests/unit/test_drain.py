@@ -0,0 +1,105 @@
+import json
+
+import httpretty
+import pytest
+
+from http import HTTPStatus
+from mounty import Mountebank
+from mounty.drain import RequestDrainer, read_drained_requests
+
+
+MOUNTEBANK_URL = "https://mountebank.ca"
+IMPOSTER_PORT = 4555
+IMPOSTER = {
+    "port": IMPOSTER_PORT,
+    "protocol": "https",
+    "numberOfRequests": 2,
+    "recordRequests": True,
+    "stubs": [{"responses": [{"is": {"statusCode": 201}}]}],
+}
+RECORDED_REQUESTS = [
+    {"method": "POST", "path": "/foo", "body": '{"it": "works"}'},
+    {"method": "GET", "path": "/bar", "body": ""},
+]
+
+
+@pytest.fixture
+def mountebank():
+    return Mountebank(url=MOUNTEBANK_URL)
+
+
+def register_imposter_with_requests(number_of_requests=2):
+    httpretty.register_uri(
+        httpretty.GET,
+        f"{MOUNTEBANK_URL}/imposters",
+        status=HTTPStatus.OK,
+        body=json.dumps(
+            {"imposters": [dict(IMPOSTER, numberOfRequests=number_of_requests)]}
+        ),
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}",
+        status=HTTPStatus.OK,
+        responses=[
+            httpretty.Response(
+                body=json.dumps(dict(IMPOSTER, requests=RECORDED_REQUESTS))
+            ),
+            httpretty.Response(body=json.dumps(dict(IMPOSTER, requests=[]))),
+        ],
+    )
+    httpretty.register_uri(
+        httpretty.DELETE,
+        f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}/savedRequests",
+        status=HTTPStatus.OK,
+        body=json.dumps(dict(IMPOSTER, requests=[])),
+    )
+
+
+@httpretty.activate
+class TestRequestDrainer:
+    @pytest.mark.parametrize("file_name", ["requests.ndjson", "requests.ndjson.gz"])
+    def test_drain(self, mountebank, tmp_path, file_name):
+        register_imposter_with_requests()
+        path = str(tmp_path / file_name)
+        drainer = mountebank.request_drainer(IMPOSTER_PORT, path)
+        assert drainer.drain() == 2
+        assert drainer.drain() == 0
+        assert [request.path for request in httpretty.latest_requests()] == [
+            f"/imposters/{IMPOSTER_PORT}",
+            "/imposters",
+            f"/imposters/{IMPOSTER_PORT}/savedRequests",
+            f"/imposters/{IMPOSTER_PORT}",
+        ]
+        assert drainer.lost == 0
+        drained = list(read_drained_requests(path))
+        assert [request.path for request in drained] == ["/foo", "/bar"]
+        assert drained[0].body == {"it": "works"}
+
+    def test_drain_in_background(self, mountebank, tmp_path):
+        register_imposter_with_requests()
+        path = str(tmp_path / "requests.ndjson")
+        with RequestDrainer(mountebank, IMPOSTER_PORT, path, interval=0.01) as drainer:
+            pass
+        assert drainer.drained == 2
+        assert len(list(read_drained_requests(path))) == 2
+
+    def test_idle_drain_does_not_touch_the_file(self, mountebank, tmp_path):
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}",
+            status=HTTPStatus.OK,
+            body=json.dumps(dict(IMPOSTER, requests=[])),
+        )
+        path = tmp_path / "requests.ndjson.gz"
+        assert mountebank.request_drainer(IMPOSTER_PORT, str(path)).drain() == 0
+        assert not path.exists()
+
+    def test_drain_counts_lost_requests(self, mountebank, tmp_path, caplog):
+        register_imposter_with_requests(number_of_requests=5)
+        drainer = mountebank.request_drainer(
+            IMPOSTER_PORT, str(tmp_path / "requests.ndjson")
+        )
+        assert drainer.drain() == 2
+        assert drainer.lost == 3
+        assert "3 requests recorded by imposter 4555" in caplog.text
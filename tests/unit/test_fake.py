@@ -0,0 +1,128 @@
+import pytest
+import requests
+
+from mounty import Mountebank
+from mounty.errors import Conflict, MissingFields, NotFound
+from mounty.models import Imposter, Stub
+
+
+@pytest.fixture
+def mountebank(fake):
+    return Mountebank(url=fake.url)
+
+
+def http_imposter(**fields):
+    return dict(
+        {
+            "protocol": "http",
+            "recordRequests": True,
+            "stubs": [
+                {
+                    "predicates": [{"equals": {"method": "POST", "path": "/foo"}}],
+                    "responses": [
+                        {"is": {"statusCode": 201, "body": {"it": "works"}}},
+                        {"is": {"statusCode": 202}},
+                    ],
+                }
+            ],
+        },
+        **fields,
+    )
+
+
+def test_add_imposter_serves_is_responses(mountebank):
+    imposter = mountebank.add_imposter(http_imposter())
+    url = f"http://127.0.0.1:{imposter.port}"
+
+    first = requests.post(f"{url}/foo", json={"a": 1})
+    second = requests.post(f"{url}/foo")
+    third = requests.post(f"{url}/foo")
+    unmatched = requests.get(f"{url}/bar", params={"q": "1"})
+
+    assert (first.status_code, first.json()) == (201, {"it": "works"})
+    assert [second.status_code, third.status_code] == [202, 201]
+    assert (unmatched.status_code, unmatched.text) == (200, "")
+    recorded = mountebank.get_imposter(imposter.port)
+    assert recorded.numberOfRequests == 4
+    assert recorded.requests[0].body == {"a": 1}
+    assert recorded.requests[3].query == {"q": "1"}
+
+
+def test_wait_for_requests(mountebank):
+    imposter = mountebank.add_imposter(http_imposter())
+    requests.post(f"http://127.0.0.1:{imposter.port}/foo")
+
+    assert len(mountebank.wait_for_requests(imposter.port, timeout=1)) == 1
+
+
+def test_requests_are_not_recorded_unless_asked(mountebank):
+    imposter = mountebank.add_imposter(http_imposter(recordRequests=False))
+    requests.post(f"http://127.0.0.1:{imposter.port}/foo")
+
+    assert mountebank.get_imposter(imposter.port).requests == []
+    assert mountebank.get_request_counts() == {imposter.port: 1}
+
+
+def test_delete_requests_from_imposter(mountebank):
+    imposter = mountebank.add_imposter(http_imposter())
+    requests.post(f"http://127.0.0.1:{imposter.port}/foo")
+
+    response = mountebank.delete_requests_from_imposter(imposter.port)
+
+    assert response.requests == []
+    assert list(mountebank.iter_requests(imposter.port)) == []
+
+
+def test_stub_operations(mountebank):
+    imposter = mountebank.add_imposter(
+        Imposter(port=0, protocol="tcp", stubs=[Stub(responses=[{"is": {}}])])
+    )
+    mountebank.add_stub({"responses": [{"is": {"data": "first"}}]}, imposter.port, 0)
+    mountebank.replace_stub({"responses": [{"is": {"data": "last"}}]}, imposter.port, 1)
+    stubs = mountebank.get_imposter(imposter.port).stubs
+    assert [stub["responses"][0]["is"] for stub in stubs] == [
+        {"data": "first"},
+        {"data": "last"},
+    ]
+
+    response = mountebank.delete_stub(imposter.port, 0)
+
+    assert len(response.stubs) == 1
+    assert "_links" in response.stubs[0]
+    with pytest.raises(NotFound):
+        mountebank.delete_stub(imposter.port, 1)
+
+
+def test_overwrite_and_delete_imposters(mountebank):
+    imposters = mountebank.overwrite_imposters(
+        http_imposter(name="svc"), {"protocol": "smtp", "port": 0}
+    )
+
+    assert [imposter.protocol for imposter in imposters] == ["http", "smtp"]
+    assert mountebank.get_imposters()[0].name == "svc"
+    deleted = mountebank.delete_all_imposters()
+    assert len(deleted) == 2
+    assert mountebank.get_imposters() == []
+    assert mountebank.delete_imposter(deleted[0].port) is None
+
+
+def test_errors(mountebank):
+    imposter = mountebank.add_imposter(http_imposter())
+
+    with pytest.raises(Conflict):
+        mountebank.add_imposter(http_imposter(port=imposter.port))
+    with pytest.raises(MissingFields):
+        mountebank.add_imposter({"port": 4545})
+    with pytest.raises(MissingFields):
+        mountebank.add_imposter({"protocol": "gopher"})
+    with pytest.raises(NotFound):
+        mountebank.get_imposter(imposter.port + 1)
+
+
+def test_stop_closes_imposters(fake, mountebank):
+    imposter = mountebank.add_imposter(http_imposter())
+
+    fake.stop()
+
+    with pytest.raises(requests.ConnectionError):
+        requests.get(f"http://127.0.0.1:{imposter.port}/foo", timeout=1)
@@ -0,0 +1,88 @@
+import pytest
+
+from mounty import Mountebank
+from mounty.errors import NotFound
+from mounty.instrumentation import (
+    PARSE_SECONDS,
+    POLL_ITERATIONS,
+    REQUEST_BYTES,
+    REQUEST_SECONDS,
+    RESPONSE_BYTES,
+    HistogramSink,
+    Instrumentation,
+    PrometheusSink,
+    operation_name,
+)
+
+IMPOSTER = {"protocol": "tcp", "port": 0, "recordRequests": True}
+
+
+@pytest.mark.parametrize(
+    "method, url, expected",
+    [
+        ("GET", "http://localhost:2525/imposters", "GET /imposters"),
+        ("GET", "http://localhost:2525/imposters/4545?x=1", "GET /imposters/{port}"),
+        ("PUT", "/mb/imposters/4545/stubs/3", "PUT /imposters/{port}/stubs/{index}"),
+    ],
+)
+def test_operation(method, url, expected):
+    assert operation_name(method, url) == expected
+
+
+def test_histogram_sink():
+    sink = HistogramSink()
+    instrumentation = Instrumentation(sink)
+
+    for value in (0.002, 0.02, 3):
+        instrumentation.record(REQUEST_SECONDS, value, operation="GET /imposters")
+
+    histogram = sink.get(REQUEST_SECONDS, operation="GET /imposters")
+    assert (histogram.count, histogram.sum) == (3, 3.022)
+    cumulative = dict(histogram.cumulative())
+    assert (cumulative[0.005], cumulative[0.025], cumulative[5.0]) == (1, 2, 3)
+    assert sink.get(REQUEST_SECONDS, operation="GET /imposters/{port}") is None
+
+
+def test_prometheus_sink():
+    sink = PrometheusSink()
+    Instrumentation(sink).record(RESPONSE_BYTES, 500, operation='GET "x"')
+
+    text = sink.render()
+
+    assert "# TYPE mounty_response_bytes histogram\n" in text
+    assert (
+        'mounty_response_bytes_bucket{operation="GET \\"x\\"",le="100.0"} 0\n' in text
+    )
+    assert 'mounty_response_bytes_bucket{operation="GET \\"x\\"",le="+Inf"} 1\n' in text
+    assert 'mounty_response_bytes_count{operation="GET \\"x\\""} 1\n' in text
+
+
+def test_mountebank_records_calls(fake):
+    events = []
+    sink = HistogramSink()
+    instrumentation = Instrumentation(sink, lambda *event: events.append(event))
+    mountebank = Mountebank(url=fake.url, instrumentation=instrumentation)
+
+    port = mountebank.add_imposter(IMPOSTER).port
+    with pytest.raises(NotFound):
+        mountebank.get_imposter(port + 1)
+
+    add = sink.get(REQUEST_SECONDS, operation="POST /imposters", status="201")
+    assert add.count == 1
+    assert sink.get(REQUEST_BYTES, operation="POST /imposters").sum > 0
+    assert sink.get(RESPONSE_BYTES, operation="POST /imposters").sum > 0
+    assert sink.get(PARSE_SECONDS, operation="POST /imposters").count == 1
+    missing = sink.get(REQUEST_SECONDS, operation="GET /imposters/{port}", status="404")
+    assert missing.count == 1
+    assert {metric for metric, _, _ in events} >= {REQUEST_SECONDS, PARSE_SECONDS}
+
+
+def test_wait_records_poll_iterations(fake):
+    sink = HistogramSink()
+    mountebank = Mountebank(url=fake.url, instrumentation=Instrumentation(sink))
+    port = mountebank.add_imposter(IMPOSTER).port
+    fake.record_requests(port, [{"method": "GET", "path": "/", "body": ""}])
+
+    mountebank.wait_for_requests(port, count=1)
+
+    assert sink.get(POLL_ITERATIONS, condition="all").sum == 1
@@ -0,0 +1,168 @@
+import json
+
+import httpretty
+import pytest
+
+from http import HTTPStatus
+from mounty import Mountebank
+from mounty.errors import Error, ValidationError
+from mounty.mirror import ImposterMirror, SyncOperation
+from mounty.models import Imposter, Stub
+
+
+MOUNTEBANK_URL = "https://mountebank.ca"
+IMPOSTER_PORT = 4555
+
+
+def stub(status_code):
+    return {"responses": [{"is": {"statusCode": status_code}}]}
+
+
+def imposter(*status_codes, port=IMPOSTER_PORT, **fields):
+    return dict(
+        {
+            "port": port,
+            "protocol": "http",
+            "stubs": [stub(status_code) for status_code in status_codes],
+        },
+        **fields,
+    )
+
+
+@pytest.fixture
+def mirror():
+    mirror = ImposterMirror()
+    mirror.update(
+        dict(
+            imposter(200, 201, 202, 203),
+            numberOfRequests=3,
+            recordRequests=False,
+            _links={"self": {"href": "/imposters/4555"}},
+        )
+    )
+    return mirror
+
+
+def test_diff_without_changes(mirror):
+    desired = Imposter(
+        port=IMPOSTER_PORT,
+        protocol="http",
+        stubs=[
+            Stub(responses=stub(status_code)["responses"])
+            for status_code in (200, 201, 202, 203)
+        ],
+    )
+    assert mirror.diff([desired]) == []
+
+
+def test_diff_replaces_and_appends_stubs(mirror):
+    assert mirror.diff([imposter(200, 500, 202, 203, 204)]) == [
+        SyncOperation("replace_stub", IMPOSTER_PORT, 1, stub(500)),
+        SyncOperation("add_stub", IMPOSTER_PORT, 4, stub(204)),
+    ]
+
+
+def test_diff_deletes_stubs(mirror):
+    assert mirror.diff([imposter(200, 203)]) == [
+        SyncOperation("delete_stub", IMPOSTER_PORT, 1),
+        SyncOperation("delete_stub", IMPOSTER_PORT, 1),
+    ]
+
+
+def test_diff_inserts_stubs(mirror):
+    assert mirror.diff([imposter(100, 200, 201, 202, 203)]) == [
+        SyncOperation("add_stub", IMPOSTER_PORT, 0, stub(100)),
+    ]
+
+
+def test_diff_recreates_imposters_with_other_settings(mirror):
+    desired = imposter(200, 201, 202, 203, recordRequests=True)
+    operations = mirror.diff([desired, imposter(200, port=4556)])
+    assert [(operation.action, operation.port) for operation in operations] == [
+        ("delete", IMPOSTER_PORT),
+        ("create", IMPOSTER_PORT),
+        ("create", 4556),
+    ]
+
+
+def test_diff_deletes_missing_imposters(mirror):
+    assert mirror.diff([]) == [SyncOperation("delete", IMPOSTER_PORT)]
+
+
+def test_sync_requires_mirror():
+    with pytest.raises(Error):
+        Mountebank(url=MOUNTEBANK_URL).sync(imposter(200))
+
+
+@httpretty.activate
+def test_sync_sends_stub_changes_only():
+    httpretty.register_uri(
+        httpretty.POST,
+        f"{MOUNTEBANK_URL}/imposters",
+        status=HTTPStatus.CREATED,
+        body=json.dumps(imposter(200, 201)),
+    )
+    httpretty.register_uri(
+        httpretty.PUT,
+        f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}/stubs/1",
+        status=HTTPStatus.OK,
+        body=json.dumps(imposter(200, 500)),
+    )
+    mountebank = Mountebank(url=MOUNTEBANK_URL, mirror=True)
+    mountebank.add_imposter(imposter(200, 201))
+
+    operations = mountebank.sync(imposter(200, 500))
+
+    assert operations == [SyncOperation("replace_stub", IMPOSTER_PORT, 1, stub(500))]
+    assert httpretty.last_request().parsed_body == stub(500)
+    assert mountebank.mirror.get(IMPOSTER_PORT)["stubs"] == [stub(200), stub(500)]
+    assert mountebank.sync(imposter(200, 500)) == []
+
+
+def test_sync_keeps_settings_missing_from_responses(fake):
+    mountebank = Mountebank(url=fake.url, mirror=True)
+    imposters = [
+        imposter(
+            200,
+            port=5101,
+            defaultResponse={"statusCode": 404, "body": "not found"},
+        ),
+        {
+            "port": 5102,
+            "protocol": "tcp",
+            "mode": "binary",
+            "stubs": [{"responses": [{"is": {"data": "AQI="}}]}],
+        },
+    ]
+    assert [operation.action for operation in mountebank.sync(*imposters)] == [
+        "create",
+        "create",
+    ]
+
+    assert mountebank.sync(*imposters) == []
+
+    mountebank.sync(imposters[0], dict(imposters[1], stubs=[]))
+    assert mountebank.mirror.get(5102)["mode"] == "binary"
+    assert mountebank.sync(imposters[0], dict(imposters[1], stubs=[])) == []
+
+
+def test_sync_requires_explicit_ports(fake):
+    mountebank = Mountebank(url=fake.url, mirror=True)
+
+    with pytest.raises(ValidationError, match="explicit port"):
+        mountebank.sync(imposter(200), Imposter(port=None, protocol="tcp", stubs=[]))
+
+    assert mountebank.get_imposters() == []
+
+
+def test_overwrite_imposters_mirrors_the_assigned_ports(fake):
+    mountebank = Mountebank(url=fake.url, mirror=True)
+
+    created = mountebank.overwrite_imposters(
+        {"protocol": "tcp", "mode": "binary"}, imposter(200, port=5103)
+    )
+
+    port = next(item.port for item in created if item.port != 5103)
+    assert mountebank.mirror.get(port)["mode"] == "binary"
+    assert mountebank.mirror.get(5103) == imposter(200, port=5103)
+    assert mountebank.sync(imposter(200, port=5103)) == [SyncOperation("delete", port)]
@@ -1,6 +1,14 @@
 import json
 
-from mounty.models import Imposter, Stub, DataclassJSONEncoder
+import pytest
+
+from mounty.models import (
+    DataclassJSONEncoder,
+    Imposter,
+    ImposterResponse,
+    RecordedRequest,
+    Stub,
+)
 
 
 def test_imposter():
@@ -27,3 +35,48 @@ def test_imposter_with_json_stubs():
         == '{"port": 4555, "protocol": "https", "stubs": [{"responses": [{"is": '
         '{"statusCode": 400}}]}], "recordRequests": false, "name": ""}'
     )
+
+
+def test_recorded_request_json_body_is_decoded_lazily():
+    recorded_request = RecordedRequest(method="POST", path="/", body='{"it": "works"}')
+    assert recorded_request.raw_body == '{"it": "works"}'
+    assert recorded_request.body == {"it": "works"}
+    assert recorded_request.json() is recorded_request.body
+
+
+def test_recorded_request_text_body():
+    recorded_request = RecordedRequest(method="POST", path="/", body="plain text")
+    assert recorded_request.body == "plain text"
+    with pytest.raises(ValueError):
+        recorded_request.json()
+
+
+def test_recorded_request_binary_body_is_not_copied():
+    body = memoryview(b"\x00\x01")
+    recorded_request = RecordedRequest(method="POST", path="/", body=body)
+    assert recorded_request.body is body
+    assert recorded_request.raw_body is body
+
+
+def test_models_have_no_instance_dict():
+    recorded_request = RecordedRequest(method="GET", path="/", body="")
+    assert not hasattr(recorded_request, "__dict__")
+    assert not hasattr(
+        ImposterResponse(port=4555, protocol="http", stubs=[]), "__dict__"
+    )
+
+
+def test_imposter_response_from_dict_ignores_unknown_fields():
+    imposter = ImposterResponse.from_dict(
+        {
+            "port": 4555,
+            "protocol": "http",
+            "numberOfRequests": 1,
+            "defaultResponse": {"statusCode": 404},
+            "requests": [
+                {"method": "GET", "path": "/", "body": "", "form": {"a": "b"}}
+            ],
+        }
+    )
+    assert imposter.stubs == []
+    assert imposter.requests == [RecordedRequest(method="GET", path="/", body="")]
@@ -1,10 +1,12 @@
 import json
+import time
 import httpretty
 import pytest
 
 from http import HTTPStatus
-from mounty.models import Stub, Imposter, ImposterResponse
-from mounty.errors import MissingFields, NotFound
+from mounty.models import Stub, Imposter, ImposterResponse, RecordedRequest
+from mounty.errors import Conflict, MissingFields, NotFound
+from mounty.polling import Backoff
 from mounty import Mountebank
 
 
@@ -25,6 +27,12 @@ SIMPLE_IMPOSTER_STUB.update(
 )
 
 
+def imposters_summary(**fields):
+    return json.dumps(
+        {"imposters": [dict({"protocol": "https", "port": IMPOSTER_PORT}, **fields)]}
+    )
+
+
 @pytest.fixture
 def mock_env_variables(monkeypatch):
     monkeypatch.setenv("MOUNTEBANK_URL", MOUNTEBANK_URL)
@@ -87,11 +95,36 @@ class TestMountebankAdmin:
         assert err.value.code == "bad data"
         assert err.value.message == "unrecognized response type"
 
+    def test_add_imposters(self, monkeypatch):
+        # httpretty is not thread safe, the parallel calls are faked instead
+        def add_imposter(imposter, port_range=None):
+            time.sleep((4560 - imposter["port"]) / 1000)
+            if imposter["port"] == 4556:
+                raise Conflict("resource conflict", "in use")
+            return ImposterResponse(**dict(SIMPLE_IMPOSTER_STUB, port=imposter["port"]))
+
+        mountebank = Mountebank(url=MOUNTEBANK_URL)
+        monkeypatch.setattr(mountebank, "add_imposter", add_imposter)
+        imposters = mountebank.add_imposters(
+            *(dict(SIMPLE_IMPOSTER, port=port) for port in range(4555, 4560)),
+            max_workers=3,
+        )
+        assert [type(imposter) for imposter in imposters] == [
+            ImposterResponse,
+            Conflict,
+            ImposterResponse,
+            ImposterResponse,
+            ImposterResponse,
+        ]
+        assert [
+            imposter.port for imposter in imposters if type(imposter) != Conflict
+        ] == [4555, 4557, 4558, 4559]
+
     def test_wait_for_requests(self, mountebank):
         imposter_requests_stub = SIMPLE_IMPOSTER.copy()
         imposter_requests_stub.update(
             {
-                "numberOfRequests": 1,
+                "numberOfRequests": 2,
                 "recordRequests": True,
                 "requests": [
                     {"method": "POST", "path": "/foo", "body": '{"it": "works"}'},
@@ -102,20 +135,68 @@ class TestMountebankAdmin:
 
         httpretty.register_uri(
             httpretty.GET,
-            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}",
+            f"{MOUNTEBANK_URL}/imposters",
             status=HTTPStatus.OK,
             responses=[
-                httpretty.Response(body=json.dumps(SIMPLE_IMPOSTER_STUB)),
-                httpretty.Response(body=json.dumps(imposter_requests_stub)),
+                httpretty.Response(body=imposters_summary(numberOfRequests=0)),
+                httpretty.Response(body=imposters_summary(numberOfRequests=2)),
             ],
         )
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}",
+            status=HTTPStatus.OK,
+            body=json.dumps(imposter_requests_stub),
+        )
 
-        reqs = mountebank.wait_for_requests(IMPOSTER_PORT, count=2)
+        reqs = mountebank.wait_for_requests(
+            IMPOSTER_PORT, count=2, backoff=Backoff(initial=0.01)
+        )
         assert len(reqs) == 2
-        assert len(httpretty.latest_requests()) == 2
+        assert [request.path for request in httpretty.latest_requests()] == [
+            "/imposters",
+            "/imposters",
+            f"/imposters/{IMPOSTER_PORT}",
+        ]
         assert reqs[0].body == {"it": "works"}
         assert reqs[1].body == {"it": "works again"}
 
+    def test_wait_for_requests_timeout(self, mountebank):
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters",
+            status=HTTPStatus.OK,
+            body=imposters_summary(numberOfRequests=0),
+        )
+        with pytest.raises(TimeoutError):
+            mountebank.wait_for_requests(IMPOSTER_PORT, count=1, timeout=0.1)
+
+    def test_request_cursor_only_returns_new_requests(self, mountebank):
+        first = {"method": "GET", "path": "/first", "body": ""}
+        second = {"method": "GET", "path": "/second", "body": ""}
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}",
+            status=HTTPStatus.OK,
+            responses=[
+                httpretty.Response(
+                    body=json.dumps(dict(SIMPLE_IMPOSTER_STUB, requests=[first]))
+                ),
+                httpretty.Response(
+                    body=json.dumps(
+                        dict(SIMPLE_IMPOSTER_STUB, requests=[first, second])
+                    )
+                ),
+                httpretty.Response(body=json.dumps(SIMPLE_IMPOSTER_STUB)),
+            ],
+        )
+        cursor = mountebank.request_cursor(IMPOSTER_PORT)
+        assert [request.path for request in cursor.fetch()] == ["/first"]
+        assert [request.path for request in cursor.fetch()] == ["/second"]
+        assert cursor.position == 2
+        assert cursor.fetch() == []
+        assert cursor.position == 0
+
     def test_get_imposter(self, mountebank):
         httpretty.register_uri(
             httpretty.GET,
@@ -140,6 +221,18 @@ class TestMountebankAdmin:
         assert imposters[0] == ImposterResponse(**SIMPLE_IMPOSTER_STUB)
         assert imposters[1] == ImposterResponse(**_SIMPLE_IMPOSTER_STUB)
 
+    def test_get_imposters_list_view(self, mountebank):
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters",
+            status=HTTPStatus.OK,
+            body=imposters_summary(numberOfRequests=3),
+        )
+        imposters = mountebank.get_imposters()
+        assert [
+            (imposter.port, imposter.numberOfRequests) for imposter in imposters
+        ] == [(IMPOSTER_PORT, 3)]
+
     def test_delete_imposter(self, mountebank):
         httpretty.register_uri(
             httpretty.DELETE,
@@ -236,3 +329,172 @@ class TestMountebankAdmin:
             ImposterResponse(**SIMPLE_IMPOSTER_STUB),
             ImposterResponse(**SIMPLE_IMPOSTER_STUB),
         ]
+        assert httpretty.last_request().parsed_body == {
+            "imposters": [SIMPLE_IMPOSTER, dict(SIMPLE_IMPOSTER, recordRequests=False)]
+        }
+
+    def test_wait_for_all(self, mountebank):
+        other_port = 4556
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters",
+            status=HTTPStatus.OK,
+            responses=[
+                httpretty.Response(
+                    body=json.dumps(
+                        {
+                            "imposters": [
+                                {"port": IMPOSTER_PORT, "numberOfRequests": 1},
+                                {"port": other_port, "numberOfRequests": 0},
+                            ]
+                        }
+                    )
+                ),
+                httpretty.Response(
+                    body=json.dumps(
+                        {
+                            "imposters": [
+                                {"port": IMPOSTER_PORT, "numberOfRequests": 1},
+                                {"port": other_port, "numberOfRequests": 2},
+                            ]
+                        }
+                    )
+                ),
+            ],
+        )
+        recorded = {"method": "POST", "path": "/foo", "body": ""}
+        for port, count in ((IMPOSTER_PORT, 1), (other_port, 2)):
+            httpretty.register_uri(
+                httpretty.GET,
+                f"{MOUNTEBANK_URL}/imposters/{port}",
+                status=HTTPStatus.OK,
+                body=json.dumps(
+                    dict(SIMPLE_IMPOSTER_STUB, port=port, requests=[recorded] * count)
+                ),
+            )
+
+        reqs = mountebank.wait_for_all(
+            {IMPOSTER_PORT: 1, other_port: 2}, backoff=Backoff(initial=0.01)
+        )
+        assert {port: len(requests) for port, requests in reqs.items()} == {
+            IMPOSTER_PORT: 1,
+            other_port: 2,
+        }
+        assert [request.path for request in httpretty.latest_requests()] == [
+            "/imposters",
+            f"/imposters/{IMPOSTER_PORT}",
+            "/imposters",
+            f"/imposters/{other_port}",
+        ]
+
+    def test_wait_for_any_with_predicate(self, mountebank):
+        other_port = 4556
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters",
+            status=HTTPStatus.OK,
+            body=json.dumps(
+                {
+                    "imposters": [
+                        {"port": IMPOSTER_PORT, "numberOfRequests": 0},
+                        {"port": other_port, "numberOfRequests": 2},
+                    ]
+                }
+            ),
+        )
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters/{other_port}",
+            status=HTTPStatus.OK,
+            body=json.dumps(
+                dict(
+                    SIMPLE_IMPOSTER_STUB,
+                    port=other_port,
+                    requests=[
+                        {"method": "GET", "path": "/health", "body": ""},
+                        {"method": "POST", "path": "/orders", "body": ""},
+                    ],
+                )
+            ),
+        )
+
+        reqs = mountebank.wait_for_any(
+            {IMPOSTER_PORT: 1, other_port: 1},
+            predicates={other_port: lambda request: request.method == "POST"},
+        )
+        assert list(reqs) == [other_port]
+        assert [request.path for request in reqs[other_port]] == ["/orders"]
+
+    def test_iter_requests(self, mountebank):
+        recorded = [
+            {"method": "POST", "path": f"/foo/{index}", "body": '{"it": "works"}'}
+            for index in range(100)
+        ]
+        httpretty.register_uri(
+            httpretty.GET,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}",
+            status=HTTPStatus.OK,
+            body=json.dumps(dict(SIMPLE_IMPOSTER_STUB, requests=recorded)),
+        )
+        reqs = mountebank.iter_requests(IMPOSTER_PORT)
+        first = next(reqs)
+        assert type(first) == RecordedRequest
+        assert first.body == {"it": "works"}
+        assert [request.path for request in reqs] == [
+            f"/foo/{index}" for index in range(1, 100)
+        ]
+
+    def test_add_stub(self, mountebank):
+        httpretty.register_uri(
+            httpretty.POST,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}/stubs",
+            status=HTTPStatus.OK,
+            body=json.dumps(SIMPLE_IMPOSTER_STUB),
+        )
+        imposter = mountebank.add_stub(
+            Stub(responses=[{"is": {"statusCode": 200}}]), port=IMPOSTER_PORT, index=0
+        )
+        assert imposter == ImposterResponse(**SIMPLE_IMPOSTER_STUB)
+        assert httpretty.last_request().parsed_body == {
+            "index": 0,
+            "stub": {"responses": [{"is": {"statusCode": 200}}], "predicates": []},
+        }
+
+    def test_append_stub(self, mountebank):
+        httpretty.register_uri(
+            httpretty.POST,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}/stubs",
+            status=HTTPStatus.OK,
+            body=json.dumps(SIMPLE_IMPOSTER_STUB),
+        )
+        mountebank.add_stub({"responses": []}, port=IMPOSTER_PORT)
+        assert httpretty.last_request().parsed_body == {"stub": {"responses": []}}
+
+    def test_replace_stub(self, mountebank):
+        httpretty.register_uri(
+            httpretty.PUT,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}/stubs/1",
+            status=HTTPStatus.OK,
+            body=json.dumps(SIMPLE_IMPOSTER_STUB),
+        )
+        mountebank.replace_stub({"responses": []}, port=IMPOSTER_PORT, index=1)
+        assert httpretty.last_request().parsed_body == {"responses": []}
+
+    def test_delete_missing_stub(self, mountebank):
+        httpretty.register_uri(
+            httpretty.DELETE,
+            f"{MOUNTEBANK_URL}/imposters/{IMPOSTER_PORT}/stubs/3",
+            status=HTTPStatus.NOT_FOUND,
+            body=json.dumps(
+                {
+                    "errors": [
+                        {
+                            "code": "no such resource",
+                            "message": "stub index 3 does not exist",
+                        }
+                    ]
+                }
+            ),
+        )
+        with pytest.raises(NotFound):
+            mountebank.delete_stub(port=IMPOSTER_PORT, index=3)
@@ -0,0 +1,100 @@
+import os
+import threading
+
+import pytest
+
+from mounty import Mountebank
+from mounty.models import Imposter
+from mounty.ports import NoFreePort, PortAllocator
+
+PORTS = range(5000, 5004)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "ports")
+
+
+@pytest.fixture
+def mountebank(fake, path):
+    mountebank = Mountebank(url=fake.url)
+    mountebank.port_allocator = PortAllocator(mountebank, path)
+    return mountebank
+
+
+def reservations(path):
+    with open(path, encoding="utf-8") as file:
+        return [line.split() for line in file]
+
+
+def test_allocate_skips_used_and_reserved_ports(mountebank, path):
+    mountebank.add_imposter({"protocol": "tcp", "port": 5000})
+    other_process = PortAllocator(Mountebank(url=mountebank.url), path)
+
+    assert other_process.allocate(PORTS) == 5001
+    assert mountebank.port_allocator.allocate(PORTS) == 5002
+    assert reservations(path) == [
+        ["5001", str(os.getpid())],
+        ["5002", str(os.getpid())],
+    ]
+
+
+def test_dead_process_reservations_are_reclaimed(mountebank, path):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("5000 999999999\n")
+
+    assert mountebank.port_allocator.allocate(PORTS) == 5000
+
+
+def test_add_imposter_from_port_range(mountebank, path):
+    first = mountebank.add_imposter({"protocol": "tcp"}, port_range=PORTS)
+    # created behind the allocator's back, found through a Conflict
+    mountebank.add_imposter({"protocol": "tcp", "port": 5001})
+    second = mountebank.add_imposter(
+        Imposter(port=None, protocol="tcp", stubs=[]), port_range=PORTS
+    )
+
+    assert (first.port, second.port) == (5000, 5002)
+    assert [port for port, _ in reservations(path)] == ["5000", "5002"]
+    mountebank.delete_imposter(5000)
+    assert [port for port, _ in reservations(path)] == ["5002"]
+    mountebank.delete_all_imposters()
+    assert reservations(path) == []
+
+
+def test_no_free_port(mountebank):
+    mountebank.add_imposters(
+        *({"protocol": "tcp"} for _ in PORTS), port_range=PORTS, max_workers=2
+    )
+
+    with pytest.raises(NoFreePort):
+        mountebank.add_imposter({"protocol": "tcp"}, port_range=PORTS)
+
+
+def test_add_imposter_without_port(mountebank):
+    imposter = mountebank.add_imposter(Imposter(port=None, protocol="http", stubs=[]))
+
+    assert imposter.port > 0
+
+
+def test_threads_share_an_allocator(mountebank, path):
+    allocator = mountebank.port_allocator
+    errors = []
+
+    def churn():
+        try:
+            for _ in range(20):
+                allocator.release(allocator.allocate(range(5000, 5100)))
+                allocator.mark_in_use(5099)
+                allocator.release_all()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=churn) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert reservations(path) == []
@@ -0,0 +1,41 @@
+import pytest
+
+from mounty.predicates import evaluate
+
+REQUEST = {
+    "method": "POST",
+    "path": "/Users/42",
+    "query": {"tag": ["a", "b"]},
+    "headers": {"Content-Type": "application/json"},
+    "body": '{"name": "Ada", "roles": ["admin"]}',
+}
+
+
+@pytest.mark.parametrize(
+    "predicate, expected",
+    [
+        ({"equals": {"method": "post", "path": "/users/42"}}, True),
+        ({"equals": {"path": "/users/42"}, "caseSensitive": True}, False),
+        ({"equals": {"query": {"tag": "b"}}}, True),
+        ({"equals": {"headers": {"content-type": "application/json"}}}, True),
+        ({"equals": {"body": {"name": "ada"}}}, True),
+        ({"deepEquals": {"body": {"name": "Ada"}}}, False),
+        ({"deepEquals": {"query": {"tag": ["a", "b"]}}}, True),
+        ({"contains": {"body": "roles"}}, True),
+        ({"startsWith": {"path": "/users"}}, True),
+        ({"endsWith": {"path": "42"}}, True),
+        ({"matches": {"path": "^/users/\\d+$"}}, True),
+        ({"exists": {"query": {"tag": True, "page": False}}}, True),
+        ({"exists": {"body": {"email": True}}}, False),
+        ({"not": {"equals": {"method": "GET"}}}, True),
+        ({"or": [{"equals": {"method": "GET"}}, {"equals": {"method": "POST"}}]}, True),
+        ({"and": [{"equals": {"method": "POST"}}, {"equals": {"path": "/"}}]}, False),
+    ],
+)
+def test_evaluate(predicate, expected):
+    assert evaluate(predicate, REQUEST) is expected
+
+
+def test_unsupported_operator():
+    with pytest.raises(ValueError):
+        evaluate({"inject": "function () {}"}, REQUEST)
@@ -0,0 +1,81 @@
+import requests
+
+from mounty import Mountebank
+from mounty.profiler import count_hits, reorder, reorder_stubs
+
+
+def stub(*predicates, status=200):
+    return {
+        "predicates": list(predicates),
+        "responses": [{"is": {"statusCode": status}}],
+    }
+
+
+def equals(**fields):
+    return {"equals": fields}
+
+
+def test_reorder_only_moves_disjoint_stubs():
+    stubs = [
+        stub(equals(path="/rare")),
+        stub(equals(path="/warm")),
+        stub(equals(method="GET")),
+        stub(equals(path="/hot")),
+        stub(),
+    ]
+
+    # /hot may overlap with GET, and nothing overtakes the catch all stub
+    assert reorder(stubs, [1, 5, 0, 10, 100]) == [1, 0, 2, 3, 4]
+    assert reorder(stubs, [5, 1, 0, 10, 100]) == [0, 1, 2, 3, 4]
+    assert reorder(stubs[:2] + stubs[3:4], [1, 5, 10]) == [2, 1, 0]
+
+
+def test_unknown_predicates_are_never_reordered():
+    stubs = [
+        stub({"matches": {"path": "^/a"}}),
+        stub({"and": [equals(path="/b")]}),
+        stub({"inject": "function (config) { return true; }"}),
+        stub(equals(path="/c")),
+    ]
+
+    assert reorder(stubs, [0, 10, 0, 20]) == [0, 1, 2, 3]
+
+
+def test_count_hits_from_debug_matches():
+    stubs = [dict(stub(), matches=[{}, {}]), stub(equals(path="/b"))]
+
+    profile = count_hits(stubs, [])
+
+    assert profile.hits == [2, 0]
+    assert "matches" not in profile.stubs[0]
+
+
+def test_count_hits_by_replaying_requests():
+    stubs = [stub(equals(path="/a")), stub({"inject": "..."}), stub(equals(path="/b"))]
+    recorded = [{"method": "GET", "path": path} for path in ("/a", "/b", "/a")]
+
+    profile = count_hits(stubs, recorded)
+
+    assert (profile.hits, profile.unknown) == ([2, 0, 0], 1)
+
+
+def test_reorder_stubs(fake):
+    mountebank = Mountebank(url=fake.url)
+    stubs = [stub(equals(path=f"/{i}"), status=200 + i) for i in range(5)]
+    port = mountebank.add_imposter(
+        {"protocol": "http", "recordRequests": True, "stubs": stubs}
+    ).port
+    for path in ("/4", "/4", "/4", "/2", "/0"):
+        requests.get(f"http://127.0.0.1:{port}{path}")
+
+    profile = reorder_stubs(mountebank, port)
+
+    assert profile.order == [4, 0, 2, 1, 3]
+    assert (profile.cost, profile.reordered_cost) == (3.8, 1.6)
+    paths = [
+        s["predicates"][0]["equals"]["path"]
+        for s in mountebank.get_imposter(port).stubs
+    ]
+    assert paths == ["/4", "/0", "/2", "/1", "/3"]
+    assert requests.get(f"http://127.0.0.1:{port}/4").status_code == 204
+    assert not reorder_stubs(mountebank, port).changed
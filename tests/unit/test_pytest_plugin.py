@@ -0,0 +1,99 @@
+import requests
+
+from mounty.fake import FakeMountebank
+from mounty.mountebank import Mountebank
+from mounty.pytest_plugin import ImposterPool, SessionStats
+
+pytest_plugins = ["pytester"]
+
+TESTS = """
+import requests
+
+ORDERS = {
+    "name": "orders",
+    "protocol": "http",
+    "recordRequests": True,
+    "stubs": [{"responses": [{"is": {"statusCode": 201}}]}],
+}
+
+
+def test_first(mounty_imposters, mounty_mountebank):
+    orders, = mounty_imposters.use(ORDERS)
+    requests.post(f"http://127.0.0.1:{orders.port}/orders")
+    mounty_mountebank.add_stub({"responses": [{"is": {"statusCode": 500}}]}, orders.port, 0)
+    mounty_mountebank.add_imposter({"protocol": "tcp", "port": 6000})
+    assert len(mounty_mountebank.wait_for_requests(orders.port, timeout=1)) == 1
+
+
+def test_second(mounty_imposters, mounty_mountebank):
+    orders, = mounty_imposters.use(ORDERS)
+    assert orders.port in range(7000, 7010)
+    assert sorted(mounty_mountebank.get_request_counts()) == [orders.port]
+    assert mounty_mountebank.get_imposter(orders.port).requests == []
+    assert requests.get(f"http://127.0.0.1:{orders.port}/").status_code == 201
+"""
+
+
+def test_imposters_are_reused_and_reset(pytester, fake):
+    pytester.makeini("[pytest]\nmountebank_port_range = 7000-7009\n")
+    pytester.makepyfile(TESTS)
+
+    result = pytester.runpytest(
+        "-p", "mounty.pytest_plugin", f"--mountebank-url={fake.url}"
+    )
+
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["*2 imposter uses, 1 created, 1 reused*saved*"])
+    assert fake._imposters == {}
+
+
+def test_in_process_fake_by_default(pytester, monkeypatch):
+    monkeypatch.delenv("MOUNTEBANK_URL", raising=False)
+    pytester.makepyfile(
+        """
+        def test_fake(mounty_mountebank, mounty_worker_id):
+            assert mounty_worker_id == "master"
+            assert mounty_mountebank.get_imposters() == []
+        """
+    )
+
+    result = pytester.runpytest("-p", "mounty.pytest_plugin")
+
+    result.assert_outcomes(passed=1)
+    assert "mounty imposters" not in result.stdout.str()
+
+
+def test_reset_keeps_the_requests_of_other_pools(fake):
+    pools = [
+        ImposterPool(Mountebank(url=fake.url, mirror=True), range(0), SessionStats())
+        for _ in range(2)
+    ]
+    for port, pool in zip((7101, 7102), pools):
+        pool.use(
+            {
+                "port": port,
+                "protocol": "http",
+                "recordRequests": True,
+                "stubs": [{"responses": [{"is": {"statusCode": 201}}]}],
+            }
+        )
+        requests.get(f"http://localhost:{port}/orders")
+
+    pools[0].reset()
+
+    assert pools[1].mountebank.get_request_counts() == {7101: 0, 7102: 1}
+
+
+def test_pools_of_workers_with_their_own_fake_share_the_port_range(fake):
+    with FakeMountebank() as other:
+        pools = [
+            ImposterPool(
+                Mountebank(url=url, mirror=True), range(7300, 7310), SessionStats()
+            )
+            for url in (fake.url, other.url)
+        ]
+        ports = [pool.use({"protocol": "tcp"})[0].port for pool in pools]
+        for pool in pools:
+            pool.close()
+
+    assert ports == [7300, 7301]
@@ -0,0 +1,71 @@
+import pytest
+
+from mounty.models import ImposterResponse, RecordedRequest
+from mounty.request_log import RequestLog
+
+
+@pytest.fixture
+def request_log():
+    return RequestLog(
+        [
+            RecordedRequest(
+                method="POST",
+                path="/orders",
+                body='{"order": {"id": 1, "items": 2}}',
+                headers={"Content-Type": "application/json"},
+            ),
+            RecordedRequest(
+                method="GET",
+                path="/orders",
+                body="",
+                query={"status": ["open", "paid"]},
+            ),
+            RecordedRequest(
+                method="post",
+                path="/orders",
+                body='{"order": {"id": 2}}',
+                headers={"content-type": "application/json"},
+            ),
+            RecordedRequest(method="GET", path="/health", body=""),
+        ]
+    )
+
+
+def test_find_by_method_and_path(request_log):
+    found = request_log.find(method="post", path="/orders")
+    assert [request.body["order"]["id"] for request in found] == [1, 2]
+
+
+def test_find_by_header_ignores_header_name_case(request_log):
+    assert request_log.count(headers={"CONTENT-TYPE": "application/json"}) == 2
+
+
+def test_find_by_repeated_query_parameter(request_log):
+    assert request_log.count(query={"status": "paid"}) == 1
+    assert request_log.count(query={"status": "closed"}) == 0
+
+
+def test_find_by_body(request_log):
+    assert request_log.count(body_matches={"order": {"id": 2}}) == 1
+    assert (
+        request_log.count(
+            method="POST", body_matches=lambda body: body["order"].get("items") == 2
+        )
+        == 1
+    )
+
+
+def test_count_without_criteria(request_log):
+    assert request_log.count() == len(request_log) == 4
+
+
+def test_imposter_response_request_log_is_cached():
+    imposter = ImposterResponse.from_dict(
+        {
+            "port": 4555,
+            "protocol": "http",
+            "requests": [{"method": "GET", "path": "/", "body": ""}],
+        }
+    )
+    assert imposter.request_log is imposter.request_log
+    assert imposter.request_log.count(path="/") == 1
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from mounty.models import Imposter, Stub
+from mounty.serialization import JsonCodec, OrjsonCodec, dataclass_fields
+
+
+IMPOSTER = Imposter(
+    port=4555,
+    protocol="http",
+    stubs=[
+        Stub(responses=[{"is": {"statusCode": 201}}]),
+        {"responses": [{"is": {"statusCode": 404}}]},
+    ],
+)
+EXPECTED = {
+    "port": 4555,
+    "protocol": "http",
+    "stubs": [
+        {"responses": [{"is": {"statusCode": 201}}], "predicates": []},
+        {"responses": [{"is": {"statusCode": 404}}]},
+    ],
+    "recordRequests": False,
+}
+
+
+def test_dataclass_fields_skips_empty_strings():
+    assert dataclass_fields(IMPOSTER) == {
+        "port": 4555,
+        "protocol": "http",
+        "stubs": IMPOSTER.stubs,
+        "recordRequests": False,
+    }
+
+
+@pytest.fixture(params=["json", "orjson"])
+def codec(request):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+        return OrjsonCodec()
+    return JsonCodec()
+
+
+def test_codec_encodes_nested_dataclasses(codec):
+    payload = codec.dumps({"imposters": [IMPOSTER]})
+    assert json.loads(payload) == {"imposters": [EXPECTED]}
+    assert codec.loads(payload) == {"imposters": [EXPECTED]}
+
+
+def test_codec_rejects_unknown_objects():
+    with pytest.raises(TypeError):
+        JsonCodec().dumps({"imposter": object()})
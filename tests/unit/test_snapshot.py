@@ -0,0 +1,63 @@
+import gzip
+import json
+
+import httpretty
+
+from mounty import Mountebank
+from mounty.instrumentation import REQUEST_BYTES, HistogramSink, Instrumentation
+
+IMPOSTERS = [
+    {
+        "protocol": "http",
+        "port": 0,
+        "name": "orders",
+        "stubs": [
+            {
+                "predicates": [{"equals": {"path": f"/orders/{i}"}}],
+                "responses": [{"is": {"statusCode": 200, "body": {"id": i}}}],
+            }
+            for i in range(500)
+        ],
+    },
+    {"protocol": "tcp", "port": 0, "recordRequests": True},
+]
+
+
+def test_snapshot_round_trip(fake, tmp_path):
+    path = str(tmp_path / "imposters.json.gz")
+    sink = HistogramSink()
+    mountebank = Mountebank(
+        url=fake.url, mirror=True, instrumentation=Instrumentation(sink)
+    )
+    ports = [mountebank.add_imposter(imposter).port for imposter in IMPOSTERS]
+    fake.record_requests(ports[1], [{"method": "GET", "path": "/"}])
+    saved = {port: mountebank.get_imposter(port).stubs for port in ports}
+
+    mountebank.save_snapshot(path)
+    mountebank.delete_all_imposters()
+    loaded = mountebank.load_snapshot(path)
+
+    with gzip.open(path, "rt") as file:
+        snapshot = json.load(file)
+    assert "requests" not in snapshot["imposters"][1]
+    assert sorted(imposter.port for imposter in loaded) == sorted(ports)
+    assert {port: mountebank.get_imposter(port).stubs for port in ports} == saved
+    assert len(mountebank.mirror) == 0
+    assert sink.get(REQUEST_BYTES, operation="PUT /imposters") is None
+
+
+@httpretty.activate
+def test_save_snapshot_asks_for_replayable_imposters(tmp_path):
+    path = str(tmp_path / "imposters.json.gz")
+    httpretty.register_uri(
+        httpretty.GET, "https://mountebank.ca/imposters", body='{"imposters": []}'
+    )
+
+    Mountebank(url="https://mountebank.ca").save_snapshot(path, remove_proxies=False)
+
+    assert httpretty.last_request().querystring == {
+        "replayable": ["true"],
+        "removeProxies": ["false"],
+    }
+    with gzip.open(path, "rt") as file:
+        assert json.load(file) == {"imposters": []}
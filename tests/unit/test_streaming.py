@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from mounty.streaming import iter_json_array
+
+
+DOCUMENT = json.dumps(
+    {
+        "protocol": "http",
+        "port": 4555,
+        "numberOfRequests": 123456,
+        "_links": {"self": {"href": "http://localhost:2525/imposters/4555"}},
+        "requests": [
+            {"method": "POST", "path": f"/café/{index}", "body": '{"a": "}"}'}
+            for index in range(20)
+        ],
+        "stubs": [{"responses": [{"is": {"statusCode": 201}}]}],
+    }
+).encode()
+
+
+def chunked(payload, size):
+    return (payload[index : index + size] for index in range(0, len(payload), size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, len(DOCUMENT)])
+def test_iter_json_array(chunk_size):
+    items = list(iter_json_array(chunked(DOCUMENT, chunk_size), "requests"))
+    assert items == json.loads(DOCUMENT)["requests"]
+
+
+def test_iter_json_array_missing_key():
+    assert list(iter_json_array([b'{"port": 4555, "stubs": []}'], "requests")) == []
+
+
+def test_iter_json_array_empty_array():
+    assert list(iter_json_array([b'{"requests": [ ]}'], "requests")) == []
+
+
+def test_iter_json_array_invalid_document():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'["not", "an", "object"]'], "requests"))
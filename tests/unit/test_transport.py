@@ -0,0 +1,146 @@
+import httpretty
+import pytest
+
+from mounty import Mountebank
+from mounty.errors import Unavailable
+from mounty.fake import _free_port
+from mounty.instrumentation import RETRIES, HistogramSink, Instrumentation
+from mounty.transport import CircuitBreaker, RetryPolicy, Transport
+
+NO_DELAY = RetryPolicy(retries=2, initial=0.0)
+
+
+@pytest.fixture
+def dead_url():
+    return f"http://127.0.0.1:{_free_port('127.0.0.1')}"
+
+
+def test_retry_delays_are_jittered_and_bounded():
+    delays = list(RetryPolicy(retries=5, initial=0.1, maximum=0.3).delays())
+
+    assert len(delays) == 5
+    assert all(
+        0 <= delay <= bound for delay, bound in zip(delays, [0.1, 0.2, 0.3, 0.3, 0.3])
+    )
+
+
+def test_refused_connection_raises_unavailable_after_retries(dead_url):
+    transport = Transport(retry=NO_DELAY)
+
+    with pytest.raises(Unavailable):
+        Mountebank(url=dead_url, transport=transport).get_imposters()
+
+    assert transport.last_retries == 2
+
+
+def test_post_is_not_retried(dead_url):
+    transport = Transport(retry=NO_DELAY)
+
+    with pytest.raises(Unavailable):
+        Mountebank(url=dead_url, transport=transport).add_imposter(
+            {"protocol": "tcp", "port": 4545}
+        )
+
+    assert transport.last_retries == 0
+
+
+def test_circuit_opens_after_threshold_failed_calls(dead_url):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=60)
+    mountebank = Mountebank(
+        url=dead_url, transport=Transport(retry=NO_DELAY, circuit_breaker=breaker)
+    )
+    for failures in (1, 2):
+        with pytest.raises(Unavailable, match="failed"):
+            mountebank.get_imposters()
+        # retried attempts count as a single failure
+        assert (breaker.state, breaker.failures) == ("closed", failures)
+
+    with pytest.raises(Unavailable, match="failed"):
+        mountebank.get_imposters()
+    assert breaker.state == "open"
+
+
+def test_circuit_opens_and_fails_fast(fake, dead_url):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=60)
+    with pytest.raises(Unavailable):
+        Mountebank(
+            url=dead_url, transport=Transport(retry=NO_DELAY, circuit_breaker=breaker)
+        ).get_imposters()
+    assert breaker.state == "open"
+
+    # no call goes through while the circuit is open, even to a live node
+    mountebank = Mountebank(url=fake.url, transport=Transport(circuit_breaker=breaker))
+    with pytest.raises(Unavailable, match="Circuit open"):
+        mountebank.get_imposters()
+
+
+def test_failed_half_open_trial_opens_the_circuit_again(dead_url):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    mountebank = Mountebank(
+        url=dead_url, transport=Transport(retry=NO_DELAY, circuit_breaker=breaker)
+    )
+
+    with pytest.raises(Unavailable, match="failed"):
+        mountebank.get_imposters()
+
+    assert mountebank.transport.last_retries == 2
+    assert breaker.failures == 2
+    # reset_timeout elapsed: the next call is a new trial
+    with pytest.raises(Unavailable, match="failed"):
+        mountebank.get_imposters()
+
+
+def test_half_open_circuit_closes_on_success(fake):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+
+    Mountebank(
+        url=fake.url, transport=Transport(circuit_breaker=breaker)
+    ).get_imposters()
+
+    assert (breaker.state, breaker.failures) == ("closed", 0)
+
+
+def test_error_responses_do_not_open_the_circuit(fake):
+    breaker = CircuitBreaker(threshold=1)
+    mountebank = Mountebank(url=fake.url, transport=Transport(circuit_breaker=breaker))
+
+    assert mountebank.delete_imposter(4545) is None
+    assert breaker.state == "closed"
+
+
+def test_threads_share_the_connection_pool(fake):
+    mountebank = Mountebank(url=fake.url, pool_size=2)
+    adapter = mountebank.transport.session.get_adapter(fake.url)
+    for _ in range(3):
+        # a new executor, with new threads, for every batch
+        mountebank.add_imposters(
+            *({"protocol": "http"} for _ in range(4)), max_workers=2
+        )
+
+    # connections are reused by the threads of the next batches
+    assert adapter.poolmanager.connection_from_url(fake.url).num_connections <= 2
+    mountebank.close()
+
+
+@httpretty.activate
+def test_unavailable_status_is_retried_and_instrumented():
+    httpretty.register_uri(
+        httpretty.GET,
+        "http://localhost:2525/imposters",
+        responses=[
+            httpretty.Response(body="", status=503),
+            httpretty.Response(body='{"imposters": []}'),
+        ],
+    )
+    sink = HistogramSink()
+    mountebank = Mountebank(
+        url="http://localhost:2525",
+        instrumentation=Instrumentation(sink),
+        transport=Transport(retry=NO_DELAY),
+    )
+
+    assert mountebank.get_imposters() == []
+    assert sink.get(RETRIES, operation="GET /imposters").sum == 1
@@ -0,0 +1,114 @@
+import httpretty
+import pytest
+
+from mounty import Mountebank
+from mounty.errors import MissingFields, ValidationError
+from mounty.models import Imposter, Stub
+from mounty.validation import validate_imposters, validate_stubs
+
+VALID = {
+    "protocol": "http",
+    "port": 4545,
+    "recordRequests": True,
+    "stubs": [
+        {
+            "predicates": [
+                {"equals": {"method": "GET"}, "caseSensitive": True},
+                {
+                    "or": [
+                        {"startsWith": {"path": "/a"}},
+                        {"not": {"exists": {"body": True}}},
+                    ]
+                },
+                {"matches": {"body": "x"}, "jsonpath": {"selector": "$.id"}},
+            ],
+            "responses": [
+                {"is": {"statusCode": 200}, "repeat": 2, "behaviors": [{"wait": 10}]},
+                {"proxy": {"to": "http://origin", "mode": "proxyAlways"}},
+                {"fault": "CONNECTION_RESET_BY_PEER"},
+                {"inject": "function (config) { return {}; }"},
+            ],
+        },
+        {"responses": [{"is": {"body": "default"}}]},
+    ],
+}
+
+
+def test_valid_imposters():
+    validate_imposters(VALID)
+    validate_imposters(Imposter(None, "tcp", [Stub([{"is": {"data": "x"}}])]))
+    validate_imposters({"protocol": "grpc"}, protocols=["grpc"])
+
+
+def test_every_error_is_reported():
+    invalid = {
+        "port": 70000,
+        "stubs": [
+            {
+                "predicates": [
+                    {"equal": {"path": "/"}},
+                    {"equals": {"path": "/"}, "contains": {"body": "x"}},
+                    {"and": []},
+                    {"equals": "/", "jsonpath": {}},
+                ],
+                "responses": [{"is": {}, "proxy": {}}, {"fault": "BOOM", "repeat": 0}],
+            },
+            {"responses": {"is": {}}},
+        ],
+    }
+
+    with pytest.raises(ValidationError) as info:
+        validate_imposters(VALID, invalid)
+
+    assert info.value.errors == [
+        "imposters[1].protocol: required field",
+        "imposters[1].port: expected a port number, got 70000",
+        "imposters[1].stubs[0].predicates[0]: unknown predicate operator 'equal'",
+        "imposters[1].stubs[0].predicates[0]: expected exactly one operator, found none",
+        "imposters[1].stubs[0].predicates[1]: expected exactly one operator, "
+        "found equals, contains",
+        "imposters[1].stubs[0].predicates[2].and: expected a non empty list of predicates",
+        "imposters[1].stubs[0].predicates[3].equals: expected an object, got str",
+        "imposters[1].stubs[0].predicates[3].jsonpath.selector: required string",
+        "imposters[1].stubs[0].responses[0]: expected one response type, found is, proxy",
+        "imposters[1].stubs[0].responses[0].proxy.to: required string",
+        "imposters[1].stubs[0].responses[1].fault: unknown fault 'BOOM'",
+        "imposters[1].stubs[0].responses[1].repeat: expected a positive integer, got 0",
+        "imposters[1].stubs[1].responses: expected a list, got dict",
+    ]
+    assert isinstance(info.value, MissingFields)
+    assert info.value.code == "bad data"
+
+
+def test_invalid_stub():
+    with pytest.raises(
+        ValidationError, match=r"stub.responses\[0\]: unknown response field 'iss'"
+    ):
+        validate_stubs({"responses": [{"iss": {}}]})
+
+
+@httpretty.activate(allow_net_connect=False)
+def test_invalid_upload_is_not_sent():
+    mountebank = Mountebank(url="http://localhost:2525")
+
+    with pytest.raises(ValidationError):
+        mountebank.overwrite_imposters(VALID, {"protocol": "htp", "port": 4546})
+    with pytest.raises(ValidationError):
+        mountebank.add_stub({"predicates": [{}]}, 4545)
+
+    assert httpretty.latest_requests() == []
+
+
+@httpretty.activate
+def test_validation_can_be_disabled():
+    httpretty.register_uri(
+        httpretty.POST,
+        "http://localhost:2525/imposters",
+        body='{"protocol": "htp", "port": 4545}',
+    )
+
+    imposter = Mountebank(url="http://localhost:2525", validate=False).add_imposter(
+        {"protocol": "htp", "port": 4545}
+    )
+
+    assert imposter.protocol == "htp"